@@ -10,7 +10,7 @@ GUIDE D'UTILISATION:
 1. INSTALLATION:
    - Installer Python 3.8+
    - Exécuter: python installer.py
-   - Ou manuellement: pip install Pillow openpyxl
+   - Ou manuellement: pip install Pillow openpyxl numpy
 
 2. LANCEMENT:
    - python main_gui.py
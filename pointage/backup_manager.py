@@ -2,80 +2,494 @@
 # FICHIER: backup_manager.py (Gestionnaire de sauvegardes)
 # =============================================================================
 
-import shutil
+import hashlib
+import json
+import lzma
 import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 import sqlite3
 
+from logger import get_logger
+from metrics import counter, gauge, timed
+
+logger = get_logger(__name__)
+
+_backup_errors = counter('sauvegarde_erreurs_total', "Sauvegardes et restaurations en échec")
+_backup_bytes_read = gauge('sauvegarde_octets_lus', "Taille de la base lue par la dernière sauvegarde")
+_backup_bytes_stored = gauge('sauvegarde_octets_stockes', "Octets ajoutés au magasin par la dernière sauvegarde")
+_backup_throughput = gauge('sauvegarde_debit_octets_s', "Débit de lecture de la dernière sauvegarde")
+_backup_timestamp = gauge('sauvegarde_derniere_horodatage', "Date (epoch) de la dernière sauvegarde réussie")
+
+# Format des fichiers différentiels: en-tête, longueur du manifeste, manifeste JSON, pages
+DELTA_MAGIC = b'PTDELTA1'
+
+# Compression des blocs du magasin: un octet d'en-tête identifie l'algorithme
+COMPRESSORS = {
+    'zlib': (b'z', lambda data: zlib.compress(data, 6)),
+    'lzma': (b'x', lambda data: lzma.compress(data, preset=6)),
+}
+DECOMPRESSORS = {
+    b'z': zlib.decompress,
+    b'x': lzma.decompress,
+}
+
 class BackupManager:
     """Gestionnaire de sauvegardes de la base de données"""
     
-    def __init__(self, db_path="pointage.db", backup_dir="sauvegardes"):
+    def __init__(self, db_path="pointage.db", backup_dir="sauvegardes",
+                 pages_per_step=256, step_sleep=0.005, rebase_ratio=0.5,
+                 chunk_size=65536, compression='zlib'):
         self.db_path = db_path
         self.backup_dir = backup_dir
+        self.chunks_dir = os.path.join(backup_dir, "chunks")
+        self.pages_per_step = pages_per_step  # Pages copiées par étape de l'API backup
+        self.step_sleep = step_sleep          # Pause entre deux étapes (laisse passer les écritures)
+        self.rebase_ratio = rebase_ratio      # Au-delà de cette part de pages modifiées, nouvelle base
+        self.chunk_size = chunk_size          # Taille des blocs du magasin (multiple de la taille de page)
+        self.compression = compression
+        self.last_stats = None
+        # Écriture des sauvegardes et nettoyage (ramasse-miettes des blocs) exclusifs
+        self._lock = threading.RLock()
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Compression inconnue: {compression}")
         if not os.path.exists(backup_dir):
             os.makedirs(backup_dir)
     
-    def create_backup(self):
-        """Crée une sauvegarde de la base de données"""
+    @timed('sauvegarde_secondes', "Durée des sauvegardes et restaurations", type='complete')
+    def create_backup(self, progress=None):
+        """Crée une sauvegarde complète à chaud, qui sert aussi de base aux différentielles"""
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_filename = f"pointage_backup_{timestamp}.db"
-            backup_path = os.path.join(self.backup_dir, backup_filename)
-            
-            # Copie de la base de données
-            shutil.copy2(self.db_path, backup_path)
+            with self._lock:
+                backup_path = self._new_backup_path('.db')
+                
+                # Copie page par page via l'API backup de SQLite
+                self._snapshot(backup_path, progress)
+                self._write_base_manifest(backup_path)
             
             return backup_path
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde: {e}")
+        except Exception:
+            logger.exception("Erreur lors de la sauvegarde")
+            _backup_errors.inc()
+            return None
+    
+    @timed('sauvegarde_secondes', "Durée des sauvegardes et restaurations", type='differentielle')
+    def create_incremental_backup(self, progress=None):
+        """Sauvegarde différentielle: seules les pages modifiées depuis la dernière base"""
+        # La base choisie ne doit pas être supprimée par un nettoyage concurrent
+        with self._lock:
+            return self._create_incremental_backup(progress)
+    
+    def _create_incremental_backup(self, progress):
+        base_path = self._latest_base()
+        if base_path is None:
+            return self.create_backup(progress)
+        
+        snapshot_path = None
+        try:
+            fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=self.backup_dir)
+            os.close(fd)
+            self._snapshot(snapshot_path, progress)
+            
+            with open(self._manifest_path(base_path), 'r', encoding='utf-8') as f:
+                base_manifest = json.load(f)
+            page_size, hashes = self._page_hashes(snapshot_path)
+            
+            changed = [
+                page_no for page_no, page_hash in enumerate(hashes)
+                if page_size != base_manifest['page_size']
+                or page_no >= len(base_manifest['pages'])
+                or base_manifest['pages'][page_no] != page_hash
+            ]
+            
+            # Trop de changements: une nouvelle base coûte moins cher qu'un gros différentiel
+            if page_size != base_manifest['page_size'] or len(changed) > self.rebase_ratio * len(hashes):
+                os.remove(snapshot_path)
+                snapshot_path = None
+                return self.create_backup(progress)
+            
+            delta_path = self._new_backup_path('.delta')
+            self._write_delta(snapshot_path, delta_path, os.path.basename(base_path),
+                              page_size, len(hashes), changed)
+            return delta_path
+        except Exception:
+            logger.exception("Erreur lors de la sauvegarde différentielle")
+            _backup_errors.inc()
             return None
+        finally:
+            if snapshot_path and os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+    
+    @timed('sauvegarde_secondes', "Durée des sauvegardes et restaurations", type='blocs')
+    def create_chunked_backup(self, progress=None):
+        """Sauvegarde dans le magasin de blocs: seuls les blocs inconnus sont stockés, compressés"""
+        snapshot_path = None
+        try:
+            start = time.perf_counter()
+            fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=self.backup_dir)
+            os.close(fd)
+            self._snapshot(snapshot_path, progress)
+            
+            chunks = []
+            bytes_read = 0
+            bytes_stored = 0
+            new_chunks = 0
+            # Un bloc déjà présent n'est pas réécrit: le ramasse-miettes ne doit pas
+            # le supprimer avant que le manifeste qui le référence soit écrit
+            with self._lock, open(snapshot_path, 'rb') as f:
+                chunk = f.read(self.chunk_size)
+                while chunk:
+                    digest = hashlib.sha256(chunk).hexdigest()
+                    stored = self._store_chunk(digest, chunk)
+                    if stored:
+                        new_chunks += 1
+                        bytes_stored += stored
+                    chunks.append(digest)
+                    bytes_read += len(chunk)
+                    chunk = f.read(self.chunk_size)
+                
+                manifest_path = self._new_backup_path('.manifest')
+                with open(manifest_path, 'w', encoding='utf-8') as manifest:
+                    json.dump({'chunk_size': self.chunk_size, 'size': bytes_read, 'chunks': chunks}, manifest)
+            
+            elapsed = time.perf_counter() - start
+            self.last_stats = {
+                'path': manifest_path,
+                'bytes_read': bytes_read,
+                'bytes_stored': bytes_stored,
+                'chunks': len(chunks),
+                'new_chunks': new_chunks,
+                'seconds': elapsed,
+                'throughput_mb_s': bytes_read / elapsed / 1e6 if elapsed else 0.0,
+                'savings': 1 - bytes_stored / bytes_read if bytes_read else 0.0,
+            }
+            _backup_bytes_read.set(bytes_read)
+            _backup_bytes_stored.set(bytes_stored)
+            _backup_throughput.set(bytes_read / elapsed if elapsed else 0.0)
+            _backup_timestamp.set(time.time())
+            return manifest_path
+        except Exception:
+            logger.exception("Erreur lors de la sauvegarde par blocs")
+            _backup_errors.inc()
+            return None
+        finally:
+            if snapshot_path and os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+    
+    def rebuild_chunked_backup(self, manifest_path, dest_path):
+        """Reconstruit une base complète à partir d'un manifeste du magasin de blocs"""
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        with open(dest_path, 'wb') as dest:
+            for digest in manifest['chunks']:
+                with open(self._chunk_path(digest), 'rb') as chunk_file:
+                    data = chunk_file.read()
+                chunk = DECOMPRESSORS[data[:1]](data[1:])
+                if hashlib.sha256(chunk).hexdigest() != digest:
+                    raise ValueError(f"Bloc corrompu: {digest}")
+                dest.write(chunk)
+        return dest_path
+    
+    def store_usage(self):
+        """Retourne la taille logique des sauvegardes par blocs et leur taille réelle sur disque"""
+        logical = 0
+        for filename in os.listdir(self.backup_dir):
+            if filename.endswith('.manifest'):
+                with open(os.path.join(self.backup_dir, filename), 'r', encoding='utf-8') as f:
+                    logical += json.load(f)['size']
+        
+        physical = 0
+        for digest in self._stored_chunks():
+            physical += os.path.getsize(self._chunk_path(digest))
+        return {'logical_bytes': logical, 'stored_bytes': physical,
+                'savings': 1 - physical / logical if logical else 0.0}
     
     def auto_backup(self):
         """Sauvegarde automatique quotidienne"""
         today = datetime.now().strftime('%Y%m%d')
         
         # Vérifier si une sauvegarde existe déjà aujourd'hui
-        existing_backups = [f for f in os.listdir(self.backup_dir) 
+        existing_backups = [f for f in os.listdir(self.backup_dir)
                            if f.startswith(f"pointage_backup_{today}")]
         
         if not existing_backups:
-            return self.create_backup()
+            return self.create_chunked_backup()
         return None
     
     def cleanup_old_backups(self, days_to_keep=30):
-        """Supprime les anciennes sauvegardes"""
+        """Supprime les anciennes sauvegardes puis les blocs qui ne sont plus référencés"""
+        with self._lock:
+            self._cleanup_old_backups(days_to_keep)
+    
+    def _cleanup_old_backups(self, days_to_keep):
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
         
+        old_files = []
+        kept_bases = set()
         for filename in os.listdir(self.backup_dir):
-            if filename.startswith("pointage_backup_"):
+            if filename.startswith("pointage_backup_") and not filename.endswith('.json'):
                 file_path = os.path.join(self.backup_dir, filename)
                 file_time = datetime.fromtimestamp(os.path.getctime(file_path))
                 
                 if file_time < cutoff_date:
+                    old_files.append(filename)
+                elif filename.endswith('.delta'):
+                    # Une base reste nécessaire tant qu'un différentiel récent en dépend
                     try:
-                        os.remove(file_path)
-                        print(f"Ancienne sauvegarde supprimée: {filename}")
-                    except Exception as e:
-                        print(f"Erreur lors de la suppression de {filename}: {e}")
+                        kept_bases.add(self._read_delta_header(file_path)[0]['base'])
+                    except (OSError, ValueError, KeyError, struct.error) as e:
+                        logger.warning(f"Différentiel illisible ignoré au nettoyage: {filename} ({e})")
+        
+        for filename in old_files:
+            if filename in kept_bases:
+                continue
+            file_path = os.path.join(self.backup_dir, filename)
+            try:
+                os.remove(file_path)
+                if os.path.exists(self._manifest_path(file_path)):
+                    os.remove(self._manifest_path(file_path))
+                logger.info(f"Ancienne sauvegarde supprimée: {filename}")
+            except Exception:
+                logger.exception(f"Erreur lors de la suppression de {filename}")
+        
+        self._collect_chunks()
+    
+    def rebuild_backup(self, delta_path, dest_path):
+        """Reconstruit une base complète à partir de sa base et d'un différentiel"""
+        manifest, data_offset = self._read_delta_header(delta_path)
+        base_path = os.path.join(os.path.dirname(delta_path), manifest['base'])
+        page_size = manifest['page_size']
+        
+        shutil.copyfile(base_path, dest_path)
+        with open(delta_path, 'rb') as delta, open(dest_path, 'r+b') as dest:
+            delta.seek(data_offset)
+            for page_no in manifest['pages']:
+                dest.seek(page_no * page_size)
+                dest.write(delta.read(page_size))
+            dest.truncate(manifest['page_count'] * page_size)
+        return dest_path
     
-    def restore_backup(self, backup_path):
-        """Restaure une sauvegarde"""
+    @timed('sauvegarde_secondes', "Durée des sauvegardes et restaurations", type='restauration')
+    def restore_backup(self, backup_path, db=None):
+        """Restaure une sauvegarde (complète, différentielle ou par blocs).
+        
+        db: DatabaseManager ouvert sur la base restaurée. Il est mis hors ligne
+        pendant la copie (pointages en attente écrits, connexions fermées); les
+        caches construits au-dessus (membres, réunions) sont à recharger ensuite.
+        """
+        rebuilt_path = None
         try:
+            if backup_path.endswith('.delta') or backup_path.endswith('.manifest'):
+                fd, rebuilt_path = tempfile.mkstemp(suffix='.db', dir=self.backup_dir)
+                os.close(fd)
+                if backup_path.endswith('.delta'):
+                    backup_path = self.rebuild_backup(backup_path, rebuilt_path)
+                else:
+                    backup_path = self.rebuild_chunked_backup(backup_path, rebuilt_path)
+            
             # Vérifier que le fichier de sauvegarde est valide
             conn = sqlite3.connect(backup_path)
-            conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            result = conn.execute("PRAGMA integrity_check").fetchone()
             conn.close()
+            if result[0] != 'ok':
+                raise sqlite3.DatabaseError(f"Sauvegarde corrompue: {result[0]}")
             
-            # Créer une sauvegarde de la base actuelle
-            current_backup = self.create_backup()
-            
-            if current_backup:
-                # Restaurer la sauvegarde
-                shutil.copy2(backup_path, self.db_path)
-                return True
-            
-        except Exception as e:
-            print(f"Erreur lors de la restauration: {e}")
+            with db.offline() if db is not None else nullcontext():
+                # Créer une sauvegarde de la base actuelle (pointages en attente compris)
+                current_backup = self.create_chunked_backup()
+                
+                if current_backup:
+                    # Restaurer la sauvegarde dans la base vivante, par l'API backup
+                    src = sqlite3.connect(backup_path)
+                    dst = sqlite3.connect(self.db_path)
+                    try:
+                        src.backup(dst, pages=self.pages_per_step, sleep=self.step_sleep)
+                    finally:
+                        dst.close()
+                        src.close()
+                    return True
+        
+        except Exception:
+            logger.exception("Erreur lors de la restauration")
+            _backup_errors.inc()
+        finally:
+            if rebuilt_path and os.path.exists(rebuilt_path):
+                os.remove(rebuilt_path)
+        
+        return False
+    
+    def _new_backup_path(self, extension):
+        """Nom de sauvegarde horodaté, rendu unique si plusieurs tombent dans la même seconde"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(self.backup_dir, f"pointage_backup_{timestamp}{extension}")
+        counter = 1
+        while os.path.exists(path):
+            path = os.path.join(self.backup_dir, f"pointage_backup_{timestamp}_{counter}{extension}")
+            counter += 1
+        return path
+    
+    def _snapshot(self, dest_path, progress=None):
+        """Copie cohérente de la base vivante, par lots de pages"""
+        src = sqlite3.connect(self.db_path)
+        dst = sqlite3.connect(dest_path)
+        try:
+            src.backup(dst, pages=self.pages_per_step, progress=progress, sleep=self.step_sleep)
+            # Fichier autonome: pas de journal WAL à côté de la copie
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+            src.close()
+    
+    def _page_hashes(self, path):
+        """Retourne la taille de page et l'empreinte de chaque page du fichier"""
+        conn = sqlite3.connect(path)
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        conn.close()
+        
+        hashes = []
+        with open(path, 'rb') as f:
+            page = f.read(page_size)
+            while page:
+                hashes.append(hashlib.blake2b(page, digest_size=16).hexdigest())
+                page = f.read(page_size)
+        return page_size, hashes
+    
+    def _manifest_path(self, base_path):
+        return os.path.splitext(base_path)[0] + '.json'
+    
+    def _write_base_manifest(self, base_path):
+        """Enregistre les empreintes de pages d'une base complète"""
+        page_size, hashes = self._page_hashes(base_path)
+        with open(self._manifest_path(base_path), 'w', encoding='utf-8') as f:
+            json.dump({'page_size': page_size, 'pages': hashes}, f)
+    
+    def _latest_base(self):
+        """Retourne la dernière sauvegarde complète disposant d'un manifeste"""
+        bases = sorted(f for f in os.listdir(self.backup_dir)
+                       if f.startswith("pointage_backup_") and f.endswith('.db'))
+        for filename in reversed(bases):
+            path = os.path.join(self.backup_dir, filename)
+            if os.path.exists(self._manifest_path(path)):
+                return path
+        return None
+    
+    def _write_delta(self, snapshot_path, delta_path, base_name, page_size, page_count, changed):
+        """Écrit les pages modifiées d'un instantané dans un fichier différentiel"""
+        manifest = json.dumps({
+            'base': base_name,
+            'page_size': page_size,
+            'page_count': page_count,
+            'pages': changed
+        }).encode('utf-8')
         
-        return False
\ No newline at end of file
+        with open(snapshot_path, 'rb') as src, open(delta_path, 'wb') as dest:
+            dest.write(DELTA_MAGIC)
+            dest.write(struct.pack('<I', len(manifest)))
+            dest.write(manifest)
+            for page_no in changed:
+                src.seek(page_no * page_size)
+                dest.write(src.read(page_size))
+    
+    def _read_delta_header(self, delta_path):
+        """Lit le manifeste d'un fichier différentiel et la position des pages"""
+        with open(delta_path, 'rb') as f:
+            if f.read(len(DELTA_MAGIC)) != DELTA_MAGIC:
+                raise ValueError(f"Fichier différentiel invalide: {delta_path}")
+            (length,) = struct.unpack('<I', f.read(4))
+            manifest = json.loads(f.read(length).decode('utf-8'))
+        return manifest, len(DELTA_MAGIC) + 4 + length
+    
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+    
+    def _store_chunk(self, digest, chunk):
+        """Stocke un bloc compressé s'il est absent; retourne le nombre d'octets écrits"""
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return 0
+        
+        tag, compress = COMPRESSORS[self.compression]
+        data = tag + compress(chunk)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        # Écriture atomique: un bloc n'est jamais visible à moitié écrit
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+    
+    def _stored_chunks(self):
+        """Parcourt les empreintes des blocs présents dans le magasin"""
+        if not os.path.exists(self.chunks_dir):
+            return
+        for prefix in os.listdir(self.chunks_dir):
+            for digest in os.listdir(os.path.join(self.chunks_dir, prefix)):
+                if not digest.endswith('.tmp'):
+                    yield digest
+    
+    def _collect_chunks(self):
+        """Supprime les blocs qui ne sont plus référencés par aucun manifeste (sous self._lock)"""
+        referenced = set()
+        for filename in os.listdir(self.backup_dir):
+            if filename.endswith('.manifest'):
+                with open(os.path.join(self.backup_dir, filename), 'r', encoding='utf-8') as f:
+                    referenced.update(json.load(f)['chunks'])
+        
+        for digest in list(self._stored_chunks()):
+            if digest not in referenced:
+                try:
+                    os.remove(self._chunk_path(digest))
+                except OSError as e:
+                    logger.warning(f"Erreur lors de la suppression du bloc {digest}: {e}")
+
+
+class BackupScheduler:
+    """Exécute la sauvegarde automatique et le nettoyage dans un thread de fond"""
+    
+    def __init__(self, backup_manager, interval=3600, days_to_keep=30):
+        self.backup_manager = backup_manager
+        self.interval = interval
+        self.days_to_keep = days_to_keep
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Démarre le thread de planification"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="backup_scheduler", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Arrête le thread de planification"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+    
+    def run_once(self):
+        """Sauvegarde du jour si absente, puis nettoyage des anciennes sauvegardes"""
+        try:
+            if self.backup_manager.auto_backup():
+                stats = self.backup_manager.last_stats
+                if stats:
+                    logger.info(f"Sauvegarde {os.path.basename(stats['path'])}: "
+                                f"{stats['bytes_read'] / 1e6:.1f} Mo lus à {stats['throughput_mb_s']:.1f} Mo/s, "
+                                f"{stats['bytes_stored'] / 1e6:.2f} Mo stockés "
+                                f"({stats['savings']:.0%} d'économie)", extra={'sauvegarde': stats})
+            self.backup_manager.cleanup_old_backups(self.days_to_keep)
+        except Exception:
+            logger.exception("Erreur lors de la sauvegarde planifiée")
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
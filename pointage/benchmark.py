@@ -0,0 +1,338 @@
+# =============================================================================
+# FICHIER: benchmark.py (Mesures de performance)
+# =============================================================================
+
+"""
+Banc de mesure des chemins critiques de l'application de pointage.
+
+Une base synthétique est alimentée via DatabaseManager.add_membre et
+FingerprintManager.capture_template, puis on mesure:
+- le coût d'une capture (image BMP complète contre gabarit compact)
+- la latence de find_membre_by_fingerprint et de l'identification 1:N
+  (préfiltre LSH contre comparaison exhaustive)
+- la précision de l'identification 1:N: sondes authentiques bruitées
+  (nouvelle capture simulée d'un doigt enrôlé) et sondes d'imposteurs (doigts
+  non enrôlés), taux de fausses acceptations (FAR) et de faux rejets (FRR) au
+  seuil configuré, seuil correspondant à 1 % de FAR
+- le débit du pool d'identification sous une rafale de scans
+- le débit de add_participation
+- le temps de get_participants
+- le temps et le pic mémoire de la génération du rapport Excel
+
+Utilisation:
+    python benchmark.py --sizes 1000,10000 --output bench.json
+    python benchmark.py --sizes 100000 --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from config import Config
+from database import DatabaseManager
+from excel_generator import ExcelGenerator
+from fingerprint_manager import FingerprintManager
+from identification import IdentificationEngine
+from scan_pool import ScanWorkerPool
+
+
+def latency_stats(samples):
+    """Résumé des latences en millisecondes"""
+    samples = sorted(samples)
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.mean(samples) * 1000,
+        'median_ms': statistics.median(samples) * 1000,
+        'p95_ms': samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0] * 1000,
+        'max_ms': samples[-1] * 1000,
+    }
+
+
+def timed(func, *args, **kwargs):
+    """Exécute une fonction et retourne (résultat, durée, pic mémoire en octets)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def seed_database(db, fingerprint_manager, size, keep=200):
+    """Enrôle des membres synthétiques et retourne (ids, hashes, gabarits, images, durée).
+    
+    Les keep premiers gabarits et images sont conservés pour les sondes.
+    """
+    ids, hashes, templates, images = [], [], [], []
+    start = time.perf_counter()
+    for i in range(size):
+        # Même chemin que capture_template, en gardant l'image pour les sondes bruitées
+        img = fingerprint_manager.simulated_image()
+        template = fingerprint_manager.image_template(img)
+        fingerprint_hash = fingerprint_manager.generate_fingerprint_hash(template)
+        id_empreinte = db.add_membre({
+            'titre': random.choice(["M.", "Mme", "Dr.", "Pr."]),
+            'nom': f"NOM{i:06d}",
+            'prenom': f"Prenom{i}",
+            'service': f"Service {i % 25}",
+            'email': f"membre{i}@exemple.org",
+            'telephone': f"06{i:08d}",
+            'empreinte_hash': fingerprint_hash,
+            'gabarit_format': FingerprintManager.TEMPLATE_FORMAT,
+            'gabarit_data': template
+        })
+        ids.append(id_empreinte)
+        hashes.append(fingerprint_hash)
+        # Garder quelques gabarits pour les sondes d'identification
+        if len(templates) < keep:
+            templates.append((id_empreinte, template))
+            images.append((id_empreinte, img))
+    return ids, hashes, templates, images, time.perf_counter() - start
+
+
+def accuracy_stats(engine, fingerprint_manager, images, probes):
+    """FAR/FRR de l'identification au seuil du moteur, sur sondes bruitées et imposteurs.
+    
+    - FRR: sondes authentiques non reconnues (ou attribuées à un autre membre)
+    - FAR: sondes d'imposteurs acceptées
+    - erreurs_attribution: sondes authentiques attribuées à un autre membre
+    - rappel_prefiltre: sondes authentiques dont le meilleur gabarit (recherche
+      exhaustive) est aussi le premier candidat du préfiltre
+    Les scores sont ceux de la comparaison exhaustive (meilleur gabarit).
+    Retourne aussi la latence d'identify() sur les sondes bruitées et inconnues.
+    """
+    genuine_scores, impostor_scores = [], []
+    genuine_latency, impostor_latency = [], []
+    false_rejects = misidentified = false_accepts = prefilter_hits = 0
+    for id_empreinte, img in images[:probes]:
+        features = fingerprint_manager.image_features(fingerprint_manager.simulated_recapture(img))
+        start = time.perf_counter()
+        match = engine.identify(features)
+        genuine_latency.append(time.perf_counter() - start)
+        if match is None:
+            false_rejects += 1
+        elif match[0] != id_empreinte:
+            false_rejects += 1
+            misidentified += 1
+        best = engine.search(features, 1, prefilter=False)[0]
+        if best[0] == id_empreinte:
+            genuine_scores.append(best[1])
+        prefiltered = engine.search(features, 1)
+        if prefiltered and prefiltered[0][0] == best[0]:
+            prefilter_hits += 1
+    
+    for _ in range(probes):
+        features = fingerprint_manager.image_features(fingerprint_manager.simulated_image())
+        start = time.perf_counter()
+        match = engine.identify(features)
+        impostor_latency.append(time.perf_counter() - start)
+        if match is not None:
+            false_accepts += 1
+        impostor_scores.append(engine.search(features, 1, prefilter=False)[0][1])
+    
+    genuine = min(probes, len(images))
+    impostor_scores.sort()
+    genuine_scores.sort()
+    latencies = {'sondes_bruitees': latency_stats(genuine_latency),
+                 'sondes_inconnues': latency_stats(impostor_latency)}
+    return {
+        'seuil': engine.threshold,
+        'sondes_authentiques': genuine,
+        'sondes_imposteurs': probes,
+        'frr': false_rejects / genuine if genuine else None,
+        'far': false_accepts / probes,
+        'erreurs_attribution': misidentified,
+        'score_imposteur_max': impostor_scores[-1],
+        'seuil_far_1pct': impostor_scores[int(len(impostor_scores) * 0.99) - 1] if len(impostor_scores) > 1 else None,
+        'score_authentique_p5': genuine_scores[int(len(genuine_scores) * 0.05)] if genuine_scores else None,
+        'rappel_prefiltre': prefilter_hits / genuine if genuine else None,
+        'prefiltre_actif': len(engine) >= engine.prefilter_min,
+    }, latencies
+
+
+def capture_stats(fingerprint_manager, probes):
+    """Compare la capture d'une image BMP complète à celle d'un gabarit compact"""
+    result = {}
+    for name, capture in (('capture_fingerprint', fingerprint_manager.capture_fingerprint),
+                          ('capture_template', fingerprint_manager.capture_template)):
+        samples = []
+        for _ in range(probes):
+            start = time.perf_counter()
+            data, _ = capture()
+            samples.append(time.perf_counter() - start)
+        result[name] = dict(latency_stats(samples), bytes=len(data))
+    return result
+
+
+def run_size(size, workdir, probes, threshold=Config.FINGERPRINT_THRESHOLD):
+    """Exécute toutes les mesures pour une population donnée"""
+    db = DatabaseManager(os.path.join(workdir, f"bench_{size}.db"))
+    fingerprint_manager = FingerprintManager()
+    excel_generator = ExcelGenerator()
+    result = {'members': size}
+    
+    # Enrôlement
+    ids, hashes, templates, images, seed_time = seed_database(db, fingerprint_manager, size, probes)
+    result['enrollment'] = {'seconds': seed_time, 'members_per_s': size / seed_time}
+    result.update(capture_stats(fingerprint_manager, probes))
+    
+    # Recherche exacte par hash
+    samples = []
+    for fingerprint_hash in random.sample(hashes, min(probes, size)):
+        start = time.perf_counter()
+        db.find_membre_by_fingerprint(fingerprint_hash)
+        samples.append(time.perf_counter() - start)
+    result['find_membre_by_fingerprint'] = latency_stats(samples)
+    
+    # Identification 1:N sur les gabarits en mémoire
+    engine = IdentificationEngine(FingerprintManager.FEATURE_DIMENSION, threshold)
+    _, load_time, _ = timed(engine.load, fingerprint_manager.iter_features(db.iter_templates()))
+    samples = []
+    exhaustive = []
+    for _, template in templates[:probes]:
+        features = fingerprint_manager.decode_template(template)
+        start = time.perf_counter()
+        engine.identify(features)
+        samples.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        engine.search(features, 1, prefilter=False)
+        exhaustive.append(time.perf_counter() - start)
+    result['identification'] = dict(latency_stats(samples), load_seconds=load_time,
+                                    prefiltre=engine.stats())
+    result['identification_exhaustive'] = latency_stats(exhaustive)
+    precision, latencies = accuracy_stats(engine, fingerprint_manager, images, probes)
+    result['identification_precision'] = precision
+    result['identification_bruitee'] = latencies['sondes_bruitees']
+    result['identification_inconnue'] = latencies['sondes_inconnues']
+    
+    # Rafale de scans (capture + identification) à travers le pool de workers
+    def identify_scan(_):
+        template, _ = fingerprint_manager.capture_template()
+        return engine.identify(fingerprint_manager.decode_template(template))
+    
+    pool = ScanWorkerPool(identify_scan, Config.SCAN_WORKERS, Config.SCAN_QUEUE_SIZE,
+                          max_age=60.0, supersede=False)
+    burst = probes * 5
+    start = time.perf_counter()
+    for _ in range(burst):
+        pool.submit(block=True)
+    pool.wait()
+    elapsed = time.perf_counter() - start
+    stats = pool.stats()
+    pool.stop()
+    result['scan_pool'] = {'scans': burst, 'seconds': elapsed, 'per_s': burst / elapsed,
+                           'workers': Config.SCAN_WORKERS, 'latence_moyenne_ms': stats['latence_moyenne_ms'],
+                           'rejetes': stats['rejetes'], 'annules': stats['annules']}
+    
+    # Débit des pointages, avec l'écriture différée configurée comme dans l'application
+    db.enable_write_behind(Config.WRITE_BEHIND_INTERVAL_MS, Config.WRITE_BEHIND_MAX_ROWS)
+    reunion_id = db.create_reunion({'titre': f"Benchmark {size}", 'lieu': "Salle", 'date': datetime.now().isoformat()})
+    start = time.perf_counter()
+    for id_empreinte in ids:
+        db.add_participation(reunion_id, id_empreinte)
+    db.flush()
+    elapsed = time.perf_counter() - start
+    result['add_participation'] = {'count': size, 'seconds': elapsed, 'per_s': size / elapsed}
+    
+    batch_reunion = db.create_reunion({'titre': f"Benchmark lot {size}", 'lieu': "Salle", 'date': datetime.now().isoformat()})
+    start = time.perf_counter()
+    db.add_participations([(batch_reunion, id_empreinte) for id_empreinte in ids])
+    elapsed = time.perf_counter() - start
+    result['add_participations'] = {'count': size, 'seconds': elapsed, 'per_s': size / elapsed}
+    
+    # Lecture des participants
+    participants, elapsed, peak = timed(db.get_participants, reunion_id)
+    result['get_participants'] = {'rows': len(participants), 'seconds': elapsed, 'peak_bytes': peak}
+    
+    # Rapports Excel
+    reunion_info = {'titre': f"Benchmark {size}", 'date': datetime.now().isoformat(), 'lieu': "Salle"}
+    filepath = os.path.join(workdir, f"rapport_{size}.xlsx")
+    _, elapsed, peak = timed(excel_generator.generate_rapport_reunion, reunion_info, participants, filepath)
+    result['generate_rapport_reunion'] = {'seconds': elapsed, 'peak_bytes': peak}
+    del participants
+    
+    _, elapsed, peak = timed(excel_generator.generate_rapport_reunion_streaming, reunion_info,
+                             db.iter_participants(reunion_id), filepath, db.count_participants(reunion_id))
+    result['generate_rapport_reunion_streaming'] = {'seconds': elapsed, 'peak_bytes': peak}
+    
+    db.close()
+    return result
+
+
+def git_commit():
+    """Retourne le commit courant, si disponible"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    """Affiche le rapport entre deux exécutions pour les mesures communes"""
+    previous_runs = {run['members']: run for run in previous['results']}
+    for run in current['results']:
+        old = previous_runs.get(run['members'])
+        if not old:
+            continue
+        print(f"\n--- {run['members']} membres (vs {previous.get('commit') or 'précédent'}) ---")
+        for name, metrics in run.items():
+            if not isinstance(metrics, dict) or name not in old:
+                continue
+            for key in ('median_ms', 'seconds', 'peak_bytes', 'far', 'frr'):
+                if key in metrics and old[name].get(key):
+                    ratio = metrics[key] / old[name][key]
+                    print(f"{name}.{key}: {old[name][key]:.4g} -> {metrics[key]:.4g} (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de mesure de l'application de pointage")
+    parser.add_argument('--sizes', default='1000,10000',
+                        help="Populations à mesurer, séparées par des virgules (ex: 1000,10000,100000)")
+    parser.add_argument('--probes', type=int, default=200, help="Nombre de recherches mesurées")
+    parser.add_argument('--output', help="Fichier JSON de résultats (sortie standard sinon)")
+    parser.add_argument('--compare', help="Fichier JSON d'une exécution précédente à comparer")
+    parser.add_argument('--threshold', type=float, default=Config.FINGERPRINT_THRESHOLD,
+                        help="Seuil d'identification mesuré (réglage de FINGERPRINT_THRESHOLD)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    random.seed(args.seed)
+    report = {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': []
+    }
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(s) for s in args.sizes.split(',')):
+            print(f"Mesures pour {size} membres...", file=sys.stderr)
+            report['results'].append(run_size(size, workdir, args.probes, args.threshold))
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"Résultats écrits dans {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
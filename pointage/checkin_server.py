@@ -0,0 +1,495 @@
+# =============================================================================
+# FICHIER: checkin_server.py - Service de pointage multi-postes
+# =============================================================================
+
+"""
+Service de pointage partagé par plusieurs postes (bornes) sur le réseau local.
+
+Le service expose une petite API HTTP/JSON au-dessus de DatabaseManager:
+    GET  /reunions        réunions ouvertes au pointage
+    GET  /etat            compteurs du service
+    POST /identification  {"gabarit": base64}                  -> membre et score
+    POST /pointage        {"id_reunion": n, "gabarit": base64}  -> pointage
+                          (ou {"id_reunion": n, "id_empreinte": "..."})
+
+Les bornes capturent le gabarit localement (FingerprintManager.capture_template)
+et l'envoient encodé en base64. L'identification est servie par un index de
+gabarits partagé en mémoire, reconstruit quand des membres sont enrôlés,
+réenrôlés ou désactivés depuis un autre poste (vérifié toutes les
+reload_interval secondes); toutes les écritures passent par une seule tâche
+d'écriture, ce qui sérialise les pointages concurrents. Un pointage n'est
+accepté que pour une réunion planifiée ou en cours (404 si elle n'existe pas,
+409 sinon); une requête de plus de max_body octets est refusée (413).
+
+Utilisation:
+    python checkin_server.py serve --port 8765
+    python checkin_server.py simulate --clients 8 --scans 200
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import Config
+from database import DatabaseManager
+from fingerprint_manager import FingerprintManager
+from identification import IdentificationEngine, identification_latency, identification_results
+from logger import get_logger, setup_logging, span
+from member_cache import MemberCache
+from metrics import MetricsExporter
+from reunion_cache import ReunionCache
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error',
+           503: 'Service Unavailable'}
+
+# Champs d'un membre renvoyés aux bornes
+MEMBRE_FIELDS = ('id_empreinte', 'titre', 'nom', 'prenom', 'service')
+
+logger = get_logger(__name__)
+
+
+class CheckinServer:
+    """Service asyncio de pointage partagé entre plusieurs bornes"""
+    
+    def __init__(self, db: DatabaseManager, host: str = Config.CHECKIN_HOST, port: int = Config.CHECKIN_PORT,
+                 max_batch: int = 100, reload_interval: float = Config.CHECKIN_RELOAD_INTERVAL,
+                 max_body: int = Config.CHECKIN_MAX_BODY):
+        self.db = db
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.reload_interval = reload_interval
+        self.max_body = max_body
+        self.fingerprint_manager = FingerprintManager()
+        self.engine = IdentificationEngine(FingerprintManager.FEATURE_DIMENSION)
+        self.membres: Optional[MemberCache] = None
+        self.reunions: Optional[ReunionCache] = None
+        self.stats = {'requetes': 0, 'identifications': 0, 'pointages': 0, 'doublons': 0, 'rechargements': 0}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._reload_task: Optional[asyncio.Task] = None
+        self._signature = None
+        # Gabarits lus par le dernier chargement (anciens formats compris)
+        self._template_ids: Set[str] = set()
+        # Un seul thread pour les écritures: l'ordre de la file est l'ordre en base
+        self._db_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkin-writer')
+    
+    async def start(self):
+        """Charge les membres et les gabarits puis ouvre le port d'écoute"""
+        loop = asyncio.get_running_loop()
+        self.reunions = await loop.run_in_executor(None, ReunionCache, self.db)
+        await self.reload()
+        
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer())
+        if self.reload_interval:
+            self._reload_task = asyncio.create_task(self._reloader())
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        """Ferme le port, termine les écritures en file et vide l'écriture différée"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+        if self._queue is not None:
+            await self._queue.join()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        await asyncio.get_running_loop().run_in_executor(self._db_writer, self.db.flush)
+        self._db_writer.shutdown()
+    
+    async def serve_forever(self):
+        await self.start()
+        logger.info(f"Service de pointage à l'écoute sur http://{self.host}:{self.port} "
+                    f"({len(self.engine)} gabarits)")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+    
+    # -------------------------------------------------------------------------
+    # Rechargement
+    # -------------------------------------------------------------------------
+    
+    async def reload(self, force: bool = True) -> bool:
+        """Recharge le cache des membres et l'index des gabarits.
+        
+        Sans force, seulement si la signature des gabarits a changé depuis le
+        dernier chargement. Les gabarits enregistrés depuis (enrôlements,
+        réenrôlements) sont alors ajoutés à l'index en place; si des gabarits
+        ont disparu (désactivation), l'index est reconstruit. Les index sont
+        construits hors de la boucle puis remplacent les anciens: les
+        identifications en cours finissent sur l'ancien index. Retourne True
+        si les index ont été rechargés.
+        """
+        loop = asyncio.get_running_loop()
+        signature = await loop.run_in_executor(None, self.db.get_templates_signature)
+        if not force and signature == self._signature:
+            return False
+        with span('checkin_rechargement') as mesure:
+            membres = await loop.run_in_executor(None, MemberCache, self.db)
+            incremental = False
+            if not force and self._signature is not None:
+                incremental = await loop.run_in_executor(None, self._update_templates,
+                                                         self._signature[2], signature[1])
+            if not incremental:
+                self.engine, self._template_ids = await loop.run_in_executor(None, self._load_templates)
+            mesure['incremental'] = incremental
+        self.membres, self._signature = membres, signature
+        self.stats['rechargements'] += 1
+        return True
+    
+    async def _reloader(self):
+        """Tâche périodique: relit les réunions et recharge les index modifiés"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await loop.run_in_executor(None, self.reunions.load)
+                if await self.reload(force=False):
+                    logger.info(f"Index de pointage rechargé ({len(self.engine)} gabarits)")
+            except Exception:
+                logger.exception("Erreur lors du rechargement des membres")
+    
+    def _load_templates(self) -> Tuple[IdentificationEngine, Set[str]]:
+        engine = IdentificationEngine(FingerprintManager.FEATURE_DIMENSION)
+        template_ids: Set[str] = set()
+        if not Config.IDENTIFICATION_ENABLED:
+            return engine, template_ids
+        
+        def templates():
+            for template in self.db.iter_templates():
+                template_ids.add(template[0])
+                yield template
+        
+        engine.load(self.fingerprint_manager.iter_features(templates()))
+        return engine, template_ids
+    
+    def _update_templates(self, after_rowid: Optional[int], count: int) -> bool:
+        """Ajoute à l'index les gabarits enregistrés après after_rowid.
+        
+        Retourne False, sans modifier l'index, si des gabarits ont disparu
+        depuis le chargement (count gabarits actifs attendus): l'index doit
+        être reconstruit.
+        """
+        if not Config.IDENTIFICATION_ENABLED:
+            return True
+        templates = list(self.db.iter_templates(after_rowid=after_rowid))
+        if len(self._template_ids.union(template[0] for template in templates)) != count:
+            return False
+        self._template_ids.update(template[0] for template in templates)
+        self.engine.load(self.fingerprint_manager.iter_features(templates))
+        return True
+    
+    # -------------------------------------------------------------------------
+    # Écritures
+    # -------------------------------------------------------------------------
+    
+    async def _writer(self):
+        """Tâche d'écriture unique: traite la file de pointages par lots"""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            while len(items) < self.max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self._db_writer, self._write_batch,
+                                                     [(r, m) for r, m, _ in items])
+                for (_, _, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                for _, _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+    
+    def _write_batch(self, items: List[Tuple[int, str]]) -> List[bool]:
+        return [self.db.add_participation(id_reunion, id_empreinte) for id_reunion, id_empreinte in items]
+    
+    async def enregistrer_pointage(self, id_reunion: int, id_empreinte: str) -> bool:
+        """Met le pointage en file et attend son traitement (False si déjà pointé)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((id_reunion, id_empreinte, future))
+        return await future
+    
+    # -------------------------------------------------------------------------
+    # Identification
+    # -------------------------------------------------------------------------
+    
+    def _identify(self, template: bytes) -> Tuple[Optional[Dict], float]:
+        """Correspondance exacte par hash, puis recherche 1:N dans l'index partagé"""
+        with span('identification') as mesure, identification_latency.time():
+            membre = self.membres.find_by_hash(self.fingerprint_manager.generate_fingerprint_hash(template))
+            if membre:
+                score, mesure['resultat'] = 1.0, 'hash'
+            elif not Config.IDENTIFICATION_ENABLED:
+                score, mesure['resultat'] = 0.0, 'inconnu'
+            else:
+                match = self.engine.identify(self.fingerprint_manager.decode_template(template))
+                membre, score = (self.membres.get(match[0]), match[1]) if match else (None, 0.0)
+                mesure['resultat'] = 'membres' if membre else 'inconnu'
+        identification_results[mesure['resultat']].inc()
+        return membre, score
+    
+    async def identifier(self, template: bytes) -> Tuple[Optional[Dict], float]:
+        self.stats['identifications'] += 1
+        return await asyncio.get_running_loop().run_in_executor(None, self._identify, template)
+    
+    # -------------------------------------------------------------------------
+    # HTTP
+    # -------------------------------------------------------------------------
+    
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Connexion d'une borne: requêtes HTTP/1.1 successives (keep-alive)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if not 0 <= length <= self.max_body:
+                    # Corps non lu: la connexion ne peut pas être réutilisée
+                    status, payload = 413, {'erreur': f"Requête limitée à {self.max_body} octets"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self._dispatch(method, path, body)
+                data = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+                writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                              f"Content-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        self.stats['requetes'] += 1
+        routes = {
+            ('GET', '/reunions'): self._get_reunions,
+            ('GET', '/etat'): self._get_etat,
+            ('POST', '/identification'): self._post_identification,
+            ('POST', '/pointage'): self._post_pointage,
+        }
+        handler = routes.get((method, path.split('?', 1)[0]))
+        if handler is None:
+            known = any(route_path == path for _, route_path in routes)
+            return (405 if known else 404), {'erreur': f"{method} {path} non supporté"}
+        try:
+            data = json.loads(body) if body else {}
+            return await handler(data)
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {'erreur': f"Requête invalide: {e}"}
+        except Exception as e:
+            logger.exception("Erreur du service de pointage")
+            return 500, {'erreur': str(e)}
+    
+    async def _get_reunions(self, data: Dict) -> Tuple[int, Dict]:
+        # Le service ne crée pas de réunion: relire les réunions actives depuis la base
+        await asyncio.get_running_loop().run_in_executor(None, self.reunions.load)
+        return 200, {'reunions': self.reunions.actives()}
+    
+    async def _get_etat(self, data: Dict) -> Tuple[int, Dict]:
+        return 200, dict(self.stats, gabarits=len(self.engine), file_attente=self._queue.qsize())
+    
+    async def _post_identification(self, data: Dict) -> Tuple[int, Dict]:
+        membre, score = await self.identifier(base64.b64decode(data['gabarit']))
+        if not membre:
+            return 404, {'erreur': "Empreinte non reconnue"}
+        return 200, {'membre': {k: membre[k] for k in MEMBRE_FIELDS}, 'score': score}
+    
+    async def _post_pointage(self, data: Dict) -> Tuple[int, Dict]:
+        id_reunion = int(data['id_reunion'])
+        # Lu en base et non dans le cache: la réunion peut être close depuis un autre poste
+        reunion = await asyncio.get_running_loop().run_in_executor(None, self.db.get_reunion, id_reunion)
+        if reunion is None:
+            return 404, {'erreur': f"Réunion {id_reunion} introuvable"}
+        if reunion['statut'] not in ReunionCache.STATUTS_ACTIFS:
+            return 409, {'erreur': f"Réunion {id_reunion} fermée au pointage (statut {reunion['statut']})"}
+        
+        if 'id_empreinte' in data:
+            membre, score = self.membres.get(data['id_empreinte']), 1.0
+        else:
+            membre, score = await self.identifier(base64.b64decode(data['gabarit']))
+        if not membre:
+            return 404, {'erreur': "Empreinte non reconnue"}
+        
+        if await self.enregistrer_pointage(id_reunion, membre['id_empreinte']):
+            self.stats['pointages'] += 1
+            statut = 'enregistre'
+        else:
+            self.stats['doublons'] += 1
+            statut = 'deja_pointe'
+        return 200, {'statut': statut, 'membre': {k: membre[k] for k in MEMBRE_FIELDS}, 'score': score}
+
+
+class CheckinClient:
+    """Client asyncio d'une borne de pointage (connexion persistante)"""
+    
+    def __init__(self, host: str = Config.CHECKIN_HOST, port: int = Config.CHECKIN_PORT):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+    
+    async def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Tuple[int, Dict]:
+        """Envoie une requête et retourne (code HTTP, réponse JSON)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self._writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                            f"Content-Type: application/json\r\n"
+                            f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+        await self._writer.drain()
+        
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length))
+    
+    async def identifier(self, template: bytes) -> Tuple[int, Dict]:
+        return await self.request('POST', '/identification', {'gabarit': base64.b64encode(template).decode()})
+    
+    async def pointer(self, id_reunion: int, template: bytes) -> Tuple[int, Dict]:
+        return await self.request('POST', '/pointage', {'id_reunion': id_reunion,
+                                                        'gabarit': base64.b64encode(template).decode()})
+    
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+
+async def simulate(db: DatabaseManager, clients: int, scans: int, id_reunion: Optional[int] = None,
+                   noise: float = 0.02) -> Dict:
+    """Lance le service et des bornes simulées sur la même machine, et retourne le bilan"""
+    fingerprint_manager = FingerprintManager()
+    server = CheckinServer(db, port=0)
+    await server.start()
+    
+    # Sondes: gabarits enrôlés légèrement bruités, comme une nouvelle capture. Sans
+    # identification 1:N, seul le hash exact identifie: le gabarit enrôlé est envoyé tel quel.
+    samples = [features for _, features in fingerprint_manager.iter_features(db.iter_templates())]
+    if not Config.IDENTIFICATION_ENABLED:
+        noise = 0.0
+    if not samples:
+        await server.stop()
+        raise ValueError("Aucun gabarit en base: enrôler des membres avant la simulation")
+    if id_reunion is None:
+        id_reunion = db.create_reunion({'titre': "Simulation multi-postes", 'lieu': "Local",
+                                        'date': datetime.now().isoformat()})
+    
+    latencies: List[float] = []
+    statuts: Dict[str, int] = {}
+    
+    async def borne():
+        client = CheckinClient(server.host, server.port)
+        try:
+            for _ in range(scans):
+                probe = random.choice(samples)
+                if noise:
+                    probe = probe + np.random.normal(0, noise, probe.shape).astype(np.float32)
+                start = time.perf_counter()
+                status, response = await client.pointer(id_reunion, fingerprint_manager.encode_template(probe))
+                latencies.append(time.perf_counter() - start)
+                statut = response.get('statut', f"http_{status}")
+                statuts[statut] = statuts.get(statut, 0) + 1
+        finally:
+            await client.close()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(borne() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await server.stop()
+    
+    latencies.sort()
+    return {
+        'reunion': id_reunion,
+        'bornes': clients,
+        'scans': len(latencies),
+        'secondes': elapsed,
+        'scans_par_s': len(latencies) / elapsed,
+        'latence_mediane_ms': statistics.median(latencies) * 1000,
+        'latence_p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'statuts': statuts,
+        'participants': db.count_participants(id_reunion),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service de pointage multi-postes")
+    parser.add_argument('--db', default=Config.DATABASE_PATH, help="Base de données")
+    subparsers = parser.add_subparsers(dest='commande', required=True)
+    
+    serve = subparsers.add_parser('serve', help="Démarre le service")
+    serve.add_argument('--host', default=Config.CHECKIN_HOST)
+    serve.add_argument('--port', type=int, default=Config.CHECKIN_PORT)
+    serve.add_argument('--metrics-port', type=int, default=Config.METRICS_PORT,
+                       help="Port local des métriques Prometheus")
+    
+    sim = subparsers.add_parser('simulate', help="Service et bornes simulées sur cette machine")
+    sim.add_argument('--clients', type=int, default=8, help="Nombre de bornes simulées")
+    sim.add_argument('--scans', type=int, default=100, help="Scans par borne")
+    sim.add_argument('--reunion', type=int, help="Réunion cible (créée si absente)")
+    args = parser.parse_args()
+    
+    setup_logging(Config.LOGS_DIR, Config.LOG_LEVEL)
+    db = DatabaseManager(args.db, storage_mode=Config.DATABASE_STORAGE_MODE)
+    db.enable_write_behind(Config.WRITE_BEHIND_INTERVAL_MS, Config.WRITE_BEHIND_MAX_ROWS)
+    try:
+        if args.commande == 'serve':
+            exporter = MetricsExporter(port=args.metrics_port, path=Config.METRICS_FILE,
+                                       interval=Config.METRICS_INTERVAL)
+            exporter.start()
+            try:
+                asyncio.run(CheckinServer(db, args.host, args.port).serve_forever())
+            finally:
+                exporter.stop()
+        else:
+            print(json.dumps(asyncio.run(simulate(db, args.clients, args.scans, args.reunion)), indent=2))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,15 +14,57 @@ class Config:
     
     # Base de données
     DATABASE_PATH = "pointage.db"
+    DATABASE_STORAGE_MODE = "wal"       # "wal" ou "standard"
+    WRITE_BEHIND_INTERVAL_MS = 200      # Délai max avant commit groupé des pointages
+    WRITE_BEHIND_MAX_ROWS = 100         # Taille max d'un lot de pointages
     
     # Dossiers
     REPORTS_DIR = "rapports"
     LOGS_DIR = "logs"
     BACKUPS_DIR = "sauvegardes"
     
+    # Journalisation (lignes JSON dans LOGS_DIR, écrites par un thread dédié)
+    LOG_LEVEL = "INFO"
+    
+    # Métriques (texte Prometheus sur http://127.0.0.1:METRICS_PORT/metrics)
+    METRICS_PORT = None          # Port local des métriques (ex. 9108), None: désactivé
+    METRICS_FILE = None          # Fichier d'instantané (.json ou texte Prometheus), None pour aucun
+    METRICS_INTERVAL = 15        # Période d'écriture du fichier (secondes)
+    
+    # Profilage (résultats profil_*.txt / .collapsed / .prof dans LOGS_DIR)
+    PROFILING_MODE = None        # None, 'echantillonnage' ou 'cprofile' (main_gui.py --profil)
+    PROFILING_SAMPLE_MS = 10     # Période d'échantillonnage des piles (millisecondes)
+    PROFILING_DUMP_INTERVAL = 60 # Période d'écriture des résultats (secondes)
+    
+    # Service de pointage multi-postes
+    CHECKIN_HOST = "127.0.0.1"
+    CHECKIN_PORT = 8765
+    CHECKIN_RELOAD_INTERVAL = 30 # Relecture des membres, gabarits et réunions modifiés (secondes)
+    CHECKIN_MAX_BODY = 65536     # Taille maximale d'une requête (octets), 413 au-delà
+    
+    # Sauvegardes
+    BACKUP_INTERVAL = 3600              # Vérification de la sauvegarde quotidienne (secondes)
+    BACKUP_DAYS_TO_KEEP = 30
+    BACKUP_COMPRESSION = "zlib"         # "zlib" ou "lzma"
+    
     # Empreintes
-    FINGERPRINT_THRESHOLD = 0.8  # Seuil de correspondance
+    FINGERPRINT_THRESHOLD = 0.80 # Seuil de correspondance (benchmark.py, 50 000 membres: FAR 0/2000, FRR 2,6 %)
     FINGERPRINT_TIMEOUT = 10     # Timeout de capture en secondes
+    SCAN_WORKERS = 2             # Workers d'identification
+    SCAN_QUEUE_SIZE = 8          # Scans en attente au maximum
+    SCAN_MAX_AGE = 5.0           # Un scan en attente depuis plus longtemps est abandonné (s)
+    SCAN_POLL_MS = 50            # Période de livraison des résultats à l'interface
+    
+    # Identification 1:N sur les densités de crêtes filtrées passe-bande. Désactivée,
+    # seule la correspondance exacte du hash de gabarit identifie un membre. À
+    # remesurer avec benchmark.py (FAR, FRR) et FINGERPRINT_THRESHOLD à régler
+    # pour tout changement de lecteur ou de caractéristiques.
+    IDENTIFICATION_ENABLED = True
+    IDENTIFICATION_LSH_TABLES = 20       # Tables du préfiltre LSH
+    IDENTIFICATION_LSH_BITS = 8          # Hyperplans par table (2^bits seaux)
+    IDENTIFICATION_CANDIDATES = 300      # Candidats comparés en entier après le préfiltre
+    IDENTIFICATION_PREFILTER_MIN = 5000  # En dessous, comparaison exhaustive
+    IDENTIFICATION_FALLBACK_MARGIN = 0.05  # Repli exhaustif si le meilleur candidat est à moins de cet écart du seuil (0: jamais)
     
     # Interface
     WINDOW_WIDTH = 1000
@@ -30,6 +72,9 @@ class Config:
     
     # Rapports
     EXCEL_TEMPLATE = "template_rapport.xlsx"
+    REPORT_WORKERS = 1                  # Rapports générés simultanément
+    REPORT_POLL_MS = 250                # Période de suivi des rapports en arrière-plan
+    RAPPORT_COMBO_LIMIT = 200           # Réunions proposées dans la liste des rapports
     
     @classmethod
     def init_directories(cls):
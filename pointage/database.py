@@ -4,116 +4,733 @@
 
 import sqlite3
 import hashlib
+import json
 import os
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Sequence, Set, Tuple, Union
+
+from logger import get_logger, span
+from metrics import counter, gauge, histogram, timed
+
+logger = get_logger(__name__)
+
+_batch_latency = histogram('db_ecriture_lot_secondes', "Durée d'un commit groupé de pointages")
+_batch_rows = counter('db_pointages_ecrits_total', "Pointages écrits par l'écriture différée")
+_pending_rows = gauge('db_pointages_en_attente', "Pointages en attente d'écriture différée")
+_batch_errors = counter('db_ecriture_lot_erreurs_total', "Échecs d'écriture d'un lot de pointages (lot réessayé)")
+_lost_rows = counter('db_pointages_perdus_total', "Pointages non écrits à l'arrêt après échecs répétés")
+_replayed_rows = counter('db_pointages_rejoues_total', "Pointages en échec rejoués à l'ouverture de la base")
+
+
+# Marqueur de file: termine le lot en cours sans attendre l'intervalle
+_FLUSH = object()
+
+
+def _query(methode: str):
+    """Durée des méthodes de DatabaseManager, par méthode"""
+    return timed('db_requete_secondes', "Durée des méthodes de DatabaseManager", methode=methode)
+
+
+# Modes de stockage: PRAGMAs appliqués à chaque connexion ouverte
+STORAGE_MODES = {
+    'standard': {},
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,       # 16 Mo
+        'mmap_size': 268435456,     # 256 Mo
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+class ConnectionPool:
+    """Pool de connexions SQLite réutilisées, une connexion par thread"""
+    
+    def __init__(self, db_path: str, cached_statements: int = 256, timeout: float = 10.0,
+                 pragmas: Optional[Dict] = None):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self.pragmas = dict(pragmas or {})
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """Retourne la connexion du thread courant, créée au premier appel"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        
+        # Le cache de requêtes préparées de sqlite3 reste chaud tant que la connexion vit
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        self._local.conn = conn
+        
+        with self._lock:
+            self._prune_dead_threads()
+            self._connections[threading.current_thread()] = conn
+        return conn
+    
+    def set_pragmas(self, pragmas: Dict):
+        """Change les PRAGMAs appliqués; les connexions existantes sont rouvertes"""
+        self.pragmas = dict(pragmas)
+        self.close_all()
+    
+    @contextmanager
+    def connection(self):
+        """Fournit la connexion du thread courant dans une transaction"""
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def _prune_dead_threads(self):
+        """Ferme les connexions des threads terminés (scan_thread, capture_thread...)"""
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            try:
+                self._connections.pop(thread).close()
+            except sqlite3.Error:
+                pass
+    
+    def close_all(self):
+        """Ferme toutes les connexions ouvertes par le pool"""
+        with self._lock:
+            for conn in self._connections.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class ParticipationWriter:
+    """File d'écriture différée: regroupe les pointages en une seule transaction.
+    
+    Un lot en échec (base verrouillée, disque plein...) n'est pas abandonné: ses
+    pointages restent en attente et sont réessayés avec un délai croissant,
+    jusqu'à retry_max_delay secondes. Les pointages encore en échec à l'arrêt
+    sont journalisés un par un, comptés, et ajoutés au fichier replay_path
+    (une ligne JSON par pointage) pour être rejoués à la prochaine ouverture
+    de la base (DatabaseManager.replay_participations).
+    """
+    
+    def __init__(self, pool: ConnectionPool, interval_ms: int = 200, max_rows: int = 100,
+                 retry_delay: float = 0.1, retry_max_delay: float = 5.0, replay_path: Optional[str] = None):
+        self.pool = pool
+        self.replay_path = replay_path
+        self.interval = interval_ms / 1000.0
+        self.max_rows = max_rows
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self._queue: "queue.Queue[Optional[Tuple[int, str, str]]]" = queue.Queue()
+        self._pending = set()
+        self._failed: List[Tuple[int, str, str]] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="participation_writer", daemon=True)
+        self._thread.start()
+    
+    def is_pending(self, id_reunion: int, id_empreinte: str) -> bool:
+        """Indique si un pointage attend encore d'être écrit"""
+        with self._lock:
+            return (id_reunion, id_empreinte) in self._pending
+    
+    def has_pending(self) -> bool:
+        """Indique si des pointages attendent d'être écrits"""
+        with self._lock:
+            return bool(self._pending)
+    
+    @property
+    def failed_rows(self) -> int:
+        """Nombre de pointages dont l'écriture a échoué et sera réessayée"""
+        with self._lock:
+            return len(self._failed)
+    
+    def submit(self, id_reunion: int, id_empreinte: str,
+               is_written: Optional[Callable[[int, str], bool]] = None) -> bool:
+        """Met un pointage en file; False s'il y est déjà ou s'il est déjà écrit.
+        
+        Le pointage est réservé dans l'ensemble des attentes avant l'appel de
+        is_written: deux scans simultanés du même membre ne peuvent pas être
+        acceptés tous les deux, même si un lot est écrit entre-temps.
+        """
+        key = (id_reunion, id_empreinte)
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            _pending_rows.set(len(self._pending))
+        
+        try:
+            written = is_written is not None and is_written(id_reunion, id_empreinte)
+        except Exception:
+            self._release([key])
+            raise
+        if written:
+            self._release([key])
+            return False
+        
+        # L'heure est figée à la réception, pas au moment du commit
+        heure = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self._queue.put((id_reunion, id_empreinte, heure))
+        return True
+    
+    def flush(self):
+        """Écrit sans attendre les pointages en file (ou les met en réessai)"""
+        self._queue.put(_FLUSH)
+        self._queue.join()
+    
+    def stop(self):
+        """Écrit les pointages restants et arrête le thread d'écriture"""
+        self._queue.put(None)
+        self._thread.join()
+    
+    def _run(self):
+        """Boucle du thread d'écriture: commit tous les N ms ou M lignes"""
+        delay = self.retry_delay
+        running = True
+        while running:
+            # Lot en échec: nouvel essai après le délai, même sans nouveau pointage
+            items, running = self._collect(delay if self._failed else None)
+            batch = self._failed + items
+            if not batch or self._write_batch(batch):
+                failed = []
+                delay = self.retry_delay
+            else:
+                failed = batch
+                delay = min(delay * 2, self.retry_max_delay)
+            with self._lock:
+                self._failed = failed
+            for _ in items:
+                self._queue.task_done()
+        
+        if self._failed:
+            for id_reunion, id_empreinte, heure in self._failed:
+                logger.error("Pointage non écrit: réunion %s, membre %s, %s", id_reunion, id_empreinte, heure,
+                             extra={'id_reunion': id_reunion, 'id_empreinte': id_empreinte, 'heure_pointage': heure})
+            _lost_rows.inc(len(self._failed))
+            self._save_for_replay(self._failed)
+            self._release([(id_reunion, id_empreinte) for id_reunion, id_empreinte, _ in self._failed])
+            self._failed = []
+    
+    def _save_for_replay(self, rows: List[Tuple[int, str, str]]):
+        """Ajoute les pointages non écrits au fichier de rejeu"""
+        if not self.replay_path:
+            return
+        try:
+            with open(self.replay_path, 'a', encoding='utf-8') as f:
+                for id_reunion, id_empreinte, heure in rows:
+                    f.write(json.dumps({'id_reunion': id_reunion, 'id_empreinte': id_empreinte,
+                                        'heure_pointage': heure}) + '\n')
+            logger.warning(f"{len(rows)} pointages non écrits enregistrés pour rejeu dans {self.replay_path}")
+        except OSError:
+            logger.exception(f"Impossible d'enregistrer les pointages non écrits dans {self.replay_path}")
+    
+    def _collect(self, timeout: Optional[float]) -> Tuple[List[Tuple[int, str, str]], bool]:
+        """Lit le prochain lot de la file: (pointages, False si arrêt demandé)"""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return [], True
+        if item is None:
+            self._queue.task_done()
+            return [], False
+        if item is _FLUSH:
+            self._queue.task_done()
+            return [], True
+        
+        batch = [item]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.max_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.task_done()
+                return batch, False
+            if item is _FLUSH:
+                self._queue.task_done()
+                break
+            batch.append(item)
+        return batch, True
+    
+    def _write_batch(self, batch: List[Tuple[int, str, str]]) -> bool:
+        """Insère un lot de pointages dans une seule transaction; False en cas d'échec"""
+        try:
+            with span('db_ecriture_participations', lignes=len(batch)), _batch_latency.time():
+                with self.pool.connection() as conn:
+                    conn.executemany('''
+                    INSERT INTO Participation (id_reunion, id_empreinte, heure_pointage)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (id_reunion, id_empreinte) DO NOTHING
+                    ''', batch)
+        except Exception:
+            logger.exception(f"Erreur lors de l'écriture différée de {len(batch)} participations, lot réessayé")
+            _batch_errors.inc()
+            return False
+        _batch_rows.inc(len(batch))
+        self._release([(id_reunion, id_empreinte) for id_reunion, id_empreinte, _ in batch])
+        return True
+    
+    def _release(self, keys: List[Tuple[int, str]]):
+        with self._lock:
+            for key in keys:
+                self._pending.discard(key)
+            _pending_rows.set(len(self._pending))
+
 
 class DatabaseManager:
     """Gestionnaire de base de données pour l'application de pointage"""
     
-    def __init__(self, db_path: str = "pointage.db"):
+    def __init__(self, db_path: str = "pointage.db", storage_mode: str = "wal"):
         self.db_path = db_path
-        self.init_database()
+        self.pool = ConnectionPool(db_path)
+        self.writer: Optional[ParticipationWriter] = None
+        # Pointages de l'écriture différée restés en échec à l'arrêt
+        self.replay_path = f"{db_path}.pointages_a_rejouer.jsonl"
+        self.init_database(storage_mode)
+        self.replay_participations()
     
-    def init_database(self):
+    def init_database(self, storage_mode: str = "wal"):
         """Initialise la base de données avec les tables nécessaires"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Mode de stockage inconnu: {storage_mode}")
+        self.storage_mode = storage_mode
+        self.pool.set_pragmas(STORAGE_MODES[storage_mode])
+        
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Table Membre
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS Membre (
+                id_empreinte TEXT PRIMARY KEY,
+                titre TEXT NOT NULL,
+                nom TEXT NOT NULL,
+                prenom TEXT NOT NULL,
+                service TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                telephone TEXT,
+                empreinte_data BLOB,            -- Historique: les gabarits sont dans la table Gabarit
+                empreinte_hash TEXT,
+                date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                actif BOOLEAN DEFAULT 1
+            )
+            ''')
+            
+            # Table Reunion
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS Reunion (
+                id_reunion INTEGER PRIMARY KEY AUTOINCREMENT,
+                titre_reunion TEXT NOT NULL,
+                lieu TEXT NOT NULL,
+                date_reunion TIMESTAMP NOT NULL,
+                date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                statut TEXT DEFAULT 'planifiee'
+            )
+            ''')
+            
+            # Table Participation
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS Participation (
+                id_participation INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_reunion INTEGER,
+                id_empreinte TEXT,
+                heure_pointage TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                methode_pointage TEXT DEFAULT 'empreinte',
+                service TEXT,                   -- Service du membre au moment du pointage
+                FOREIGN KEY (id_reunion) REFERENCES Reunion(id_reunion),
+                FOREIGN KEY (id_empreinte) REFERENCES Membre(id_empreinte)
+            )
+            ''')
+            
+            # Table Gabarit: données d'empreinte séparées des colonnes d'identité
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS Gabarit (
+                id_empreinte TEXT PRIMARY KEY,
+                gabarit_format TEXT NOT NULL,
+                gabarit_data BLOB NOT NULL,
+                date_maj TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (id_empreinte) REFERENCES Membre(id_empreinte)
+            )
+            ''')
+            
+            # Table Invitation: membres attendus à une réunion
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS Invitation (
+                id_reunion INTEGER NOT NULL,
+                id_empreinte TEXT NOT NULL,
+                date_invitation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (id_reunion, id_empreinte),
+                FOREIGN KEY (id_reunion) REFERENCES Reunion(id_reunion),
+                FOREIGN KEY (id_empreinte) REFERENCES Membre(id_empreinte)
+            ) WITHOUT ROWID
+            ''')
+            
+            # Index pour performances
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_reunion_date ON Reunion(date_reunion)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_reunion_statut_date ON Reunion(statut, date_reunion)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_membre_empreinte_hash ON Membre(empreinte_hash)')
+            
+            # Migration: les images héritées quittent la table Membre, au format 'bmp'.
+            # Elles sont converties en gabarits compacts au premier chargement.
+            cursor.execute('''
+            INSERT OR IGNORE INTO Gabarit (id_empreinte, gabarit_format, gabarit_data)
+            SELECT id_empreinte, 'bmp', empreinte_data FROM Membre WHERE empreinte_data IS NOT NULL
+            ''')
+            migrated = cursor.execute('''
+            UPDATE Membre SET empreinte_data = NULL WHERE empreinte_data IS NOT NULL
+            ''').rowcount
+            
+            # Migration: un seul pointage par membre et par réunion. Les doublons
+            # existants sont supprimés (le premier pointage est conservé) avant
+            # la création de l'index unique, qui remplace aussi l'index simple.
+            cursor.execute('''
+            SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_participation_unique'
+            ''')
+            if cursor.fetchone() is None:
+                cursor.execute('''
+                DELETE FROM Participation WHERE id_participation NOT IN (
+                    SELECT MIN(id_participation) FROM Participation GROUP BY id_reunion, id_empreinte
+                )
+                ''')
+                cursor.execute('DROP INDEX IF EXISTS idx_participation_reunion')
+                cursor.execute('''
+                CREATE UNIQUE INDEX idx_participation_unique ON Participation(id_reunion, id_empreinte)
+                ''')
+            
+            self._init_statistics(cursor)
+        
+        # Récupérer l'espace libéré par les images déplacées
+        if migrated:
+            self.pool.get_connection().execute('VACUUM')
+    
+    def _init_statistics(self, cursor: sqlite3.Cursor):
+        """Tables de statistiques de présence tenues à jour par triggers"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'StatReunion'")
+        backfill = cursor.fetchone() is None
+        
+        # Migration: le service est figé sur le pointage, pour que l'ajout et le
+        # retrait d'un pointage portent sur le même compteur même si le membre
+        # change de service entre-temps. Les anciens triggers lisaient le
+        # service courant du membre: ils sont remplacés et StatService recalculé.
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(Participation)')}
+        if 'service' not in columns:
+            cursor.execute('ALTER TABLE Participation ADD COLUMN service TEXT')
+            cursor.execute('DROP TRIGGER IF EXISTS trg_participation_stats_insert')
+            cursor.execute('DROP TRIGGER IF EXISTS trg_participation_stats_delete')
+            cursor.execute('''
+            UPDATE Participation
+            SET service = COALESCE((SELECT service FROM Membre WHERE id_empreinte = Participation.id_empreinte), '')
+            ''')
+            if not backfill:
+                cursor.execute('DELETE FROM StatService')
+                cursor.execute('''
+                INSERT INTO StatService (id_reunion, service, nb_participants)
+                SELECT id_reunion, service, COUNT(*) FROM Participation GROUP BY id_reunion, service
+                ''')
         
-        # Table Membre
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Membre (
-            id_empreinte TEXT PRIMARY KEY,
-            titre TEXT NOT NULL,
-            nom TEXT NOT NULL,
-            prenom TEXT NOT NULL,
-            service TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            telephone TEXT,
-            empreinte_data BLOB,
-            empreinte_hash TEXT,
-            date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            actif BOOLEAN DEFAULT 1
+        CREATE TABLE IF NOT EXISTS StatReunion (
+            id_reunion INTEGER PRIMARY KEY,
+            nb_participants INTEGER NOT NULL DEFAULT 0,
+            premier_pointage TIMESTAMP,
+            dernier_pointage TIMESTAMP
         )
         ''')
         
-        # Table Reunion
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Reunion (
-            id_reunion INTEGER PRIMARY KEY AUTOINCREMENT,
-            titre_reunion TEXT NOT NULL,
-            lieu TEXT NOT NULL,
-            date_reunion TIMESTAMP NOT NULL,
-            date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            statut TEXT DEFAULT 'planifiee'
+        CREATE TABLE IF NOT EXISTS StatService (
+            id_reunion INTEGER NOT NULL,
+            service TEXT NOT NULL,
+            nb_participants INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_reunion, service)
         )
         ''')
         
-        # Table Participation
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Participation (
-            id_participation INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_reunion INTEGER,
-            id_empreinte TEXT,
-            heure_pointage TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            methode_pointage TEXT DEFAULT 'empreinte',
-            FOREIGN KEY (id_reunion) REFERENCES Reunion(id_reunion),
-            FOREIGN KEY (id_empreinte) REFERENCES Membre(id_empreinte)
+        CREATE TABLE IF NOT EXISTS StatMembre (
+            id_empreinte TEXT NOT NULL,
+            mois TEXT NOT NULL,
+            nb_participations INTEGER NOT NULL DEFAULT 0,
+            dernier_pointage TIMESTAMP,
+            PRIMARY KEY (id_empreinte, mois)
         )
         ''')
         
-        # Index pour performances
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_reunion_date ON Reunion(date_reunion)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_participation_reunion ON Participation(id_reunion)')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_participation_stats_insert
+        AFTER INSERT ON Participation
+        BEGIN
+            INSERT INTO StatReunion (id_reunion, nb_participants, premier_pointage, dernier_pointage)
+            VALUES (NEW.id_reunion, 1, NEW.heure_pointage, NEW.heure_pointage)
+            ON CONFLICT (id_reunion) DO UPDATE SET
+                nb_participants = nb_participants + 1,
+                premier_pointage = MIN(COALESCE(premier_pointage, excluded.premier_pointage), excluded.premier_pointage),
+                dernier_pointage = MAX(COALESCE(dernier_pointage, excluded.dernier_pointage), excluded.dernier_pointage);
+            
+            UPDATE Participation
+            SET service = COALESCE((SELECT service FROM Membre WHERE id_empreinte = NEW.id_empreinte), '')
+            WHERE id_participation = NEW.id_participation AND service IS NULL;
+            
+            INSERT INTO StatService (id_reunion, service, nb_participants)
+            SELECT NEW.id_reunion, service, 1 FROM Participation WHERE id_participation = NEW.id_participation
+            ON CONFLICT (id_reunion, service) DO UPDATE SET nb_participants = nb_participants + 1;
+            
+            INSERT INTO StatMembre (id_empreinte, mois, nb_participations, dernier_pointage)
+            VALUES (NEW.id_empreinte, strftime('%Y-%m', NEW.heure_pointage), 1, NEW.heure_pointage)
+            ON CONFLICT (id_empreinte, mois) DO UPDATE SET
+                nb_participations = nb_participations + 1,
+                dernier_pointage = MAX(COALESCE(dernier_pointage, excluded.dernier_pointage), excluded.dernier_pointage);
+        END;
+        ''')
         
-        conn.commit()
-        conn.close()
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_participation_stats_delete
+        AFTER DELETE ON Participation
+        BEGIN
+            UPDATE StatReunion SET nb_participants = nb_participants - 1
+            WHERE id_reunion = OLD.id_reunion;
+            
+            UPDATE StatService SET nb_participants = nb_participants - 1
+            WHERE id_reunion = OLD.id_reunion AND service = OLD.service;
+            
+            UPDATE StatMembre SET nb_participations = nb_participations - 1
+            WHERE id_empreinte = OLD.id_empreinte AND mois = strftime('%Y-%m', OLD.heure_pointage);
+        END;
+        ''')
+        
+        # Base existante: calcul initial depuis les pointages déjà enregistrés
+        if backfill:
+            cursor.execute('''
+            INSERT INTO StatReunion (id_reunion, nb_participants, premier_pointage, dernier_pointage)
+            SELECT id_reunion, COUNT(*), MIN(heure_pointage), MAX(heure_pointage)
+            FROM Participation GROUP BY id_reunion
+            ''')
+            cursor.execute('''
+            INSERT INTO StatService (id_reunion, service, nb_participants)
+            SELECT id_reunion, service, COUNT(*) FROM Participation GROUP BY id_reunion, service
+            ''')
+            cursor.execute('''
+            INSERT INTO StatMembre (id_empreinte, mois, nb_participations, dernier_pointage)
+            SELECT id_empreinte, strftime('%Y-%m', heure_pointage), COUNT(*), MAX(heure_pointage)
+            FROM Participation GROUP BY id_empreinte, strftime('%Y-%m', heure_pointage)
+            ''')
+    
+    def enable_write_behind(self, interval_ms: int = 200, max_rows: int = 100,
+                            retry_max_delay: float = 5.0):
+        """Active l'écriture différée et groupée des pointages"""
+        if self.writer is None:
+            self.writer = ParticipationWriter(self.pool, interval_ms, max_rows,
+                                              retry_max_delay=retry_max_delay, replay_path=self.replay_path)
     
-    def add_membre(self, membre_data: Dict) -> bool:
-        """Ajoute un nouveau membre"""
+    def replay_participations(self) -> int:
+        """Écrit les pointages restés en échec lors d'une exécution précédente.
+        
+        Le fichier de rejeu est supprimé une fois ses pointages écrits (les
+        doublons sont ignorés); il est conservé en cas d'échec. Retourne le
+        nombre de pointages ajoutés.
+        """
+        if not os.path.exists(self.replay_path):
+            return 0
+        try:
+            with open(self.replay_path, 'r', encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            with self.pool.connection() as conn:
+                cursor = conn.executemany('''
+                INSERT INTO Participation (id_reunion, id_empreinte, heure_pointage)
+                VALUES (:id_reunion, :id_empreinte, :heure_pointage)
+                ON CONFLICT (id_reunion, id_empreinte) DO NOTHING
+                ''', rows)
+            os.remove(self.replay_path)
+        except (OSError, ValueError, sqlite3.Error):
+            logger.exception(f"Erreur lors du rejeu des pointages de {self.replay_path}")
+            return 0
+        _replayed_rows.inc(cursor.rowcount)
+        logger.info(f"{cursor.rowcount} pointages rejoués depuis {self.replay_path}")
+        return cursor.rowcount
+    
+    def flush(self):
+        """Écrit immédiatement les pointages en attente"""
+        if self.writer is not None:
+            self.writer.flush()
+    
+    def close(self):
+        """Écrit les pointages en attente et ferme les connexions ouvertes"""
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+        self.pool.close_all()
+    
+    @contextmanager
+    def offline(self):
+        """Met la base hors ligne le temps d'une opération sur le fichier (restauration).
+        
+        Les pointages en attente sont écrits, le thread d'écriture arrêté et les
+        connexions du pool fermées; les connexions sont rouvertes à la demande et
+        l'écriture différée relancée en sortie.
+        """
+        writer = self.writer
+        self.close()
+        try:
+            yield
+        finally:
+            if writer is not None:
+                self.enable_write_behind(int(writer.interval * 1000), writer.max_rows, writer.retry_max_delay)
+    
+    @_query('add_membre')
+    def add_membre(self, membre_data: Dict) -> Optional[str]:
+        """Ajoute un nouveau membre et retourne son id_empreinte"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Génération de l'ID empreinte
             id_empreinte = self.generate_fingerprint_id(membre_data['nom'], membre_data['prenom'])
             
-            cursor.execute('''
-            INSERT INTO Membre (id_empreinte, titre, nom, prenom, service, email, telephone, empreinte_data, empreinte_hash)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                id_empreinte,
-                membre_data['titre'],
-                membre_data['nom'],
-                membre_data['prenom'],
-                membre_data['service'],
-                membre_data['email'],
-                membre_data.get('telephone', ''),
-                membre_data.get('empreinte_data'),
-                membre_data.get('empreinte_hash')
-            ))
-            
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            print(f"Erreur lors de l'ajout du membre: {e}")
-            return False
+            with span('db_membre'), self.pool.connection() as conn:
+                conn.execute('''
+                INSERT INTO Membre (id_empreinte, titre, nom, prenom, service, email, telephone, empreinte_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    id_empreinte,
+                    membre_data['titre'],
+                    membre_data['nom'],
+                    membre_data['prenom'],
+                    membre_data['service'],
+                    membre_data['email'],
+                    membre_data.get('telephone', ''),
+                    membre_data.get('empreinte_hash')
+                ))
+                
+                # Gabarit compact si fourni, sinon image brute à convertir plus tard
+                if membre_data.get('gabarit_data') is not None:
+                    gabarit = (membre_data['gabarit_format'], membre_data['gabarit_data'])
+                elif membre_data.get('empreinte_data') is not None:
+                    gabarit = ('bmp', membre_data['empreinte_data'])
+                else:
+                    gabarit = None
+                if gabarit:
+                    conn.execute('''
+                    INSERT INTO Gabarit (id_empreinte, gabarit_format, gabarit_data)
+                    VALUES (?, ?, ?)
+                    ''', (id_empreinte,) + gabarit)
+            return id_empreinte
+        except Exception:
+            logger.exception("Erreur lors de l'ajout du membre")
+            return None
+    
+    @_query('import_membres')
+    def import_membres(self, batches: Iterable[List[Dict]],
+                       on_error: Optional[Callable[[Dict, str], None]] = None) -> int:
+        """Insère des lots de membres (avec gabarit) dans une seule transaction.
+        
+        Les lots sont consommés au fil de l'eau: le verrou d'écriture est tenu
+        jusqu'au commit final. Chaque lot est inséré dans un SAVEPOINT; si le
+        lot échoue, il est annulé et repris ligne par ligne, et chaque ligne
+        refusée par la base est signalée à on_error(membre, erreur) sans
+        annuler les autres. Retourne le nombre de membres insérés (0 si la
+        transaction a été annulée).
+        """
+        count = 0
+        try:
+            with self.pool.connection() as conn:
+                if not conn.in_transaction:
+                    # Sans BEGIN explicite, le premier SAVEPOINT ouvrirait la
+                    # transaction et son RELEASE la validerait
+                    conn.execute('BEGIN')
+                for batch in batches:
+                    for membre_data in batch:
+                        membre_data.setdefault('id_empreinte', self.generate_fingerprint_id(
+                            membre_data['nom'], membre_data['prenom'] + membre_data['email']))
+                    
+                    with span('db_import_lot', lignes=len(batch)):
+                        conn.execute('SAVEPOINT import_lot')
+                        try:
+                            self._insert_membres(conn, batch)
+                            conn.execute('RELEASE import_lot')
+                            count += len(batch)
+                            continue
+                        except sqlite3.Error:
+                            conn.execute('ROLLBACK TO import_lot')
+                            conn.execute('RELEASE import_lot')
+                        
+                        for membre_data in batch:
+                            conn.execute('SAVEPOINT import_ligne')
+                            try:
+                                self._insert_membres(conn, [membre_data])
+                            except sqlite3.Error as e:
+                                conn.execute('ROLLBACK TO import_ligne')
+                                conn.execute('RELEASE import_ligne')
+                                logger.warning(f"Membre {membre_data['email']} refusé à l'import: {e}")
+                                if on_error:
+                                    on_error(membre_data, f"Refusé par la base: {e}")
+                                continue
+                            conn.execute('RELEASE import_ligne')
+                            count += 1
+            return count
+        except Exception:
+            logger.exception("Erreur lors de l'import des membres")
+            return 0
+    
+    def _insert_membres(self, conn: sqlite3.Connection, membres: List[Dict]):
+        """Insère des membres et leurs gabarits sur la connexion fournie"""
+        conn.executemany('''
+        INSERT INTO Membre (id_empreinte, titre, nom, prenom, service, email, telephone, empreinte_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(
+            m['id_empreinte'], m['titre'], m['nom'], m['prenom'], m['service'],
+            m['email'], m.get('telephone', ''), m.get('empreinte_hash')
+        ) for m in membres])
+        conn.executemany('''
+        INSERT INTO Gabarit (id_empreinte, gabarit_format, gabarit_data)
+        VALUES (?, ?, ?)
+        ''', [(m['id_empreinte'], m['gabarit_format'], m['gabarit_data'])
+              for m in membres if m.get('gabarit_data') is not None])
+    
+    def get_membre_emails(self) -> Set[str]:
+        """Récupère les emails déjà enregistrés (contrainte d'unicité)"""
+        cursor = self.pool.get_connection().execute('SELECT email FROM Membre')
+        return {row[0] for row in cursor}
     
     def get_all_membres(self) -> List[Dict]:
         """Récupère tous les membres actifs"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT id_empreinte, titre, nom, prenom, service, email, telephone, date_creation
+        return list(self.iter_membres())
+    
+    def iter_membres(self, chunk_size: int = 500, rows: bool = False) -> Iterator:
+        """Parcourt les membres actifs par blocs (dict, ou sqlite3.Row si rows=True)"""
+        return self._iter_query('''
+        SELECT id_empreinte, titre, nom, prenom, service, email, telephone, date_creation, empreinte_hash
         FROM Membre WHERE actif = 1
         ORDER BY nom, prenom
-        ''')
+        ''', (), chunk_size, rows)
+    
+    @_query('get_membre')
+    def get_membre(self, id_empreinte: str) -> Optional[Dict]:
+        """Récupère un membre actif par son id_empreinte"""
+        cursor = self.pool.get_connection().execute('''
+        SELECT id_empreinte, titre, nom, prenom, service, email, telephone, date_creation, empreinte_hash
+        FROM Membre
+        WHERE id_empreinte = ? AND actif = 1
+        ''', (id_empreinte,))
         
-        membres = []
-        for row in cursor.fetchall():
-            membres.append({
+        row = cursor.fetchone()
+        
+        if row:
+            return {
                 'id_empreinte': row[0],
                 'titre': row[1],
                 'nom': row[2],
@@ -121,150 +738,427 @@ class DatabaseManager:
                 'service': row[4],
                 'email': row[5],
                 'telephone': row[6],
-                'date_creation': row[7]
-            })
+                'date_creation': row[7],
+                'empreinte_hash': row[8]
+            }
+        return None
+    
+    def iter_templates(self, chunk_size: int = 1000, after_rowid: Optional[int] = None) -> Iterator[Tuple[str, str, bytes]]:
+        """Parcourt les gabarits (id_empreinte, gabarit_format, gabarit_data) des membres actifs.
         
-        conn.close()
-        return membres
+        Avec after_rowid, seulement les gabarits enregistrés depuis (voir
+        get_templates_signature): enrôlements et réenrôlements.
+        """
+        cursor = self.pool.get_connection().execute('''
+        SELECT g.id_empreinte, g.gabarit_format, g.gabarit_data
+        FROM Gabarit g
+        JOIN Membre m ON g.id_empreinte = m.id_empreinte
+        WHERE m.actif = 1 AND g.rowid > ?
+        ''', (-1 if after_rowid is None else after_rowid,))
+        
+        # Lecture par blocs: les gabarits ne sont jamais tous en mémoire
+        rows = cursor.fetchmany(chunk_size)
+        while rows:
+            yield from rows
+            rows = cursor.fetchmany(chunk_size)
+    
+    def get_templates_signature(self) -> Tuple[int, int, Optional[int]]:
+        """Signature (membres actifs, gabarits, dernier rowid) qui change à chaque
+        enrôlement, réenrôlement (INSERT OR REPLACE) ou désactivation"""
+        return self.pool.get_connection().execute('''
+        SELECT (SELECT COUNT(*) FROM Membre WHERE actif = 1), COUNT(*), MAX(g.rowid)
+        FROM Gabarit g
+        JOIN Membre m ON g.id_empreinte = m.id_empreinte
+        WHERE m.actif = 1
+        ''').fetchone()
+    
+    @_query('get_template')
+    def get_template(self, id_empreinte: str) -> Optional[Tuple[str, bytes]]:
+        """Récupère le gabarit (gabarit_format, gabarit_data) d'un membre"""
+        cursor = self.pool.get_connection().execute('''
+        SELECT gabarit_format, gabarit_data FROM Gabarit WHERE id_empreinte = ?
+        ''', (id_empreinte,))
+        return cursor.fetchone()
     
+    @_query('save_templates')
+    def save_templates(self, templates: List[Tuple[str, str, bytes]]) -> bool:
+        """Enregistre ou remplace des gabarits (id_empreinte, gabarit_format, gabarit_data)"""
+        try:
+            with self.pool.connection() as conn:
+                conn.executemany('''
+                INSERT OR REPLACE INTO Gabarit (id_empreinte, gabarit_format, gabarit_data, date_maj)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ''', templates)
+            return True
+        except Exception:
+            logger.exception("Erreur lors de l'enregistrement des gabarits")
+            return False
+    
+    @_query('update_membre')
     def update_membre(self, id_empreinte: str, membre_data: Dict) -> bool:
-        """Met à jour un membre existant"""
+        """Met à jour un membre existant (et son gabarit en cas de réenrôlement)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            UPDATE Membre SET titre=?, nom=?, prenom=?, service=?, email=?, telephone=?
-            WHERE id_empreinte=?
-            ''', (
-                membre_data['titre'],
-                membre_data['nom'],
-                membre_data['prenom'],
-                membre_data['service'],
-                membre_data['email'],
-                membre_data.get('telephone', ''),
-                id_empreinte
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                conn.execute('''
+                UPDATE Membre SET titre=?, nom=?, prenom=?, service=?, email=?, telephone=?
+                WHERE id_empreinte=?
+                ''', (
+                    membre_data['titre'],
+                    membre_data['nom'],
+                    membre_data['prenom'],
+                    membre_data['service'],
+                    membre_data['email'],
+                    membre_data.get('telephone', ''),
+                    id_empreinte
+                ))
+                
+                # Nouvelle empreinte capturée: le gabarit et son hash sont remplacés
+                if membre_data.get('gabarit_data') is not None:
+                    conn.execute('''
+                    UPDATE Membre SET empreinte_hash=? WHERE id_empreinte=?
+                    ''', (membre_data.get('empreinte_hash'), id_empreinte))
+                    conn.execute('''
+                    INSERT OR REPLACE INTO Gabarit (id_empreinte, gabarit_format, gabarit_data)
+                    VALUES (?, ?, ?)
+                    ''', (id_empreinte, membre_data['gabarit_format'], membre_data['gabarit_data']))
             return True
-        except Exception as e:
-            print(f"Erreur lors de la mise à jour: {e}")
+        except Exception:
+            logger.exception("Erreur lors de la mise à jour")
             return False
     
+    @_query('create_reunion')
     def create_reunion(self, reunion_data: Dict) -> int:
         """Crée une nouvelle réunion"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT INTO Reunion (titre_reunion, lieu, date_reunion)
-        VALUES (?, ?, ?)
-        ''', (
-            reunion_data['titre'],
-            reunion_data['lieu'],
-            reunion_data['date']
-        ))
-        
-        reunion_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return reunion_id
-    
-    def get_reunions(self) -> List[Dict]:
-        """Récupère toutes les réunions"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT id_reunion, titre_reunion, lieu, date_reunion, statut
-        FROM Reunion
+        with self.pool.connection() as conn:
+            cursor = conn.execute('''
+            INSERT INTO Reunion (titre_reunion, lieu, date_reunion)
+            VALUES (?, ?, ?)
+            ''', (
+                reunion_data['titre'],
+                reunion_data['lieu'],
+                reunion_data['date']
+            ))
+            return cursor.lastrowid
+    
+    @_query('get_reunion')
+    def get_reunion(self, id_reunion: int) -> Optional[Dict]:
+        """Récupère une réunion par son identifiant"""
+        return next(self._iter_query('''
+        SELECT id_reunion, titre_reunion AS titre, lieu, date_reunion AS date, statut
+        FROM Reunion WHERE id_reunion = ?
+        ''', (id_reunion,), 1, False), None)
+    
+    @_query('get_reunions')
+    def get_reunions(self, statut: Union[str, Sequence[str], None] = None,
+                     date_debut: Optional[str] = None, date_fin: Optional[str] = None,
+                     limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Récupère les réunions, filtrées par statut et/ou période, des plus récentes aux plus anciennes"""
+        return list(self.iter_reunions(statut=statut, date_debut=date_debut, date_fin=date_fin,
+                                       limit=limit, offset=offset))
+    
+    def iter_reunions(self, chunk_size: int = 500, rows: bool = False,
+                      limit: Optional[int] = None, offset: int = 0,
+                      statut: Union[str, Sequence[str], None] = None,
+                      date_debut: Optional[str] = None, date_fin: Optional[str] = None) -> Iterator:
+        """Parcourt les réunions par blocs (dict, ou sqlite3.Row si rows=True)"""
+        where, params = self._reunion_filter(statut, date_debut, date_fin)
+        return self._iter_query(f'''
+        SELECT id_reunion, titre_reunion AS titre, lieu, date_reunion AS date, statut
+        FROM Reunion{where}
         ORDER BY date_reunion DESC
-        ''')
+        LIMIT ? OFFSET ?
+        ''', params + (-1 if limit is None else limit, offset), chunk_size, rows)
+    
+    @_query('get_reunions_periode')
+    def get_reunions_periode(self, date_debut: str, date_fin: str) -> List[Dict]:
+        """Récupère les réunions dont la date est comprise entre deux jours (AAAA-MM-JJ, inclus)"""
+        where, params = self._reunion_filter(None, date_debut, date_fin)
+        return list(self._iter_query(f'''
+        SELECT id_reunion, titre_reunion AS titre, lieu, date_reunion AS date, statut
+        FROM Reunion{where}
+        ORDER BY date_reunion, id_reunion
+        ''', params, 500, False))
+    
+    def _reunion_filter(self, statut: Union[str, Sequence[str], None], date_debut: Optional[str],
+                        date_fin: Optional[str]) -> Tuple[str, Tuple]:
+        """Clause WHERE des réunions (index idx_reunion_statut_date / idx_reunion_date)"""
+        conditions, params = [], []
+        if statut is not None:
+            statuts = (statut,) if isinstance(statut, str) else tuple(statut)
+            conditions.append(f"statut IN ({', '.join('?' * len(statuts))})")
+            params.extend(statuts)
+        if date_debut is not None:
+            conditions.append("date_reunion >= ?")
+            params.append(date_debut)
+        if date_fin is not None:
+            # Jour de fin inclus
+            conditions.append("date_reunion < date(?, '+1 day')")
+            params.append(date_fin)
+        where = f"\n        WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, tuple(params)
+    
+    @_query('get_participations_periode')
+    def get_participations_periode(self, date_debut: str, date_fin: str) -> Dict[int, List[Dict]]:
+        """Récupère en une seule requête les participants de toutes les réunions d'une période"""
+        if self.writer is not None and self.writer.has_pending():
+            self.writer.flush()
         
-        reunions = []
-        for row in cursor.fetchall():
-            reunions.append({
-                'id_reunion': row[0],
-                'titre': row[1],
-                'lieu': row[2],
-                'date': row[3],
-                'statut': row[4]
-            })
+        participations: Dict[int, List[Dict]] = {}
+        for row in self._iter_query('''
+        SELECT p.id_reunion, m.id_empreinte, m.titre, m.nom, m.prenom, m.service, m.email, m.telephone,
+               p.heure_pointage
+        FROM Reunion r
+        JOIN Participation p ON p.id_reunion = r.id_reunion
+        JOIN Membre m ON p.id_empreinte = m.id_empreinte
+        WHERE r.date_reunion >= ? AND r.date_reunion < date(?, '+1 day')
+        ORDER BY p.id_reunion, p.heure_pointage
+        ''', (date_debut, date_fin), 1000, False):
+            participations.setdefault(row.pop('id_reunion'), []).append(row)
+        return participations
+    
+    @_query('count_reunions')
+    def count_reunions(self, statut: Union[str, Sequence[str], None] = None,
+                       date_debut: Optional[str] = None, date_fin: Optional[str] = None) -> int:
+        """Compte les réunions, filtrées par statut et/ou période"""
+        where, params = self._reunion_filter(statut, date_debut, date_fin)
+        cursor = self.pool.get_connection().execute(f'SELECT COUNT(*) FROM Reunion{where}', params)
+        return cursor.fetchone()[0]
+    
+    @_query('add_invitations')
+    def add_invitations(self, id_reunion: int, ids_empreinte: Iterable[str]) -> int:
+        """Invite des membres à une réunion. Retourne le nombre d'invitations ajoutées."""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.executemany('''
+                INSERT OR IGNORE INTO Invitation (id_reunion, id_empreinte) VALUES (?, ?)
+                ''', ((id_reunion, id_empreinte) for id_empreinte in ids_empreinte))
+            return cursor.rowcount
+        except Exception:
+            logger.exception("Erreur lors de l'enregistrement des invitations")
+            return 0
+    
+    @_query('invite_services')
+    def invite_services(self, id_reunion: int, services: Sequence[str]) -> int:
+        """Invite tous les membres actifs des services donnés"""
+        if not services:
+            return 0
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(f'''
+                INSERT OR IGNORE INTO Invitation (id_reunion, id_empreinte)
+                SELECT ?, id_empreinte FROM Membre
+                WHERE actif = 1 AND service IN ({', '.join('?' * len(services))})
+                ''', (id_reunion,) + tuple(services))
+            return cursor.rowcount
+        except Exception:
+            logger.exception("Erreur lors de l'enregistrement des invitations")
+            return 0
+    
+    def remove_invitation(self, id_reunion: int, id_empreinte: str) -> bool:
+        """Retire un membre des invités d'une réunion"""
+        try:
+            with self.pool.connection() as conn:
+                conn.execute('''
+                DELETE FROM Invitation WHERE id_reunion = ? AND id_empreinte = ?
+                ''', (id_reunion, id_empreinte))
+            return True
+        except Exception:
+            logger.exception("Erreur lors de la suppression de l'invitation")
+            return False
+    
+    @_query('count_invitations')
+    def count_invitations(self, id_reunion: int) -> int:
+        """Compte les membres invités à une réunion"""
+        cursor = self.pool.get_connection().execute('''
+        SELECT COUNT(*) FROM Invitation WHERE id_reunion = ?
+        ''', (id_reunion,))
+        return cursor.fetchone()[0]
+    
+    @_query('get_invitations')
+    def get_invitations(self, id_reunion: int) -> List[str]:
+        """Liste les id_empreinte des invités actifs d'une réunion"""
+        cursor = self.pool.get_connection().execute('''
+        SELECT i.id_empreinte
+        FROM Invitation i
+        JOIN Membre m ON m.id_empreinte = i.id_empreinte
+        WHERE i.id_reunion = ? AND m.actif = 1
+        ''', (id_reunion,))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def iter_invitation_templates(self, id_reunion: int, chunk_size: int = 1000) -> Iterator[Tuple[str, str, bytes]]:
+        """Parcourt les gabarits (id_empreinte, gabarit_format, gabarit_data) des invités actifs d'une réunion"""
+        cursor = self.pool.get_connection().execute('''
+        SELECT g.id_empreinte, g.gabarit_format, g.gabarit_data
+        FROM Invitation i
+        JOIN Gabarit g ON g.id_empreinte = i.id_empreinte
+        JOIN Membre m ON m.id_empreinte = i.id_empreinte
+        WHERE i.id_reunion = ? AND m.actif = 1
+        ''', (id_reunion,))
         
-        conn.close()
-        return reunions
+        rows = cursor.fetchmany(chunk_size)
+        while rows:
+            yield from rows
+            rows = cursor.fetchmany(chunk_size)
     
+    @_query('add_participation')
     def add_participation(self, id_reunion: int, id_empreinte: str) -> bool:
-        """Enregistre une participation"""
+        """Enregistre une participation.
+        
+        Avec l'écriture différée, True signifie que le pointage est accepté et
+        en file, pas encore écrit: il est commité à la fin de l'intervalle de
+        l'écriture différée (ou au prochain flush). Un lot en échec est
+        réessayé; à l'arrêt, les pointages encore en échec sont enregistrés
+        dans replay_path et rejoués à la prochaine ouverture de la base.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            if self.writer is not None:
+                # False si déjà pointé, en attente d'écriture ou déjà écrit
+                return self.writer.submit(id_reunion, id_empreinte, self._participation_exists)
             
-            # Vérifier si déjà pointé
-            cursor.execute('''
-            SELECT id_participation FROM Participation 
-            WHERE id_reunion=? AND id_empreinte=?
-            ''', (id_reunion, id_empreinte))
-            
-            if cursor.fetchone():
-                conn.close()
-                return False  # Déjà pointé
-            
-            cursor.execute('''
-            INSERT INTO Participation (id_reunion, id_empreinte)
-            VALUES (?, ?)
-            ''', (id_reunion, id_empreinte))
-            
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            print(f"Erreur lors de l'enregistrement de la participation: {e}")
+            with span('db_participation'), self.pool.connection() as conn:
+                cursor = conn.execute('''
+                INSERT INTO Participation (id_reunion, id_empreinte)
+                VALUES (?, ?)
+                ON CONFLICT (id_reunion, id_empreinte) DO NOTHING
+                ''', (id_reunion, id_empreinte))
+            return cursor.rowcount == 1  # 0: déjà pointé
+        except Exception:
+            logger.exception("Erreur lors de l'enregistrement de la participation")
             return False
     
+    def _participation_exists(self, id_reunion: int, id_empreinte: str) -> bool:
+        cursor = self.pool.get_connection().execute('''
+        SELECT 1 FROM Participation WHERE id_reunion = ? AND id_empreinte = ?
+        ''', (id_reunion, id_empreinte))
+        return cursor.fetchone() is not None
+    
+    @_query('add_participations')
+    def add_participations(self, participations: List[Tuple[int, str]]) -> int:
+        """Enregistre un lot de participations (id_reunion, id_empreinte) en une transaction.
+        
+        Les membres déjà pointés sont ignorés. Retourne le nombre de participations ajoutées.
+        """
+        try:
+            with span('db_participations', lignes=len(participations)), self.pool.connection() as conn:
+                cursor = conn.executemany('''
+                INSERT INTO Participation (id_reunion, id_empreinte)
+                VALUES (?, ?)
+                ON CONFLICT (id_reunion, id_empreinte) DO NOTHING
+                ''', participations)
+            return cursor.rowcount
+        except Exception:
+            logger.exception("Erreur lors de l'enregistrement des participations")
+            return 0
+    
+    @_query('get_participants')
     def get_participants(self, id_reunion: int) -> List[Dict]:
         """Récupère les participants d'une réunion"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return list(self.iter_participants(id_reunion))
+    
+    @_query('count_participants')
+    def count_participants(self, id_reunion: int) -> int:
+        """Compte les participants d'une réunion"""
+        if self.writer is not None and self.writer.has_pending():
+            self.writer.flush()
         
-        cursor.execute('''
+        # Compteur tenu à jour par trigger: pas de parcours de Participation
+        cursor = self.pool.get_connection().execute('''
+        SELECT nb_participants FROM StatReunion WHERE id_reunion = ?
+        ''', (id_reunion,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    @_query('get_reunion_stats')
+    def get_reunion_stats(self, id_reunion: int) -> Dict:
+        """Statistiques de présence d'une réunion: total, horaires et répartition par service"""
+        if self.writer is not None and self.writer.has_pending():
+            self.writer.flush()
+        
+        conn = self.pool.get_connection()
+        row = conn.execute('''
+        SELECT nb_participants, premier_pointage, dernier_pointage FROM StatReunion WHERE id_reunion = ?
+        ''', (id_reunion,)).fetchone()
+        services = conn.execute('''
+        SELECT service, nb_participants FROM StatService
+        WHERE id_reunion = ? AND nb_participants > 0
+        ORDER BY nb_participants DESC, service
+        ''', (id_reunion,)).fetchall()
+        
+        return {
+            'nb_participants': row[0] if row else 0,
+            'premier_pointage': row[1] if row else None,
+            'dernier_pointage': row[2] if row else None,
+            'par_service': dict(services)
+        }
+    
+    @_query('get_service_stats')
+    def get_service_stats(self) -> List[Dict]:
+        """Participations cumulées par service, toutes réunions confondues"""
+        if self.writer is not None and self.writer.has_pending():
+            self.writer.flush()
+        
+        return list(self._iter_query('''
+        SELECT service, SUM(nb_participants) AS nb_participations, COUNT(*) AS nb_reunions
+        FROM StatService WHERE nb_participants > 0
+        GROUP BY service ORDER BY nb_participations DESC, service
+        ''', (), 500, False))
+    
+    @_query('get_membre_stats')
+    def get_membre_stats(self, id_empreinte: str) -> Dict:
+        """Participations d'un membre: total, dernier pointage et détail par mois"""
+        if self.writer is not None and self.writer.has_pending():
+            self.writer.flush()
+        
+        rows = self.pool.get_connection().execute('''
+        SELECT mois, nb_participations, dernier_pointage FROM StatMembre
+        WHERE id_empreinte = ? AND nb_participations > 0
+        ORDER BY mois
+        ''', (id_empreinte,)).fetchall()
+        
+        return {
+            'nb_participations': sum(row[1] for row in rows),
+            'dernier_pointage': max((row[2] for row in rows), default=None),
+            'par_mois': {row[0]: row[1] for row in rows}
+        }
+    
+    def iter_participants(self, id_reunion: int, chunk_size: int = 500, rows: bool = False,
+                          limit: Optional[int] = None, offset: int = 0) -> Iterator:
+        """Parcourt les participants d'une réunion par blocs (dict, ou sqlite3.Row si rows=True)"""
+        # Les pointages en file doivent être visibles à la lecture
+        if self.writer is not None and self.writer.has_pending():
+            self.writer.flush()
+        
+        return self._iter_query('''
         SELECT m.titre, m.nom, m.prenom, m.service, m.email, m.telephone, p.heure_pointage
         FROM Participation p
         JOIN Membre m ON p.id_empreinte = m.id_empreinte
         WHERE p.id_reunion = ?
         ORDER BY p.heure_pointage
-        ''', (id_reunion,))
+        LIMIT ? OFFSET ?
+        ''', (id_reunion, -1 if limit is None else limit, offset), chunk_size, rows)
+    
+    def _iter_query(self, query: str, params: Tuple, chunk_size: int, rows: bool) -> Iterator:
+        """Exécute une requête et produit ses lignes par blocs de fetchmany"""
+        cursor = self.pool.get_connection().cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(query, params)
         
-        participants = []
-        for row in cursor.fetchall():
-            participants.append({
-                'titre': row[0],
-                'nom': row[1],
-                'prenom': row[2],
-                'service': row[3],
-                'email': row[4],
-                'telephone': row[5],
-                'heure_pointage': row[6]
-            })
-        
-        conn.close()
-        return participants
+        batch = cursor.fetchmany(chunk_size)
+        while batch:
+            for row in batch:
+                yield row if rows else dict(row)
+            batch = cursor.fetchmany(chunk_size)
     
+    @_query('find_membre_by_fingerprint')
     def find_membre_by_fingerprint(self, fingerprint_hash: str) -> Optional[Dict]:
         """Trouve un membre par son empreinte"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        cursor = self.pool.get_connection().execute('''
         SELECT id_empreinte, titre, nom, prenom, service, email, telephone
         FROM Membre 
         WHERE empreinte_hash = ? AND actif = 1
         ''', (fingerprint_hash,))
         
         row = cursor.fetchone()
-        conn.close()
         
         if row:
             return {
@@ -283,19 +1177,14 @@ class DatabaseManager:
         base = f"{nom.upper()}{prenom.upper()}{datetime.now().isoformat()}"
         return hashlib.md5(base.encode()).hexdigest()[:16]
     
+    @_query('update_reunion_status')
     def update_reunion_status(self, id_reunion: int, statut: str) -> bool:
         """Met à jour le statut d'une réunion"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            UPDATE Reunion SET statut = ? WHERE id_reunion = ?
-            ''', (statut, id_reunion))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                conn.execute('''
+                UPDATE Reunion SET statut = ? WHERE id_reunion = ?
+                ''', (statut, id_reunion))
             return True
         except:
             return False
-
@@ -2,18 +2,33 @@
 # FICHIER: excel_generator.py - Génération des rapports Excel
 # =============================================================================
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, List, Dict, Iterable, Optional
+
+from logger import get_logger, spanned
+from metrics import timed
+
+logger = get_logger(__name__)
 
 class ExcelGenerator:
     """Générateur de rapports Excel"""
     
+    # Fréquence (en lignes) des notifications de progression
+    PROGRESS_EVERY = 500
+    
     def __init__(self):
         self.wb = None
         self.ws = None
     
+    @spanned('rapport_reunion')
+    @timed('rapport_secondes', "Durée de génération des rapports Excel", type='reunion')
     def generate_rapport_reunion(self, reunion_info: Dict, participants: List[Dict], filepath: str) -> bool:
         """Génère un rapport Excel pour une réunion"""
         try:
@@ -102,13 +117,303 @@ class ExcelGenerator:
             self.wb.save(filepath)
             return True
             
-        except Exception as e:
-            print(f"Erreur lors de la génération du rapport Excel: {e}")
+        except Exception:
+            logger.exception("Erreur lors de la génération du rapport Excel")
+            return False
+    
+    def _add_named_styles(self, wb: Workbook):
+        """Déclare les styles partagés par toutes les cellules du rapport"""
+        border = Border(
+            left=Side(border_style='thin'),
+            right=Side(border_style='thin'),
+            top=Side(border_style='thin'),
+            bottom=Side(border_style='thin')
+        )
+        
+        wb.add_named_style(NamedStyle(
+            name='rapport_titre',
+            font=Font(name='Arial', size=16, bold=True),
+            alignment=Alignment(horizontal='center')
+        ))
+        wb.add_named_style(NamedStyle(
+            name='rapport_label',
+            font=Font(bold=True)
+        ))
+        wb.add_named_style(NamedStyle(
+            name='rapport_entete',
+            font=Font(name='Arial', size=12, bold=True, color='FFFFFF'),
+            fill=PatternFill(start_color='366092', end_color='366092', fill_type='solid'),
+            alignment=Alignment(horizontal='center'),
+            border=border
+        ))
+        wb.add_named_style(NamedStyle(
+            name='rapport_cellule',
+            font=Font(name='Arial', size=10),
+            border=border
+        ))
+        wb.add_named_style(NamedStyle(
+            name='rapport_heure',
+            font=Font(name='Arial', size=10),
+            alignment=Alignment(horizontal='center'),
+            border=border
+        ))
+    
+    @spanned('rapport_reunion_flux')
+    @timed('rapport_secondes', "Durée de génération des rapports Excel", type='reunion_flux')
+    def generate_rapport_reunion_streaming(self, reunion_info: Dict, participants: Iterable[Dict],
+                                           filepath: str, nb_participants: Optional[int] = None,
+                                           progress: Optional[Callable[[int], bool]] = None) -> bool:
+        """Génère un rapport Excel en flux, ligne par ligne, à mémoire constante.
+        
+        progress(lignes_ecrites) est appelé régulièrement; s'il retourne False,
+        la génération est interrompue et le fichier n'est pas écrit.
+        """
+        # Écrit à côté puis renommé: jamais de fichier incomplet sous le nom final
+        tmp_path = f"{filepath}.tmp"
+        try:
+            wb = Workbook(write_only=True)
+            self._add_named_styles(wb)
+            ws = wb.create_sheet("Rapport de Réunion")
+            complete = self._write_reunion_sheet(ws, reunion_info, participants, nb_participants, progress)
+            
+            # Sauvegarde, même interrompue: save() libère les fichiers temporaires de la feuille
+            wb.save(tmp_path)
+            if not complete:
+                os.remove(tmp_path)
+                return False
+            os.replace(tmp_path, filepath)
+            return True
+            
+        except Exception:
+            logger.exception("Erreur lors de la génération du rapport Excel")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return False
     
+    def _write_reunion_sheet(self, ws, reunion_info: Dict, participants: Iterable[Dict],
+                             nb_participants: Optional[int] = None,
+                             progress: Optional[Callable[[int], bool]] = None) -> bool:
+        """Écrit la feuille d'une réunion (classeur en écriture seule); False si interrompue"""
+        def styled(value, style):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            return cell
+        
+        # Les dimensions doivent être fixées avant la première ligne
+        column_widths = [8, 15, 15, 20, 25, 15, 18]
+        for col, width in enumerate(column_widths, 1):
+            ws.column_dimensions[chr(64 + col)].width = width
+        
+        # Titre principal
+        ws.merged_cells.add('A1:G1')
+        ws.append([styled("RAPPORT DE PRÉSENCE - RÉUNION", 'rapport_titre')])
+        ws.append([])
+        
+        # Informations de la réunion
+        if nb_participants is None:
+            nb_participants = 'N/A'
+        info_data = [
+            ('Titre de la réunion:', reunion_info.get('titre', 'N/A')),
+            ('Date et heure:', reunion_info.get('date', 'N/A')),
+            ('Lieu:', reunion_info.get('lieu', 'N/A')),
+            ('Nombre de participants:', str(nb_participants)),
+            ('Rapport généré le:', datetime.now().strftime('%d/%m/%Y à %H:%M:%S'))
+        ]
+        for label, value in info_data:
+            ws.append([styled(label, 'rapport_label'), value])
+        
+        ws.append([])
+        ws.append([])
+        
+        # En-têtes du tableau
+        headers = ['Titre', 'Nom', 'Prénom', 'Service', 'Email', 'Téléphone', 'Heure de pointage']
+        ws.append([styled(header, 'rapport_entete') for header in headers])
+        
+        # Données des participants, consommées au fil de l'eau
+        count = 0
+        for count, participant in enumerate(participants, 1):
+            if progress and count % self.PROGRESS_EVERY == 0 and progress(count) is False:
+                return False
+            ws.append([
+                styled(participant.get('titre', ''), 'rapport_cellule'),
+                styled(participant.get('nom', ''), 'rapport_cellule'),
+                styled(participant.get('prenom', ''), 'rapport_cellule'),
+                styled(participant.get('service', ''), 'rapport_cellule'),
+                styled(participant.get('email', ''), 'rapport_cellule'),
+                styled(participant.get('telephone', ''), 'rapport_cellule'),
+                styled(participant.get('heure_pointage', ''), 'rapport_heure')
+            ])
+        
+        if progress:
+            progress(count)
+        return True
+    
+    @spanned('rapport_consolide')
+    @timed('rapport_secondes', "Durée de génération des rapports Excel", type='consolide')
+    def generate_rapport_consolide(self, reunions: List[Dict], participations: Dict[int, List[Dict]],
+                                   filepath: str, date_debut: str, date_fin: str) -> bool:
+        """Génère un classeur consolidé: matrice de présence membres × réunions,
+        puis une feuille par réunion"""
+        try:
+            wb = Workbook(write_only=True)
+            self._add_named_styles(wb)
+            ws = wb.create_sheet("Synthèse")
+            
+            def styled(value, style):
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = style
+                return cell
+            
+            # Membres présents à au moins une réunion, triés par nom et prénom
+            membres = {}
+            presences = {}
+            for reunion in reunions:
+                for participant in participations.get(reunion['id_reunion'], []):
+                    membres.setdefault(participant['id_empreinte'], participant)
+                    presences.setdefault(participant['id_empreinte'], set()).add(reunion['id_reunion'])
+            ordre = sorted(membres, key=lambda i: (membres[i].get('nom', ''), membres[i].get('prenom', '')))
+            
+            nb_colonnes = 3 + len(reunions) + 2
+            ws.column_dimensions['A'].width = 15
+            ws.column_dimensions['B'].width = 15
+            ws.column_dimensions['C'].width = 20
+            for col in range(4, nb_colonnes + 1):
+                ws.column_dimensions[get_column_letter(col)].width = 14
+            
+            # Titre principal
+            ws.merged_cells.add(f'A1:{get_column_letter(max(nb_colonnes, 7))}1')
+            ws.append([styled("RAPPORT DE PRÉSENCE - SYNTHÈSE DE LA PÉRIODE", 'rapport_titre')])
+            ws.append([])
+            
+            info_data = [
+                ('Période:', f"du {date_debut} au {date_fin}"),
+                ('Nombre de réunions:', str(len(reunions))),
+                ('Nombre de membres présents:', str(len(membres))),
+                ('Rapport généré le:', datetime.now().strftime('%d/%m/%Y à %H:%M:%S'))
+            ]
+            for label, value in info_data:
+                ws.append([styled(label, 'rapport_label'), value])
+            ws.append([])
+            
+            # Matrice: une colonne par réunion, « X » si présent
+            headers = ['Nom', 'Prénom', 'Service']
+            headers += [f"{str(r.get('date', ''))[:10]} {r.get('titre', '')}" for r in reunions]
+            headers += ['Présences', 'Taux']
+            ws.append([styled(header, 'rapport_entete') for header in headers])
+            
+            for id_empreinte in ordre:
+                membre = membres[id_empreinte]
+                present = presences[id_empreinte]
+                row = [styled(membre.get('nom', ''), 'rapport_cellule'),
+                       styled(membre.get('prenom', ''), 'rapport_cellule'),
+                       styled(membre.get('service', ''), 'rapport_cellule')]
+                row += [styled('X' if r['id_reunion'] in present else '', 'rapport_heure') for r in reunions]
+                taux = f"{len(present) / len(reunions):.0%}" if reunions else ''
+                row += [styled(len(present), 'rapport_heure'), styled(taux, 'rapport_heure')]
+                ws.append(row)
+            
+            totals = [styled('Total', 'rapport_entete'), styled('', 'rapport_entete'), styled('', 'rapport_entete')]
+            totals += [styled(len(participations.get(r['id_reunion'], [])), 'rapport_entete') for r in reunions]
+            ws.append(totals)
+            
+            # Une feuille par réunion, même présentation que le rapport individuel
+            noms = set()
+            for reunion in reunions:
+                participants = participations.get(reunion['id_reunion'], [])
+                sheet = wb.create_sheet(self._sheet_title(reunion, noms))
+                self._write_reunion_sheet(sheet, reunion, participants, len(participants))
+            
+            wb.save(filepath)
+            return True
+            
+        except Exception:
+            logger.exception("Erreur lors de la génération du rapport consolidé")
+            return False
+    
+    @spanned('rapports_periode')
+    @timed('rapport_secondes', "Durée de génération des rapports Excel", type='periode')
+    def generate_rapports_periode(self, reunions: List[Dict], participations: Dict[int, List[Dict]],
+                                  output_dir: str, date_debut: str, date_fin: str,
+                                  workers: Optional[int] = None,
+                                  progress: Optional[Callable[[int], bool]] = None) -> List[str]:
+        """Génère le classeur consolidé et un classeur par réunion dans output_dir.
+        
+        Les classeurs étant indépendants, ils sont construits en parallèle dans
+        un pool de processus démarrés par spawn (un fork copierait les threads
+        et l'état Tk de l'application); chaque processus ne reçoit que les
+        pointages de ses réunions. progress(lignes_ecrites) est appelé à la fin
+        de chaque classeur avec le cumul des lignes des classeurs terminés; s'il
+        retourne False, les classeurs non commencés sont annulés, ceux en cours
+        ignorés (même en erreur) et les fichiers déjà écrits supprimés.
+        Retourne la liste des fichiers générés.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        consolide = os.path.join(output_dir, f"Rapport_consolide_{date_debut}_{date_fin}.xlsx")
+        periode = {r['id_reunion']: participations.get(r['id_reunion'], []) for r in reunions}
+        generated = []
+        cancelled = False
+        
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(_build_rapport_consolide, reunions, periode,
+                                       consolide, date_debut, date_fin): (consolide, 0)}
+            for reunion in reunions:
+                participants = periode[reunion['id_reunion']]
+                filepath = os.path.join(output_dir, self.get_default_filename(
+                    f"{str(reunion.get('date', ''))[:10]} {reunion.get('titre', '')} {reunion['id_reunion']}"))
+                futures[executor.submit(_build_rapport_reunion, reunion, participants, filepath)] = \
+                    (filepath, len(participants))
+            
+            rows_written = 0
+            for future in as_completed(futures):
+                filepath, rows = futures[future]
+                if future.result():
+                    generated.append(filepath)
+                    rows_written += rows
+                if progress and not progress(rows_written):
+                    cancelled = True
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        
+        if cancelled:
+            # Les classeurs en cours à l'annulation sont terminés à la sortie du pool
+            for future, (filepath, _) in futures.items():
+                if future.cancelled() or future.exception() is not None:
+                    continue
+                if future.result() and filepath not in generated:
+                    generated.append(filepath)
+            for filepath in generated:
+                os.remove(filepath)
+            return []
+        return sorted(generated)
+    
+    def _sheet_title(self, reunion: Dict, used: set) -> str:
+        """Nom de feuille Excel valide (31 caractères, sans caractère interdit) et unique"""
+        base = f"{str(reunion.get('date', ''))[:10]} {reunion.get('titre', '')}"
+        base = "".join(c for c in base if c not in '[]:*?/\\').strip()[:31] or "Réunion"
+        title, suffix = base, 2
+        while title.lower() in used:
+            tail = f" ({suffix})"
+            title = base[:31 - len(tail)] + tail
+            suffix += 1
+        used.add(title.lower())
+        return title
+    
     def get_default_filename(self, reunion_title: str) -> str:
         """Génère un nom de fichier par défaut"""
         safe_title = "".join(c for c in reunion_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
         date_str = datetime.now().strftime('%Y%m%d_%H%M%S')
         return f"Rapport_{safe_title}_{date_str}.xlsx"
 
+
+def _build_rapport_reunion(reunion_info: Dict, participants: List[Dict], filepath: str) -> bool:
+    """Tâche du pool de processus: classeur d'une réunion"""
+    return ExcelGenerator().generate_rapport_reunion_streaming(reunion_info, participants, filepath,
+                                                               len(participants))
+
+
+def _build_rapport_consolide(reunions: List[Dict], participations: Dict[int, List[Dict]],
+                             filepath: str, date_debut: str, date_fin: str) -> bool:
+    """Tâche du pool de processus: classeur consolidé de la période"""
+    return ExcelGenerator().generate_rapport_consolide(reunions, participations, filepath,
+                                                       date_debut, date_fin)
@@ -4,16 +4,49 @@
 
 import hashlib
 import random
-from PIL import Image, ImageDraw
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageOps
 import io
-from typing import Optional, Tuple
+import numpy as np
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from config import Config
+from logger import get_logger, spanned
+from metrics import timed
+
+logger = get_logger(__name__)
 
 class FingerprintManager:
     """Gestionnaire d'empreintes digitales"""
     
-    def __init__(self):
+    # Taille de la grille de caractéristiques (vecteur de FEATURE_GRID² valeurs)
+    FEATURE_GRID = 16
+    FEATURE_DIMENSION = FEATURE_GRID * FEATURE_GRID
+    
+    # Format des gabarits: vecteur float16 brut de taille fixe (FEATURE_DIMENSION * 2 octets)
+    # des densités de crêtes filtrées passe-bande
+    TEMPLATE_FORMAT = 'f16pb'
+    TEMPLATE_SIZE = FEATURE_DIMENSION * 2
+    # Gabarits de l'ancienne grille de densité brute: non comparables aux
+    # gabarits actuels, les membres concernés doivent être réenrôlés
+    STALE_FORMATS = ('f16', 'f16z')
+    
+    # Filtre passe-bande des caractéristiques: écarts types des deux flous
+    # gaussiens, en fraction de la largeur de l'image (4 et 20 px sur 256)
+    BAND_LOW = 4 / 256
+    BAND_HIGH = 20 / 256
+    
+    # Taille des images produites par le lecteur (simulé)
+    IMAGE_SIZE = 256
+    
+    # Lecteur simulé: doigts enrôlés pendant la session, présentés de nouveau au scan
+    SIMULATED_FINGERS_MAX = 1000
+    
+    def __init__(self, known_finger_rate: float = 0.9):
         self.device_connected = False
         self.simulate_device = True  # Mode simulation pour test
+        # Part des scans simulés qui présentent un doigt déjà enrôlé
+        self.known_finger_rate = known_finger_rate
+        self._fingers: List[Image.Image] = []
     
     def check_device(self) -> bool:
         """Vérifie la présence d'un lecteur d'empreintes"""
@@ -21,6 +54,8 @@ class FingerprintManager:
         self.device_connected = True
         return self.device_connected
     
+    @spanned('capture_image')
+    @timed('capture_secondes', "Durée d'une capture d'empreinte", mode='image')
     def capture_fingerprint(self) -> Optional[Tuple[bytes, str]]:
         """Capture une empreinte et retourne les données et le hash"""
         if not self.device_connected and not self.simulate_device:
@@ -35,36 +70,147 @@ class FingerprintManager:
         # Ici, on intégrerait le vrai SDK du lecteur d'empreintes
         return None
     
-    def generate_simulated_fingerprint(self) -> bytes:
-        """Génère une empreinte simulée pour les tests"""
-        # Crée une image BMP simple simulant une empreinte
-        img = Image.new('RGB', (256, 256), 'white')
+    @spanned('capture')
+    @timed('capture_secondes', "Durée d'une capture d'empreinte", mode='gabarit')
+    def capture_template(self, enroll: bool = False) -> Optional[Tuple[bytes, str]]:
+        """Capture une empreinte et retourne son gabarit compact et le hash du gabarit.
+        
+        En simulation, une capture d'enrôlement (enroll=True) pose un nouveau
+        doigt, mémorisé pour la session; une capture de pointage présente une
+        nouvelle prise d'un doigt enrôlé (known_finger_rate des scans) ou un
+        doigt inconnu.
+        """
+        if not self.device_connected and not self.simulate_device:
+            return None
+        
+        # L'image reste en mémoire: ni encodage BMP, ni hash de l'image complète
+        if self.simulate_device:
+            template = self.image_template(self.simulated_capture(enroll))
+            return template, self.generate_fingerprint_hash(template)
+        
+        # Ici, on intégrerait le vrai SDK du lecteur d'empreintes
+        return None
+    
+    def simulated_image(self) -> Image.Image:
+        """Génère l'image en niveaux de gris d'une empreinte simulée"""
+        img = Image.new('L', (self.IMAGE_SIZE, self.IMAGE_SIZE), 255)
         draw = ImageDraw.Draw(img)
         
         # Dessine des lignes courbes simulant une empreinte
         for i in range(10):
             x1, y1 = random.randint(50, 200), random.randint(50, 200)
             x2, y2 = random.randint(50, 200), random.randint(50, 200)
-            draw.line([x1, y1, x2, y2], fill='black', width=2)
-        
-        # Convertit en bytes
+            draw.line([x1, y1, x2, y2], fill=0, width=2)
+        return img
+    
+    def simulated_capture(self, enroll: bool = False) -> Image.Image:
+        """Image d'une capture simulée (voir capture_template)"""
+        if enroll:
+            img = self.simulated_image()
+            self._fingers.append(img)
+            del self._fingers[:-self.SIMULATED_FINGERS_MAX]
+            return img
+        if self._fingers and random.random() < self.known_finger_rate:
+            return self.simulated_recapture(random.choice(self._fingers))
+        return self.simulated_image()
+    
+    def simulated_recapture(self, img: Image.Image) -> Image.Image:
+        """Simule une nouvelle capture du même doigt: rotation, décalage et bruit du capteur"""
+        img = img.rotate(random.uniform(-4, 4), resample=Image.BILINEAR, fillcolor=255)
+        img = ImageChops.offset(img, random.randint(-3, 3), random.randint(-3, 3))
+        noise = np.random.default_rng(random.getrandbits(32)).normal(0, 20, (img.height, img.width))
+        pixels = np.asarray(img, dtype=np.float32) + noise
+        return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    
+    def generate_simulated_fingerprint(self) -> bytes:
+        """Génère une empreinte simulée pour les tests"""
+        # Image BMP 8 bits en niveaux de gris
         img_buffer = io.BytesIO()
-        img.save(img_buffer, format='BMP')
+        self.simulated_image().save(img_buffer, format='BMP')
         return img_buffer.getvalue()
     
     def generate_fingerprint_hash(self, fingerprint_data: bytes) -> str:
         """Génère un hash unique pour l'empreinte"""
         return hashlib.sha256(fingerprint_data).hexdigest()
     
-    def compare_fingerprints(self, hash1: str, hash2: str, threshold: float = 0.8) -> bool:
-        """Compare deux empreintes (simulation)"""
-        # Dans un vrai projet, on utiliserait un algorithme de comparaison biométrique
-        # Ici, on simule avec une comparaison de hash
-        if hash1 == hash2:
-            return True
+    def extract_features(self, fingerprint_data: bytes) -> np.ndarray:
+        """Extrait un vecteur de caractéristiques normalisé depuis l'image d'empreinte"""
+        return self.image_features(Image.open(io.BytesIO(fingerprint_data)))
+    
+    def image_features(self, img: Image.Image) -> np.ndarray:
+        """Extrait un vecteur de caractéristiques normalisé depuis une image PIL.
+        
+        Densité de crêtes par bloc après un filtre passe-bande (différence de
+        deux flous gaussiens). Le flou fin absorbe le bruit et les petits
+        décalages d'une capture à l'autre; retirer le flou large supprime la
+        forme générale commune à toutes les empreintes (zone d'appui, fond),
+        qui rapprochait les gabarits de membres différents.
+        """
+        # Niveaux de gris 8 bits et contraste normalisé, indépendants du lecteur
+        img = ImageOps.autocontrast(img.convert('L'))
         
-        # Simulation d'une correspondance partielle
-        return random.random() > (1 - threshold) if hash1 and hash2 else False
+        # Les crêtes sombres deviennent des valeurs hautes
+        vector = self._block_density(img, self.BAND_LOW) - self._block_density(img, self.BAND_HIGH)
+        vector -= vector.mean()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _block_density(self, img: Image.Image, blur: float) -> np.ndarray:
+        """Densité de crêtes par bloc de la grille, après un flou gaussien (fraction de la largeur)"""
+        img = img.filter(ImageFilter.GaussianBlur(blur * img.width))
+        img = img.resize((self.FEATURE_GRID, self.FEATURE_GRID), Image.BOX)
+        return 255.0 - np.asarray(img, dtype=np.float32).ravel()
+    
+    def image_template(self, img: Image.Image) -> bytes:
+        """Calcule le gabarit compact d'une image PIL"""
+        return self.encode_template(self.image_features(img))
+    
+    def encode_template(self, features: np.ndarray) -> bytes:
+        """Encode un vecteur de caractéristiques en gabarit de taille fixe"""
+        return np.asarray(features, dtype='<f2').tobytes()
+    
+    def decode_template(self, template: bytes) -> np.ndarray:
+        """Décode un gabarit en vecteur de caractéristiques"""
+        if len(template) != self.TEMPLATE_SIZE:
+            raise ValueError(f"Gabarit de {len(template)} octets, {self.TEMPLATE_SIZE} attendus")
+        return np.frombuffer(template, dtype='<f2').astype(np.float32)
+    
+    def template_features(self, gabarit_format: str, gabarit_data: bytes) -> Optional[np.ndarray]:
+        """Vecteur de caractéristiques d'un gabarit stocké, quel que soit son format.
+        
+        None pour un gabarit de l'ancienne grille (STALE_FORMATS): ses
+        caractéristiques ne sont pas comparables, le membre doit être réenrôlé.
+        """
+        if gabarit_format == self.TEMPLATE_FORMAT:
+            return self.decode_template(gabarit_data)
+        if gabarit_format in self.STALE_FORMATS:
+            return None
+        # Image héritée (format 'bmp'): caractéristiques recalculées
+        return self.extract_features(gabarit_data)
+    
+    def iter_features(self, templates: Iterable[Tuple[str, str, bytes]]) -> Iterator[Tuple[str, np.ndarray]]:
+        """(id_empreinte, vecteur) des gabarits (id_empreinte, format, données) utilisables.
+        
+        Les gabarits de l'ancienne grille sont ignorés, avec un avertissement.
+        """
+        stale = 0
+        for id_empreinte, gabarit_format, gabarit_data in templates:
+            features = self.template_features(gabarit_format, gabarit_data)
+            if features is None:
+                stale += 1
+            else:
+                yield id_empreinte, features
+        if stale:
+            logger.warning(f"{stale} gabarit(s) d'un ancien format ignorés: membres à réenrôler")
+    
+    def compare_templates(self, template1: bytes, template2: bytes) -> float:
+        """Score de correspondance (similarité cosinus) entre deux gabarits"""
+        return float(np.dot(self.decode_template(template1), self.decode_template(template2)))
+    
+    def compare_fingerprints(self, template1: bytes, template2: bytes,
+                             threshold: float = Config.FINGERPRINT_THRESHOLD) -> bool:
+        """Indique si deux gabarits proviennent du même doigt"""
+        return self.compare_templates(template1, template2) >= threshold
     
     def save_fingerprint_image(self, fingerprint_data: bytes, filepath: str) -> bool:
         """Sauvegarde l'image d'empreinte"""
@@ -0,0 +1,299 @@
+# =============================================================================
+# FICHIER: identification.py - Moteur d'identification 1:N des empreintes
+# =============================================================================
+
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from config import Config
+from fingerprint_manager import FingerprintManager
+from member_cache import MemberCache
+from metrics import counter, histogram
+
+# Métriques communes aux points d'identification (interface, service multi-postes)
+IDENTIFICATION_RESULTATS = ('hash', 'invites', 'membres', 'inconnu')
+identification_latency = histogram('identification_secondes', "Durée d'une identification, capture exclue")
+identification_results = {resultat: counter('identifications_total', "Identifications par résultat", resultat=resultat)
+                          for resultat in IDENTIFICATION_RESULTATS}
+
+
+class IdentificationEngine:
+    """Index en mémoire des gabarits d'empreintes pour la recherche 1:N.
+    
+    La recherche se fait en deux étapes. Un préfiltre LSH (hyperplans
+    aléatoires) range chaque gabarit dans un seau par table; seuls les
+    gabarits qui partagent le plus de seaux avec la sonde sont ensuite comparés
+    en entier. Sous prefilter_min gabarits, la comparaison est exhaustive.
+    
+    Si le meilleur candidat du préfiltre est sous le seuil d'au plus
+    fallback_margin, la recherche est refaite de façon exhaustive (le vrai
+    membre a pu être écarté par le préfiltre). Plus loin du seuil, la sonde
+    est déclarée inconnue sans comparaison exhaustive: un inconnu ne paie pas
+    le préfiltre puis la recherche complète. fallback_margin=0 désactive le repli.
+    """
+    
+    def __init__(self, dimension: int, threshold: float = Config.FINGERPRINT_THRESHOLD,
+                 batch_size: int = 8192, lsh_tables: int = Config.IDENTIFICATION_LSH_TABLES,
+                 lsh_bits: int = Config.IDENTIFICATION_LSH_BITS,
+                 max_candidates: int = Config.IDENTIFICATION_CANDIDATES,
+                 prefilter_min: int = Config.IDENTIFICATION_PREFILTER_MIN,
+                 fallback_margin: float = Config.IDENTIFICATION_FALLBACK_MARGIN, seed: int = 0):
+        if lsh_bits > 16:
+            raise ValueError("lsh_bits doit être inférieur ou égal à 16")
+        self.dimension = dimension
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.max_candidates = max_candidates
+        self.prefilter_min = prefilter_min
+        self.fallback_margin = fallback_margin
+        self.counters = {'recherches': 0, 'prefiltrees': 0, 'repli_exhaustif': 0, 'candidats': 0}
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((1024, dimension), dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        
+        # Hyperplans fixés par la graine: les seaux sont reproductibles d'un lancement à l'autre
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((dimension, lsh_tables * lsh_bits)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(lsh_bits)).astype(np.uint16)
+        self._lsh_shape = (lsh_tables, lsh_bits)
+        # Seaux rangés par table: (tables, capacité), une ligne contiguë par table
+        self._codes = np.zeros((lsh_tables, 1024), dtype=np.uint16)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, id_empreinte: str) -> bool:
+        return id_empreinte in self._rows
+    
+    def load(self, templates: Iterable[Tuple[str, np.ndarray]]):
+        """Charge un ensemble de gabarits (id_empreinte, vecteur)"""
+        for id_empreinte, features in templates:
+            self.add(id_empreinte, features)
+    
+    def add(self, id_empreinte: str, features: np.ndarray):
+        """Ajoute ou remplace le gabarit d'un membre"""
+        vector = self._normalize(features)
+        with self._lock:
+            row = self._rows.get(id_empreinte)
+            if row is None:
+                row = len(self._ids)
+                if row == self._matrix.shape[0]:
+                    # Croissance amortie de la matrice et des seaux
+                    grown = np.zeros((row * 2, self.dimension), dtype=np.float32)
+                    grown[:row] = self._matrix[:row]
+                    self._matrix = grown
+                    codes = np.zeros((self._codes.shape[0], row * 2), dtype=np.uint16)
+                    codes[:, :row] = self._codes[:, :row]
+                    self._codes = codes
+                self._ids.append(id_empreinte)
+                self._rows[id_empreinte] = row
+            self._matrix[row] = vector
+            self._codes[:, row] = self._bucket_codes(vector)
+    
+    def remove(self, id_empreinte: str):
+        """Retire le gabarit d'un membre (la dernière ligne prend sa place)"""
+        with self._lock:
+            row = self._rows.pop(id_empreinte, None)
+            if row is None:
+                return
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._codes[:, row] = self._codes[:, last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+    
+    def search(self, probe: np.ndarray, top_k: int = 5, prefilter: bool = True) -> List[Tuple[str, float]]:
+        """Retourne les top_k meilleurs candidats (id_empreinte, score) par score décroissant.
+        
+        Avec prefilter=True et un index assez grand, seuls les candidats du
+        préfiltre LSH sont comparés; sinon la comparaison est exhaustive.
+        """
+        vector = self._normalize(probe)
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return []
+            self.counters['recherches'] += 1
+            if prefilter and count >= self.prefilter_min:
+                rows = self._candidates(vector, count)
+                self.counters['prefiltrees'] += 1
+                self.counters['candidats'] += len(rows)
+                if len(rows) == 0:
+                    return []
+                scores = self._matrix[rows] @ vector
+                return self._top(scores, rows, top_k)
+            return self._search_all(vector, count, top_k)
+    
+    def identify(self, probe: np.ndarray, top_k: int = 5) -> Optional[Tuple[str, float]]:
+        """Retourne le meilleur candidat si son score atteint le seuil.
+        
+        Si le meilleur candidat du préfiltre est sous le seuil mais à moins de
+        fallback_margin, la recherche est refaite de façon exhaustive.
+        """
+        candidates = self.search(probe, top_k)
+        if candidates and candidates[0][1] >= self.threshold:
+            return candidates[0]
+        best = candidates[0][1] if candidates else float('-inf')
+        if (self.fallback_margin > 0 and len(self) >= self.prefilter_min
+                and best >= self.threshold - self.fallback_margin):
+            with self._lock:
+                self.counters['repli_exhaustif'] += 1
+            candidates = self.search(probe, top_k, prefilter=False)
+            if candidates and candidates[0][1] >= self.threshold:
+                return candidates[0]
+        return None
+    
+    def stats(self) -> Dict:
+        """Compteurs du préfiltre (nombre moyen de candidats comparés)"""
+        with self._lock:
+            stats = dict(self.counters, gabarits=len(self._ids))
+        stats['candidats_moyens'] = stats['candidats'] / stats['prefiltrees'] if stats['prefiltrees'] else 0.0
+        return stats
+    
+    def _bucket_codes(self, vectors: np.ndarray) -> np.ndarray:
+        """Seau de chaque table LSH: signe des projections sur les hyperplans"""
+        signs = (vectors @ self._planes) > 0
+        signs = signs.reshape(signs.shape[:-1] + self._lsh_shape)
+        return (signs * self._bit_weights).sum(axis=-1, dtype=np.uint16)
+    
+    def _candidates(self, vector: np.ndarray, count: int) -> np.ndarray:
+        """Lignes partageant au moins un seau avec la sonde, les plus votées d'abord"""
+        probe_codes = self._bucket_codes(vector)
+        votes = (self._codes[:, :count] == probe_codes[:, None]).sum(axis=0, dtype=np.uint8)
+        rows = np.flatnonzero(votes)
+        if len(rows) > self.max_candidates:
+            keep = np.argpartition(votes[rows], -self.max_candidates)[-self.max_candidates:]
+            rows = rows[keep]
+        return rows
+    
+    def _search_all(self, vector: np.ndarray, count: int, top_k: int) -> List[Tuple[str, float]]:
+        """Comparaison exhaustive, par lots"""
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        
+        # Produit matriciel par lots: similarité cosinus des vecteurs normalisés
+        for start in range(0, count, self.batch_size):
+            stop = min(start + self.batch_size, count)
+            scores = self._matrix[start:stop] @ vector
+            k = min(top_k, stop - start)
+            local = np.argpartition(scores, -k)[-k:]
+            best_scores = np.concatenate((best_scores, scores[local]))
+            best_rows = np.concatenate((best_rows, local + start))
+            if len(best_scores) > top_k:
+                keep = np.argpartition(best_scores, -top_k)[-top_k:]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+        
+        return self._top(best_scores, best_rows, top_k)
+    
+    def _top(self, scores: np.ndarray, rows: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """Trie les top_k scores par ordre décroissant"""
+        if len(scores) > top_k:
+            keep = np.argpartition(scores, -top_k)[-top_k:]
+            scores, rows = scores[keep], rows[keep]
+        order = np.argsort(scores)[::-1]
+        return [(self._ids[rows[i]], float(scores[i])) for i in order]
+    
+    def _normalize(self, features: np.ndarray) -> np.ndarray:
+        """Convertit un vecteur en float32 de norme unitaire"""
+        vector = np.asarray(features, dtype=np.float32).ravel()
+        if vector.shape[0] != self.dimension:
+            raise ValueError(f"Dimension de gabarit invalide: {vector.shape[0]} au lieu de {self.dimension}")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class Invites(NamedTuple):
+    """Ensemble chaud d'une réunion: ses invités, par hash et par gabarit"""
+    id_reunion: int
+    ids: Set[str]
+    hashes: Dict[str, str]
+    engine: IdentificationEngine
+
+
+class MemberMatcher:
+    """Recherche du membre correspondant à un scan, du moins coûteux au plus coûteux.
+    
+    1. hash exact du gabarit parmi les invités de la réunion, puis parmi tous
+       les membres
+    2. si IDENTIFICATION_ENABLED, recherche 1:N parmi les invités, puis parmi
+       tous les membres
+    Les invités (set_invites) sont l'ensemble chaud d'une réunion: un index
+    de quelques centaines de gabarits, consulté avant celui de tous les membres.
+    """
+    
+    def __init__(self, membres: MemberCache, engine: IdentificationEngine,
+                 fingerprint_manager: FingerprintManager):
+        self.membres = membres
+        self.engine = engine
+        self.fingerprint_manager = fingerprint_manager
+        self.invites: Optional[Invites] = None
+    
+    def build_invites(self, id_reunion: int, ids_empreinte: Iterable[str],
+                      templates: Iterable[Tuple[str, str, bytes]]) -> Invites:
+        """Construit l'ensemble chaud d'une réunion (à installer avec set_invites).
+        
+        ids_empreinte: invités actifs; templates: leurs gabarits
+        (id_empreinte, gabarit_format, gabarit_data), lus seulement si
+        l'identification 1:N est activée.
+        """
+        ids: Set[str] = set()
+        hashes: Dict[str, str] = {}
+        for id_empreinte in ids_empreinte:
+            membre = self.membres.get(id_empreinte)
+            if membre:
+                ids.add(id_empreinte)
+                if membre.get('empreinte_hash'):
+                    hashes[membre['empreinte_hash']] = id_empreinte
+        engine = IdentificationEngine(self.engine.dimension, self.engine.threshold)
+        if Config.IDENTIFICATION_ENABLED:
+            engine.load(self.fingerprint_manager.iter_features(templates))
+        return Invites(id_reunion, ids, hashes, engine)
+    
+    def set_invites(self, invites: Optional[Invites]):
+        """Installe l'ensemble chaud de la réunion sélectionnée (None: aucun)"""
+        self.invites = invites
+    
+    def add(self, id_empreinte: str, features: np.ndarray, empreinte_hash: Optional[str] = None):
+        """Enrôlement ou réenrôlement: met à jour l'index des membres et celui des invités"""
+        self.engine.add(id_empreinte, features)
+        invites = self.invites
+        if invites and id_empreinte in invites.ids:
+            if empreinte_hash:
+                for old in [h for h, i in invites.hashes.items() if i == id_empreinte]:
+                    del invites.hashes[old]
+                invites.hashes[empreinte_hash] = id_empreinte
+            invites.engine.add(id_empreinte, features)
+    
+    def match(self, template: bytes, fingerprint_hash: str, id_reunion: Optional[int]) -> Tuple[Optional[Dict], float, str]:
+        """Retourne (membre, score, source) ou (None, 0.0, 'inconnu').
+        
+        source: 'invites' (invité de la réunion, par hash ou gabarit), 'hash'
+        ou 'membres' (autre membre, par hash ou par gabarit).
+        """
+        invites = self.invites
+        if invites is not None and invites.id_reunion != id_reunion:
+            invites = None
+        if invites is not None:
+            id_empreinte = invites.hashes.get(fingerprint_hash)
+            membre = self.membres.get(id_empreinte) if id_empreinte else None
+            if membre:
+                return membre, 1.0, 'invites'
+        membre = self.membres.find_by_hash(fingerprint_hash)
+        if membre:
+            return membre, 1.0, 'hash'
+        if not Config.IDENTIFICATION_ENABLED:
+            return None, 0.0, 'inconnu'
+        
+        features = self.fingerprint_manager.decode_template(template)
+        for source, engine in (('invites', invites.engine if invites else None), ('membres', self.engine)):
+            match = engine.identify(features) if engine is not None and len(engine) else None
+            membre = self.membres.get(match[0]) if match else None
+            if membre:
+                return membre, match[1], source
+        return None, 0.0, 'inconnu'
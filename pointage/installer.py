@@ -15,7 +15,8 @@ def install_dependencies():
     """Installe les dépendances Python"""
     dependencies = [
         "Pillow>=9.0.0",
-        "openpyxl>=3.0.0"
+        "openpyxl>=3.0.0",
+        "numpy>=1.21.0"
     ]
     
     print("Installation des dépendances...")
@@ -2,31 +2,174 @@
 # FICHIER: logger.py (Système de logs)
 # =============================================================================
 
+"""
+Journalisation non bloquante de l'application.
+
+Les modules écrivent dans des loggers « pointage.<module> » (get_logger). Les
+enregistrements passent par une file (QueueHandler) et sont écrits par un
+thread dédié (QueueListener): un appel de log ne fait aucune entrée/sortie dans
+le thread appelant. Le fichier du jour reçoit une ligne JSON par
+enregistrement, la console un format lisible (sans les spans).
+
+span() mesure la durée d'une étape (capture, identification, écriture en base,
+rapport) et la journalise avec les champs span et duree_ms. Tant que
+setup_logging n'a pas été appelé, les spans ne coûtent qu'un test de niveau.
+"""
+
+import atexit
+import copy
+import functools
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterator, Optional, Union
+
+ROOT_LOGGER = 'pointage'
+
+# Attributs standard d'un LogRecord: les autres viennent de extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_setup_lock = threading.Lock()
+_span_logger = logging.getLogger(f"{ROOT_LOGGER}.span")
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement, champs extra= compris"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'niveau': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui laisse le formatage au thread d'écriture.
+    
+    Seuls le message et la trace d'exception sont figés dans le thread appelant
+    (les arguments et la trace ne sont pas transmissibles tels quels). Ils sont
+    figés dans une copie: l'enregistrement reste intact pour les handlers
+    ajoutés ailleurs sur la chaîne des loggers (pytest caplog, bibliothèques).
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        prepared = copy.copy(record)
+        prepared.msg, prepared.args = record.getMessage(), None
+        if record.exc_info:
+            if not prepared.exc_text:
+                prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
+
+
+def setup_logging(log_dir: str = "logs", level: Union[int, str] = logging.INFO,
+                  console: bool = True) -> logging.Logger:
+    """Installe la journalisation non bloquante (sans effet si déjà installée)"""
+    global _listener, _queue_handler
+    with _setup_lock:
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(level)
+        if _listener is not None:
+            return root
+        
+        os.makedirs(log_dir, exist_ok=True)
+        log_filename = os.path.join(log_dir, f"pointage_{datetime.now().strftime('%Y%m%d')}.jsonl")
+        file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers = [file_handler]
+        if console:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+            stream_handler.addFilter(lambda record: record.name != _span_logger.name)
+            handlers.append(stream_handler)
+        
+        # File non bornée: un log ne bloque jamais l'appelant
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        _queue_handler = _QueueHandler(log_queue)
+        root.addHandler(_queue_handler)
+        root.propagate = False
+        atexit.register(shutdown_logging)
+        return root
+
+
+def shutdown_logging():
+    """Écrit les enregistrements en file puis arrête le thread d'écriture"""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _queue_handler = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger d'un module de l'application: get_logger(__name__)"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+@contextmanager
+def span(name: str, **fields) -> Iterator[dict]:
+    """Mesure et journalise la durée d'une étape.
+    
+    Le dictionnaire retourné peut être complété dans le bloc:
+        with span('identification', id_reunion=3) as s:
+            s['resultat'] = 'trouve'
+    """
+    if not _span_logger.isEnabledFor(logging.INFO):
+        yield fields
+        return
+    start = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields['erreur'] = type(e).__name__
+        raise
+    finally:
+        duration = (time.perf_counter() - start) * 1000
+        fields.update(span=name, duree_ms=round(duration, 3))
+        _span_logger.info("%s: %.2f ms", name, duration, extra=fields)
+
+
+def spanned(name: str):
+    """Décorateur: chaque appel de la fonction est mesuré par span(name)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class Logger:
     """Gestionnaire de logs pour l'application"""
     
     def __init__(self, log_dir="logs"):
         self.log_dir = log_dir
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        
-        # Configuration du logger
-        log_filename = os.path.join(log_dir, f"pointage_{datetime.now().strftime('%Y%m%d')}.log")
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_filename, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
-        
-        self.logger = logging.getLogger(__name__)
+        setup_logging(log_dir)
+        self.logger = get_logger('app')
     
     def info(self, message):
         """Log d'information"""
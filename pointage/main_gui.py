@@ -2,28 +2,64 @@
 # FICHIER: main_gui.py - Interface graphique principale
 # =============================================================================
 
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 import threading
+import multiprocessing
 import os
+from config import Config
+from backup_manager import BackupManager, BackupScheduler
 from database import DatabaseManager
 from fingerprint_manager import FingerprintManager
 from excel_generator import ExcelGenerator
+from identification import IdentificationEngine, MemberMatcher, identification_latency, identification_results
+from member_cache import MemberCache
+from metrics import MetricsExporter
+from profiler import MODES, Profiler
+from report_jobs import ReportJob, ReportJobQueue
+from reunion_cache import ReunionCache
+from scan_pool import ScanWorkerPool
+from virtual_tree import VirtualTreeview
+from logger import get_logger, setup_logging, span
+
+logger = get_logger('main_gui')
 
 class PointageApp:
     """Application principale de pointage"""
     
-    def __init__(self):
+    def __init__(self, profiling=Config.PROFILING_MODE):
+        # Le profileur démarre avant les threads de travail pour les suivre aussi
+        self.profiler = None
+        if profiling:
+            self.profiler = Profiler(profiling, Config.LOGS_DIR, Config.PROFILING_SAMPLE_MS,
+                                     Config.PROFILING_DUMP_INTERVAL)
+            self.profiler.start()
+        
         self.root = tk.Tk()
         self.root.title("Application de Pointage - Empreintes Digitales")
         self.root.geometry("1000x700")
         self.root.configure(bg='#f0f0f0')
         
         # Initialisation des composants
-        self.db = DatabaseManager()
+        self.db = DatabaseManager(Config.DATABASE_PATH, storage_mode=Config.DATABASE_STORAGE_MODE)
+        self.db.enable_write_behind(Config.WRITE_BEHIND_INTERVAL_MS, Config.WRITE_BEHIND_MAX_ROWS)
+        self.membres = MemberCache(self.db)
+        self.reunions = ReunionCache(self.db)
+        self.backup_scheduler = BackupScheduler(
+            BackupManager(Config.DATABASE_PATH, Config.BACKUPS_DIR, compression=Config.BACKUP_COMPRESSION),
+            Config.BACKUP_INTERVAL, Config.BACKUP_DAYS_TO_KEEP)
         self.fingerprint_manager = FingerprintManager()
         self.excel_generator = ExcelGenerator()
+        self.identification_engine = IdentificationEngine(FingerprintManager.FEATURE_DIMENSION,
+                                                          Config.FINGERPRINT_THRESHOLD)
+        self.matcher = MemberMatcher(self.membres, self.identification_engine, self.fingerprint_manager)
+        self.scan_pool = ScanWorkerPool(self.identifier_scan, Config.SCAN_WORKERS,
+                                        Config.SCAN_QUEUE_SIZE, Config.SCAN_MAX_AGE)
+        self.report_jobs = ReportJobQueue(Config.REPORT_WORKERS)
+        self.metrics_exporter = MetricsExporter(port=Config.METRICS_PORT, path=Config.METRICS_FILE,
+                                                interval=Config.METRICS_INTERVAL)
         
         # Variables
         self.current_reunion = None
@@ -32,6 +68,37 @@ class PointageApp:
         # Interface
         self.setup_gui()
         self.fingerprint_manager.check_device()
+        self.load_templates()
+        self.backup_scheduler.start()
+        self.poll_scan_results()
+        self.poll_report_jobs()
+        self.metrics_exporter.start()
+    
+    def load_templates(self):
+        """Charge les gabarits des membres dans le moteur d'identification"""
+        def load_thread():
+            try:
+                converted = []
+                stale = 0
+                for id_empreinte, gabarit_format, gabarit_data in self.db.iter_templates():
+                    features = self.fingerprint_manager.template_features(gabarit_format, gabarit_data)
+                    if features is None:
+                        stale += 1
+                        continue
+                    if Config.IDENTIFICATION_ENABLED:
+                        self.identification_engine.add(id_empreinte, features)
+                    # Les images héritées sont remplacées par leur gabarit compact
+                    if gabarit_format != FingerprintManager.TEMPLATE_FORMAT:
+                        converted.append((id_empreinte, FingerprintManager.TEMPLATE_FORMAT,
+                                          self.fingerprint_manager.encode_template(features)))
+                if converted:
+                    self.db.save_templates(converted)
+                if stale:
+                    logger.warning(f"{stale} gabarit(s) d'un ancien format ignorés: membres à réenrôler")
+            except Exception:
+                logger.exception("Erreur lors du chargement des gabarits")
+        
+        threading.Thread(target=load_thread, daemon=True).start()
     
     def setup_gui(self):
         """Configure l'interface graphique"""
@@ -124,20 +191,16 @@ class PointageApp:
         list_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), 
                        padx=5, pady=5)
         
-        # Treeview pour la liste
+        # Treeview virtualisé pour la liste
         columns = ('Titre', 'Nom', 'Prénom', 'Service', 'Email', 'Téléphone')
-        self.membres_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=10)
+        self.membres_list = VirtualTreeview(list_frame, columns, height=10)
+        self.membres_tree = self.membres_list.tree
         
         for col in columns:
             self.membres_tree.heading(col, text=col)
             self.membres_tree.column(col, width=120)
         
-        # Scrollbar
-        scrollbar_membres = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.membres_tree.yview)
-        self.membres_tree.configure(yscrollcommand=scrollbar_membres.set)
-        
-        self.membres_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar_membres.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.membres_list.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         list_frame.columnconfigure(0, weight=1)
         list_frame.rowconfigure(0, weight=1)
@@ -150,12 +213,12 @@ class PointageApp:
         membres_frame.rowconfigure(1, weight=1)
         
         # Variables pour l'empreinte en cours
-        self.current_fingerprint_data = None
+        self.current_template = None
         self.current_fingerprint_hash = None
         self.selected_membre_id = None
         
         # Charger les membres
-        self.refresh_membres_list()
+        self.membres_list.set_source(self.fetch_membres_rows, self.membres.count)
     
     def setup_reunions_tab(self):
         """Configure l'onglet de gestion des réunions"""
@@ -188,20 +251,26 @@ class PointageApp:
         ttk.Label(date_frame, text="à").pack(side=tk.LEFT, padx=5)
         ttk.Entry(date_frame, textvariable=self.reunion_heure_var, width=8).pack(side=tk.LEFT)
         
+        ttk.Label(create_frame, text="Services invités:").grid(row=3, column=0, sticky=tk.W, pady=2)
+        self.reunion_services_var = tk.StringVar()
+        ttk.Entry(create_frame, textvariable=self.reunion_services_var, width=50).grid(
+            row=3, column=1, sticky=(tk.W, tk.E), padx=(5, 0), pady=2)
+        
         create_frame.columnconfigure(1, weight=1)
         
         # Bouton de création
         ttk.Button(create_frame, text="Créer la Réunion", 
-                  command=self.creer_reunion).grid(row=3, column=0, columnspan=2, pady=10)
+                  command=self.creer_reunion).grid(row=4, column=0, columnspan=2, pady=10)
         
         # Liste des réunions
         list_frame = ttk.LabelFrame(reunions_frame, text="Liste des réunions", padding="10")
         list_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), 
                        padx=5, pady=5)
         
-        # Treeview pour les réunions
+        # Treeview virtualisé pour les réunions
         columns = ('ID', 'Titre', 'Lieu', 'Date', 'Statut')
-        self.reunions_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=12)
+        self.reunions_list = VirtualTreeview(list_frame, columns, height=12)
+        self.reunions_tree = self.reunions_list.tree
         
         for col in columns:
             self.reunions_tree.heading(col, text=col)
@@ -210,12 +279,7 @@ class PointageApp:
             else:
                 self.reunions_tree.column(col, width=150)
         
-        # Scrollbar
-        scrollbar_reunions = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.reunions_tree.yview)
-        self.reunions_tree.configure(yscrollcommand=scrollbar_reunions.set)
-        
-        self.reunions_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar_reunions.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.reunions_list.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         list_frame.columnconfigure(0, weight=1)
         list_frame.rowconfigure(0, weight=1)
@@ -225,7 +289,7 @@ class PointageApp:
         reunions_frame.rowconfigure(1, weight=1)
         
         # Charger les réunions
-        self.refresh_reunions_list()
+        self.reunions_list.set_source(self.fetch_reunions_rows, self.db.count_reunions)
     
     def setup_pointage_tab(self):
         """Configure l'onglet de pointage"""
@@ -348,14 +412,37 @@ Instructions:
         ttk.Button(actions_frame, text="Ouvrir Dossier", 
                   command=self.ouvrir_dossier_rapports).pack(side=tk.LEFT, padx=5)
         
+        # Rapports d'une période: synthèse et un classeur par réunion
+        periode_frame = ttk.Frame(select_frame)
+        periode_frame.grid(row=2, column=0, columnspan=3, pady=(0, 5))
+        
+        aujourd_hui = datetime.now()
+        self.periode_debut_var = tk.StringVar(value=aujourd_hui.strftime('%Y-%m-01'))
+        self.periode_fin_var = tk.StringVar(value=aujourd_hui.strftime('%Y-%m-%d'))
+        ttk.Label(periode_frame, text="Période du (AAAA-MM-JJ):").pack(side=tk.LEFT)
+        ttk.Entry(periode_frame, textvariable=self.periode_debut_var, width=12).pack(side=tk.LEFT, padx=5)
+        ttk.Label(periode_frame, text="au:").pack(side=tk.LEFT)
+        ttk.Entry(periode_frame, textvariable=self.periode_fin_var, width=12).pack(side=tk.LEFT, padx=5)
+        ttk.Button(periode_frame, text="Rapports de la période", 
+                  command=self.generer_rapports_periode).pack(side=tk.LEFT, padx=5)
+        
+        # Rapports en file d'attente
+        jobs_frame = ttk.Frame(select_frame)
+        jobs_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        self.rapport_status = ttk.Label(jobs_frame, text="Aucun rapport en cours")
+        self.rapport_status.pack(side=tk.LEFT, padx=5)
+        ttk.Button(jobs_frame, text="Annuler les rapports", 
+                  command=self.report_jobs.cancel_all).pack(side=tk.RIGHT, padx=5)
+        
         # Frame de prévisualisation
         preview_frame = ttk.LabelFrame(rapports_frame, text="Prévisualisation", padding="10")
         preview_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), 
                           padx=5, pady=5)
         
-        # Treeview pour la prévisualisation
+        # Treeview virtualisé pour la prévisualisation
         columns = ('Titre', 'Nom', 'Prénom', 'Service', 'Email', 'Téléphone', 'Heure')
-        self.preview_tree = ttk.Treeview(preview_frame, columns=columns, show='headings', height=15)
+        self.preview_list = VirtualTreeview(preview_frame, columns, height=15, xscroll=True)
+        self.preview_tree = self.preview_list.tree
         
         for col in columns:
             self.preview_tree.heading(col, text=col)
@@ -364,14 +451,7 @@ Instructions:
             else:
                 self.preview_tree.column(col, width=130)
         
-        # Scrollbars
-        scrollbar_preview_v = ttk.Scrollbar(preview_frame, orient=tk.VERTICAL, command=self.preview_tree.yview)
-        scrollbar_preview_h = ttk.Scrollbar(preview_frame, orient=tk.HORIZONTAL, command=self.preview_tree.xview)
-        self.preview_tree.configure(yscrollcommand=scrollbar_preview_v.set, xscrollcommand=scrollbar_preview_h.set)
-        
-        self.preview_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar_preview_v.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        scrollbar_preview_h.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        self.preview_list.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         preview_frame.columnconfigure(0, weight=1)
         preview_frame.rowconfigure(0, weight=1)
@@ -391,9 +471,9 @@ Instructions:
         """Capture l'empreinte pour un nouveau membre"""
         def capture_thread():
             try:
-                result = self.fingerprint_manager.capture_fingerprint()
+                result = self.fingerprint_manager.capture_template(enroll=True)
                 if result:
-                    self.current_fingerprint_data, self.current_fingerprint_hash = result
+                    self.current_template, self.current_fingerprint_hash = result
                     self.root.after(0, lambda: self.fingerprint_status.config(
                         text="Empreinte capturée avec succès", foreground="green"))
                 else:
@@ -425,12 +505,16 @@ Instructions:
             'service': self.membre_vars['service_var'].get(),
             'email': self.membre_vars['email_var'].get(),
             'telephone': self.membre_vars['telephone_var'].get(),
-            'empreinte_data': self.current_fingerprint_data,
-            'empreinte_hash': self.current_fingerprint_hash
+            'empreinte_hash': self.current_fingerprint_hash,
+            'gabarit_format': FingerprintManager.TEMPLATE_FORMAT,
+            'gabarit_data': self.current_template
         }
         
         # Ajout en base
-        if self.db.add_membre(membre_data):
+        id_empreinte = self.membres.add_membre(membre_data)
+        if id_empreinte:
+            features = self.fingerprint_manager.decode_template(self.current_template)
+            self.matcher.add(id_empreinte, features, self.current_fingerprint_hash)
             messagebox.showinfo("Succès", "Membre ajouté avec succès")
             self.effacer_formulaire_membre()
             self.refresh_membres_list()
@@ -459,8 +543,19 @@ Instructions:
             'telephone': self.membre_vars['telephone_var'].get()
         }
         
+        # Réenrôlement si une nouvelle empreinte a été capturée
+        if self.current_template:
+            membre_data.update({
+                'empreinte_hash': self.current_fingerprint_hash,
+                'gabarit_format': FingerprintManager.TEMPLATE_FORMAT,
+                'gabarit_data': self.current_template
+            })
+        
         # Modification en base
-        if self.db.update_membre(self.selected_membre_id, membre_data):
+        if self.membres.update_membre(self.selected_membre_id, membre_data):
+            if self.current_template:
+                features = self.fingerprint_manager.decode_template(self.current_template)
+                self.matcher.add(self.selected_membre_id, features, self.current_fingerprint_hash)
             messagebox.showinfo("Succès", "Membre modifié avec succès")
             self.effacer_formulaire_membre()
             self.refresh_membres_list()
@@ -471,7 +566,7 @@ Instructions:
         """Efface le formulaire de membre"""
         for var in self.membre_vars.values():
             var.set("")
-        self.current_fingerprint_data = None
+        self.current_template = None
         self.current_fingerprint_hash = None
         self.selected_membre_id = None
         self.fingerprint_status.config(text="Aucune empreinte capturée", foreground="red")
@@ -480,38 +575,30 @@ Instructions:
         """Gère la sélection d'un membre dans la liste"""
         selection = self.membres_tree.selection()
         if selection:
-            item = self.membres_tree.item(selection[0])
-            values = item['values']
-            
-            # Récupération de l'ID depuis la base
-            membres = self.db.get_all_membres()
-            for membre in membres:
-                if (membre['nom'] == values[1] and membre['prenom'] == values[2] and 
-                    membre['email'] == values[4]):
-                    self.selected_membre_id = membre['id_empreinte']
-                    
-                    # Remplissage du formulaire
-                    self.membre_vars['titre_var'].set(values[0])
-                    self.membre_vars['nom_var'].set(values[1])
-                    self.membre_vars['prenom_var'].set(values[2])
-                    self.membre_vars['service_var'].set(values[3])
-                    self.membre_vars['email_var'].set(values[4])
-                    self.membre_vars['telephone_var'].set(values[5])
-                    break
+            # L'identifiant de la ligne est l'id_empreinte du membre
+            membre = self.membres.get(selection[0])
+            if membre:
+                self.selected_membre_id = membre['id_empreinte']
+                
+                # Remplissage du formulaire
+                self.membre_vars['titre_var'].set(membre['titre'])
+                self.membre_vars['nom_var'].set(membre['nom'])
+                self.membre_vars['prenom_var'].set(membre['prenom'])
+                self.membre_vars['service_var'].set(membre['service'])
+                self.membre_vars['email_var'].set(membre['email'])
+                self.membre_vars['telephone_var'].set(membre['telephone'])
     
     def refresh_membres_list(self):
-        """Actualise la liste des membres"""
-        # Vider la liste
-        for item in self.membres_tree.get_children():
-            self.membres_tree.delete(item)
-        
-        # Recharger les membres
-        membres = self.db.get_all_membres()
-        for membre in membres:
-            self.membres_tree.insert('', 'end', values=(
-                membre['titre'], membre['nom'], membre['prenom'],
-                membre['service'], membre['email'], membre['telephone']
-            ))
+        """Actualise la liste des membres (seules les lignes visibles sont mises à jour)"""
+        self.membres_list.refresh()
+    
+    def fetch_membres_rows(self, offset, limit):
+        """Fournit une page de lignes de la liste des membres depuis le cache"""
+        # L'identifiant de la ligne est l'id_empreinte du membre
+        return [(membre['id_empreinte'], (
+            membre['titre'], membre['nom'], membre['prenom'],
+            membre['service'], membre['email'], membre['telephone']
+        )) for membre in self.membres.slice(offset, limit)]
     
     # =============================================================================
     # MÉTHODES DE GESTION DES RÉUNIONS
@@ -535,13 +622,20 @@ Instructions:
                 'date': date_obj.isoformat()
             }
             
-            reunion_id = self.db.create_reunion(reunion_data)
+            reunion_id = self.reunions.create_reunion(reunion_data)
             if reunion_id:
-                messagebox.showinfo("Succès", f"Réunion créée avec l'ID: {reunion_id}")
+                # Les membres des services invités sont attendus à la réunion
+                services = [s.strip() for s in self.reunion_services_var.get().split(',') if s.strip()]
+                nb_invites = self.db.invite_services(reunion_id, services)
+                message = f"Réunion créée avec l'ID: {reunion_id}"
+                if services:
+                    message += f"\n{nb_invites} membres invités"
+                messagebox.showinfo("Succès", message)
                 
                 # Effacer le formulaire
                 self.reunion_titre_var.set("")
                 self.reunion_lieu_var.set("")
+                self.reunion_services_var.set("")
                 self.reunion_date_var.set(datetime.now().strftime('%Y-%m-%d'))
                 self.reunion_heure_var.set(datetime.now().strftime('%H:%M'))
                 
@@ -556,14 +650,13 @@ Instructions:
             messagebox.showerror("Erreur", "Format de date/heure invalide")
     
     def refresh_reunions_list(self):
-        """Actualise la liste des réunions"""
-        # Vider la liste
-        for item in self.reunions_tree.get_children():
-            self.reunions_tree.delete(item)
-        
-        # Recharger les réunions
-        reunions = self.db.get_reunions()
-        for reunion in reunions:
+        """Actualise la liste des réunions (seules les lignes visibles sont mises à jour)"""
+        self.reunions_list.refresh()
+    
+    def fetch_reunions_rows(self, offset, limit):
+        """Fournit une page de lignes de la liste des réunions depuis la base"""
+        rows = []
+        for reunion in self.db.iter_reunions(limit=limit, offset=offset):
             # Formatage de la date
             try:
                 date_obj = datetime.fromisoformat(reunion['date'])
@@ -571,10 +664,11 @@ Instructions:
             except:
                 date_formatted = reunion['date']
             
-            self.reunions_tree.insert('', 'end', values=(
+            rows.append((str(reunion['id_reunion']), (
                 reunion['id_reunion'], reunion['titre'], reunion['lieu'],
                 date_formatted, reunion['statut']
-            ))
+            )))
+        return rows
     
     # =============================================================================
     # MÉTHODES DE POINTAGE
@@ -582,18 +676,17 @@ Instructions:
     
     def refresh_reunion_combo(self):
         """Actualise la combobox des réunions pour le pointage"""
-        reunions = self.db.get_reunions()
+        # Seules les réunions actives, depuis le cache: indépendant de l'historique
         reunion_list = []
-        for reunion in reunions:
-            if reunion['statut'] in ['planifiee', 'en_cours']:
-                try:
-                    date_obj = datetime.fromisoformat(reunion['date'])
-                    date_str = date_obj.strftime('%d/%m/%Y %H:%M')
-                except:
-                    date_str = reunion['date']
-                
-                reunion_text = f"{reunion['id_reunion']} - {reunion['titre']} ({date_str})"
-                reunion_list.append(reunion_text)
+        for reunion in self.reunions.actives():
+            try:
+                date_obj = datetime.fromisoformat(reunion['date'])
+                date_str = date_obj.strftime('%d/%m/%Y %H:%M')
+            except:
+                date_str = reunion['date']
+            
+            reunion_text = f"{reunion['id_reunion']} - {reunion['titre']} ({date_str})"
+            reunion_list.append(reunion_text)
         
         self.reunion_combo['values'] = reunion_list
         if reunion_list and not self.reunion_combo.get():
@@ -605,54 +698,83 @@ Instructions:
         if selection:
             # Extraction de l'ID de la réunion
             self.current_reunion = int(selection.split(' - ')[0])
+            self.load_invites(self.current_reunion)
             self.refresh_participants_list()
     
+    def load_invites(self, id_reunion):
+        """Précharge les invités de la réunion (ensemble chaud de l'identification)"""
+        self.matcher.set_invites(None)
+        
+        def load_thread():
+            try:
+                invites = self.matcher.build_invites(id_reunion, self.db.get_invitations(id_reunion),
+                                                     self.db.iter_invitation_templates(id_reunion))
+                # Ignoré si une autre réunion a été sélectionnée entre-temps
+                if invites.ids and self.current_reunion == id_reunion:
+                    self.matcher.set_invites(invites)
+            except Exception:
+                logger.exception("Erreur lors du chargement des invités")
+        
+        threading.Thread(target=load_thread, daemon=True).start()
+    
     def scanner_empreinte(self):
         """Scanner une empreinte pour le pointage"""
         if not self.current_reunion:
             messagebox.showerror("Erreur", "Veuillez sélectionner une réunion")
             return
         
-        def scan_thread():
-            try:
-                # Mise à jour de l'interface
-                self.root.after(0, lambda: self.update_result_text("Scan en cours...\n"))
-                
-                # Capture de l'empreinte
-                result = self.fingerprint_manager.capture_fingerprint()
-                if not result:
-                    self.root.after(0, lambda: self.update_result_text("Erreur lors de la capture\n"))
-                    return
-                
-                fingerprint_data, fingerprint_hash = result
-                
-                # Recherche de correspondance
-                self.root.after(0, lambda: self.update_result_text("Recherche de correspondance...\n"))
-                
-                membre = self.db.find_membre_by_fingerprint(fingerprint_hash)
-                
-                if membre:
-                    self.scanned_membre = membre
-                    result_text = f"""Membre identifié:
+        # Le nouveau scan remplace ceux encore en attente
+        self.scanned_membre = None
+        self.confirm_button.config(state=tk.DISABLED)
+        if self.scan_pool.submit() is None:
+            self.update_result_text("Trop de scans en attente, veuillez patienter.\n")
+        else:
+            self.update_result_text("Scan en cours...\n")
+    
+    def identifier_scan(self, payload):
+        """Capture et identification d'une empreinte (exécuté par un worker du pool)"""
+        result = self.fingerprint_manager.capture_template()
+        if not result:
+            return None
+        
+        template, fingerprint_hash = result
+        with span('identification', id_reunion=self.current_reunion) as mesure, identification_latency.time():
+            membre, score, mesure['resultat'] = self.matcher.match(template, fingerprint_hash, self.current_reunion)
+        identification_results[mesure['resultat']].inc()
+        return (membre, score) if membre else False
+    
+    def poll_scan_results(self):
+        """Canal unique de livraison des résultats de scan dans le thread Tk"""
+        for scan in self.scan_pool.poll():
+            self.afficher_resultat_scan(scan)
+        self.root.after(Config.SCAN_POLL_MS, self.poll_scan_results)
+    
+    def afficher_resultat_scan(self, scan):
+        """Affiche le résultat d'un scan et prépare la confirmation"""
+        if scan.error is not None:
+            messagebox.showerror("Erreur", f"Erreur lors du scan: {scan.error}")
+            return
+        if scan.result is None:
+            self.update_result_text("Erreur lors de la capture\n")
+            return
+        if not scan.result:
+            self.scanned_membre = None
+            self.update_result_text("Aucune correspondance trouvée.\nEmpreinte non reconnue.")
+            self.confirm_button.config(state=tk.DISABLED)
+            return
+        
+        membre, score = scan.result
+        self.scanned_membre = membre
+        self.update_result_text(f"""Membre identifié:
 {membre['titre']} {membre['nom']} {membre['prenom']}
 Service: {membre['service']}
 Email: {membre['email']}
 Téléphone: {membre['telephone']}
+Score de correspondance: {score:.2f}
 
 Empreinte reconnue avec succès!
-"""
-                    self.root.after(0, lambda: self.update_result_text(result_text))
-                    self.root.after(0, lambda: self.confirm_button.config(state=tk.NORMAL))
-                else:
-                    self.root.after(0, lambda: self.update_result_text("Aucune correspondance trouvée.\nEmpreinte non reconnue."))
-                    self.scanned_membre = None
-                    self.root.after(0, lambda: self.confirm_button.config(state=tk.DISABLED))
-                    
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Erreur", f"Erreur lors du scan: {e}"))
-        
-        # Démarrer le scan dans un thread séparé
-        threading.Thread(target=scan_thread, daemon=True).start()
+""")
+        self.confirm_button.config(state=tk.NORMAL)
     
     def update_result_text(self, text):
         """Met à jour le texte de résultat"""
@@ -691,8 +813,12 @@ Empreinte reconnue avec succès!
         # Récupérer les participants
         participants = self.db.get_participants(self.current_reunion)
         
-        # Mettre à jour le compteur
-        self.count_label.config(text=f"Participants: {len(participants)}")
+        # Mettre à jour le compteur (statistiques maintenues en base)
+        count_text = f"Participants: {self.db.count_participants(self.current_reunion)}"
+        nb_invites = self.db.count_invitations(self.current_reunion)
+        if nb_invites:
+            count_text += f" / {nb_invites} invités"
+        self.count_label.config(text=count_text)
         
         # Ajouter les participants à la liste
         for participant in participants:
@@ -712,7 +838,9 @@ Empreinte reconnue avec succès!
             return
         
         if messagebox.askyesno("Confirmation", "Voulez-vous terminer cette réunion?"):
-            if self.db.update_reunion_status(self.current_reunion, 'terminee'):
+            # Écrire les pointages encore en file avant de clore la réunion
+            self.db.flush()
+            if self.reunions.update_reunion_status(self.current_reunion, 'terminee'):
                 messagebox.showinfo("Succès", "Réunion terminée")
                 self.refresh_reunion_combo()
                 self.refresh_reunions_list()
@@ -726,7 +854,8 @@ Empreinte reconnue avec succès!
     
     def refresh_rapport_combo(self):
         """Actualise la combobox des réunions pour les rapports"""
-        reunions = self.db.get_reunions()
+        # Réunions les plus récentes; les plus anciennes passent par les rapports de période
+        reunions = self.db.get_reunions(limit=Config.RAPPORT_COMBO_LIMIT)
         reunion_list = []
         for reunion in reunions:
             try:
@@ -750,26 +879,25 @@ Empreinte reconnue avec succès!
         # Extraction de l'ID de la réunion
         reunion_id = int(selection.split(' - ')[0])
         
-        # Vider le treeview
-        for item in self.preview_tree.get_children():
-            self.preview_tree.delete(item)
-        
-        # Récupérer les participants
-        participants = self.db.get_participants(reunion_id)
-        
-        # Ajouter les participants au treeview
-        for participant in participants:
-            try:
-                heure_obj = datetime.fromisoformat(participant['heure_pointage'])
-                heure_str = heure_obj.strftime('%d/%m/%Y %H:%M:%S')
-            except:
-                heure_str = participant['heure_pointage']
-            
-            self.preview_tree.insert('', 'end', values=(
-                participant['titre'], participant['nom'], participant['prenom'],
-                participant['service'], participant['email'], participant['telephone'],
-                heure_str
-            ))
+        def fetch_rows(offset, limit):
+            rows = []
+            participants = self.db.iter_participants(reunion_id, limit=limit, offset=offset)
+            for index, participant in enumerate(participants, offset):
+                try:
+                    heure_obj = datetime.fromisoformat(participant['heure_pointage'])
+                    heure_str = heure_obj.strftime('%d/%m/%Y %H:%M:%S')
+                except:
+                    heure_str = participant['heure_pointage']
+                
+                rows.append((str(index), (
+                    participant['titre'], participant['nom'], participant['prenom'],
+                    participant['service'], participant['email'], participant['telephone'],
+                    heure_str
+                )))
+            return rows
+        
+        # Les participants sont chargés par pages au défilement
+        self.preview_list.set_source(fetch_rows, lambda: self.db.count_participants(reunion_id))
     
     def generer_excel(self):
         """Génère le fichier Excel"""
@@ -782,18 +910,12 @@ Empreinte reconnue avec succès!
         reunion_id = int(selection.split(' - ')[0])
         
         # Récupération des données
-        reunions = self.db.get_reunions()
-        reunion_info = None
-        for reunion in reunions:
-            if reunion['id_reunion'] == reunion_id:
-                reunion_info = reunion
-                break
-        
+        reunion_info = self.reunions.get(reunion_id)
         if not reunion_info:
             messagebox.showerror("Erreur", "Réunion non trouvée")
             return
         
-        participants = self.db.get_participants(reunion_id)
+        nb_participants = self.db.count_participants(reunion_id)
         
         # Génération du nom de fichier
         filename = self.excel_generator.get_default_filename(reunion_info['titre'])
@@ -806,21 +928,74 @@ Empreinte reconnue avec succès!
         )
         
         if filepath:
-            # Génération du fichier
-            if self.excel_generator.generate_rapport_reunion(reunion_info, participants, filepath):
-                messagebox.showinfo("Succès", f"Rapport généré avec succès:\n{filepath}")
+            # Génération en arrière-plan et en flux: les participants sont lus
+            # au fil de l'écriture, dans le thread du rapport
+            def generer(job):
+                return self.excel_generator.generate_rapport_reunion_streaming(
+                    reunion_info, self.db.iter_participants(reunion_id), filepath,
+                    nb_participants, job.progress)
+            
+            self.report_jobs.submit(f"Rapport « {reunion_info['titre']} »", generer, filepath=filepath)
+    
+    def generer_rapports_periode(self):
+        """Génère la synthèse et les rapports de toutes les réunions d'une période"""
+        date_debut = self.periode_debut_var.get().strip()
+        date_fin = self.periode_fin_var.get().strip()
+        try:
+            if datetime.strptime(date_debut, '%Y-%m-%d') > datetime.strptime(date_fin, '%Y-%m-%d'):
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Erreur", "Période invalide (format AAAA-MM-JJ)")
+            return
+        
+        reunions = self.db.get_reunions_periode(date_debut, date_fin)
+        if not reunions:
+            messagebox.showinfo("Information", "Aucune réunion sur cette période")
+            return
+        
+        output_dir = os.path.join(Config.REPORTS_DIR, f"periode_{date_debut}_{date_fin}")
+        
+        def generer(job):
+            # Une seule requête pour tous les participants de la période
+            participations = self.db.get_participations_periode(date_debut, date_fin)
+            if job.cancelled:
+                return False
+            return bool(self.excel_generator.generate_rapports_periode(
+                reunions, participations, output_dir, date_debut, date_fin, progress=job.progress))
+        
+        self.report_jobs.submit(f"Rapports du {date_debut} au {date_fin}", generer, filepath=None)
+    
+    def poll_report_jobs(self):
+        """Suivi des rapports en arrière-plan (thread Tk)"""
+        for job in self.report_jobs.poll():
+            if job.status == ReportJob.TERMINE:
+                cible = job.filepath or Config.REPORTS_DIR
+                messagebox.showinfo("Succès", f"{job.description} généré avec succès:\n{os.path.abspath(cible)}")
                 
                 # Proposer d'ouvrir le fichier
-                if messagebox.askyesno("Ouvrir", "Souhaitez-vous ouvrir le fichier?"):
+                if job.filepath and messagebox.askyesno("Ouvrir", "Souhaitez-vous ouvrir le fichier?"):
                     try:
-                        os.startfile(filepath)  # Windows
+                        os.startfile(job.filepath)  # Windows
                     except:
                         try:
-                            os.system(f"open '{filepath}'")  # macOS
+                            os.system(f"open '{job.filepath}'")  # macOS
                         except:
-                            os.system(f"xdg-open '{filepath}'")  # Linux
-            else:
-                messagebox.showerror("Erreur", "Erreur lors de la génération du rapport")
+                            os.system(f"xdg-open '{job.filepath}'")  # Linux
+            elif job.status == ReportJob.ERREUR:
+                detail = f": {job.error}" if job.error else ""
+                messagebox.showerror("Erreur", f"Erreur lors de la génération: {job.description}{detail}")
+        
+        active = self.report_jobs.active()
+        if active:
+            courant = next((job for job in active if job.status == ReportJob.EN_COURS), active[0])
+            attente = len(active) - 1
+            texte = f"{courant.description}: {courant.rows_written} lignes écrites"
+            if attente:
+                texte += f" ({attente} en attente)"
+        else:
+            texte = "Aucun rapport en cours"
+        self.rapport_status.config(text=texte)
+        self.root.after(Config.REPORT_POLL_MS, self.poll_report_jobs)
     
     def ouvrir_dossier_rapports(self):
         """Ouvre le dossier des rapports"""
@@ -834,7 +1009,16 @@ Empreinte reconnue avec succès!
     
     def run(self):
         """Lance l'application"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.report_jobs.shutdown()
+            self.scan_pool.stop()
+            self.backup_scheduler.stop()
+            self.metrics_exporter.stop()
+            self.db.close()
+            if self.profiler:
+                self.profiler.stop()
 
 
 # =============================================================================
@@ -842,6 +1026,9 @@ Empreinte reconnue avec succès!
 # =============================================================================
 
 if __name__ == "__main__":
+    # Pool de processus des rapports dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
+    
     # Vérification et installation des dépendances
     def check_dependencies():
         """Vérifie la présence des modules requis"""
@@ -849,7 +1036,8 @@ if __name__ == "__main__":
             ('tkinter', 'Interface graphique'),
             ('sqlite3', 'Base de données'),
             ('PIL', 'Traitement d\'images - pip install Pillow'),
-            ('openpyxl', 'Génération Excel - pip install openpyxl')
+            ('openpyxl', 'Génération Excel - pip install openpyxl'),
+            ('numpy', 'Identification des empreintes - pip install numpy')
         ]
         
         missing_modules = []
@@ -859,6 +1047,8 @@ if __name__ == "__main__":
                     import PIL
                 elif module == 'openpyxl':
                     import openpyxl
+                elif module == 'numpy':
+                    import numpy
                 else:
                     __import__(module)
             except ImportError:
@@ -869,7 +1059,7 @@ if __name__ == "__main__":
             for module, desc in missing_modules:
                 print(f"- {desc}")
             print("\nPour installer les modules manquants:")
-            print("pip install Pillow openpyxl")
+            print("pip install Pillow openpyxl numpy")
             return False
         return True
     
@@ -878,13 +1068,19 @@ if __name__ == "__main__":
         input("Appuyez sur Entrée pour quitter...")
         exit(1)
     
+    parser = argparse.ArgumentParser(description="Application de pointage par empreintes digitales")
+    parser.add_argument('--profil', choices=MODES, default=Config.PROFILING_MODE,
+                        help="Profile la boucle Tk et les threads (résultats dans le dossier des journaux)")
+    args = parser.parse_args()
+    
+    setup_logging(Config.LOGS_DIR, Config.LOG_LEVEL)
     try:
         # Création et lancement de l'application
-        print("Initialisation de l'application de pointage...")
-        app = PointageApp()
-        print("Application prête. Interface graphique en cours de chargement...")
+        logger.info("Initialisation de l'application de pointage...")
+        app = PointageApp(profiling=args.profil)
+        logger.info("Application prête. Interface graphique en cours de chargement...")
         app.run()
-    except Exception as e:
-        print(f"Erreur lors du lancement de l'application: {e}")
+    except Exception:
+        logger.exception("Erreur lors du lancement de l'application")
         input("Appuyez sur Entrée pour quitter...")
 
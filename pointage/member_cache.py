@@ -0,0 +1,171 @@
+# =============================================================================
+# FICHIER: member_cache.py - Cache mémoire des membres
+# =============================================================================
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from database import DatabaseManager
+
+
+class MemberCache:
+    """Cache des membres actifs au-dessus de DatabaseManager"""
+    
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, Dict] = {}
+        self._by_hash: Dict[str, str] = {}
+        self._by_email: Dict[str, str] = {}
+        self._by_name: Dict[Tuple[str, str], List[str]] = {}
+        # Liste triée par (nom, prénom, id), tenue à jour à chaque ajout ou retrait
+        self._sort_keys: List[Tuple[str, str, str]] = []
+        self._sorted: List[Dict] = []
+        self.load()
+    
+    def load(self):
+        """Charge tous les membres actifs depuis la base"""
+        with self._lock:
+            self._by_id.clear()
+            self._by_hash.clear()
+            self._by_email.clear()
+            self._by_name.clear()
+            for membre in self.db.get_all_membres():
+                self._index(membre, keep_sorted=False)
+            self._sorted = sorted(self._by_id.values(), key=self._sort_key)
+            self._sort_keys = [self._sort_key(membre) for membre in self._sorted]
+    
+    def stats(self) -> Dict:
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._by_id)}
+    
+    def get(self, id_empreinte: str) -> Optional[Dict]:
+        """Retourne un membre par son id_empreinte"""
+        with self._lock:
+            membre = self._by_id.get(id_empreinte)
+            if membre is not None:
+                self.hits += 1
+                return membre
+            self.misses += 1
+        
+        membre = self.db.get_membre(id_empreinte)
+        if membre:
+            with self._lock:
+                self._index(membre)
+        return membre
+    
+    def find_by_hash(self, empreinte_hash: str) -> Optional[Dict]:
+        """Retourne un membre par le hash de son empreinte"""
+        with self._lock:
+            id_empreinte = self._by_hash.get(empreinte_hash)
+            if id_empreinte is not None:
+                self.hits += 1
+                return self._by_id[id_empreinte]
+            self.misses += 1
+        
+        membre = self.db.find_membre_by_fingerprint(empreinte_hash)
+        if membre:
+            return self.get(membre['id_empreinte'])
+        return None
+    
+    def find_by_email(self, email: str) -> Optional[Dict]:
+        """Retourne un membre par son email"""
+        with self._lock:
+            id_empreinte = self._by_email.get(email)
+            if id_empreinte is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._by_id[id_empreinte]
+    
+    def find_by_name(self, nom: str, prenom: str) -> List[Dict]:
+        """Retourne les membres portant ce nom et ce prénom"""
+        with self._lock:
+            ids = self._by_name.get((nom, prenom), [])
+            if ids:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return [self._by_id[id_empreinte] for id_empreinte in ids]
+    
+    def all(self) -> List[Dict]:
+        """Retourne les membres actifs triés par nom et prénom"""
+        with self._lock:
+            return list(self._sorted)
+    
+    def count(self) -> int:
+        """Nombre de membres actifs en cache"""
+        with self._lock:
+            return len(self._by_id)
+    
+    def slice(self, offset: int, limit: int) -> List[Dict]:
+        """Retourne une tranche de la liste triée par nom et prénom"""
+        with self._lock:
+            return self._sorted[offset:offset + limit]
+    
+    def add_membre(self, membre_data: Dict) -> Optional[str]:
+        """Ajoute un membre en base puis dans le cache"""
+        id_empreinte = self.db.add_membre(membre_data)
+        if id_empreinte:
+            self.refresh(id_empreinte)
+        return id_empreinte
+    
+    def update_membre(self, id_empreinte: str, membre_data: Dict) -> bool:
+        """Met à jour un membre en base puis réindexe son entrée"""
+        if not self.db.update_membre(id_empreinte, membre_data):
+            return False
+        self.refresh(id_empreinte)
+        return True
+    
+    def refresh(self, id_empreinte: str):
+        """Relit un membre en base et remplace son entrée"""
+        membre = self.db.get_membre(id_empreinte)
+        with self._lock:
+            self.invalidate(id_empreinte)
+            if membre:
+                self._index(membre)
+    
+    def invalidate(self, id_empreinte: str):
+        """Retire un membre du cache et de tous les index"""
+        with self._lock:
+            membre = self._by_id.pop(id_empreinte, None)
+            if membre is None:
+                return
+            if membre.get('empreinte_hash'):
+                self._by_hash.pop(membre['empreinte_hash'], None)
+            if self._by_email.get(membre['email']) == id_empreinte:
+                del self._by_email[membre['email']]
+            key = (membre['nom'], membre['prenom'])
+            ids = self._by_name.get(key, [])
+            if id_empreinte in ids:
+                ids.remove(id_empreinte)
+                if not ids:
+                    del self._by_name[key]
+            position = bisect.bisect_left(self._sort_keys, self._sort_key(membre))
+            if position < len(self._sort_keys) and self._sorted[position] is membre:
+                del self._sort_keys[position]
+                del self._sorted[position]
+    
+    @staticmethod
+    def _sort_key(membre: Dict) -> Tuple[str, str, str]:
+        return membre['nom'], membre['prenom'], membre['id_empreinte']
+    
+    def _index(self, membre: Dict, keep_sorted: bool = True):
+        """Ajoute un membre dans tous les index (et à sa place dans la liste triée)"""
+        id_empreinte = membre['id_empreinte']
+        if id_empreinte in self._by_id:
+            self.invalidate(id_empreinte)
+        self._by_id[id_empreinte] = membre
+        if membre.get('empreinte_hash'):
+            self._by_hash[membre['empreinte_hash']] = id_empreinte
+        self._by_email[membre['email']] = id_empreinte
+        self._by_name.setdefault((membre['nom'], membre['prenom']), []).append(id_empreinte)
+        if keep_sorted:
+            key = self._sort_key(membre)
+            position = bisect.bisect_left(self._sort_keys, key)
+            self._sort_keys.insert(position, key)
+            self._sorted.insert(position, membre)
@@ -0,0 +1,223 @@
+# =============================================================================
+# FICHIER: member_import.py - Import en masse des membres (CSV / XLSX)
+# =============================================================================
+
+"""
+Import en masse des membres depuis un fichier CSV ou XLSX.
+
+Colonnes attendues (en-tête sur la première ligne, accents et casse ignorés):
+    titre, nom, prenom, service, email, telephone, empreinte
+La colonne « empreinte » donne le chemin de l'image d'empreinte, relatif au
+fichier importé. Les gabarits sont extraits dans un pool de processus et les
+membres insérés par lots dans une seule transaction. Les lignes rejetées (à la
+validation, à l'extraction ou par la base) sont écrites, avec la cause du
+rejet, dans un fichier d'erreurs CSV.
+
+Utilisation:
+    python member_import.py membres.xlsx --errors erreurs.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+from config import Config
+from database import DatabaseManager
+from fingerprint_manager import FingerprintManager
+from logger import setup_logging
+
+REQUIRED_FIELDS = ('nom', 'prenom', 'service', 'email', 'empreinte')
+FIELDS = ('titre', 'nom', 'prenom', 'service', 'email', 'telephone', 'empreinte')
+
+# Instance propre à chaque processus du pool
+_fingerprint_manager: Optional[FingerprintManager] = None
+
+
+def extract_template(image_path: str) -> Tuple[bytes, str]:
+    """Calcule (gabarit, hash) d'une image d'empreinte (exécuté dans le pool)"""
+    global _fingerprint_manager
+    if _fingerprint_manager is None:
+        _fingerprint_manager = FingerprintManager()
+    with Image.open(image_path) as img:
+        template = _fingerprint_manager.image_template(img)
+    return template, _fingerprint_manager.generate_fingerprint_hash(template)
+
+
+def normalize_header(name) -> str:
+    """« Prénom » -> « prenom », « Téléphone » -> « telephone »"""
+    text = unicodedata.normalize('NFKD', str(name or '')).encode('ascii', 'ignore').decode()
+    return text.strip().lower()
+
+
+def iter_rows(filepath: str) -> Iterator[Tuple[int, Dict]]:
+    """Lit le fichier ligne par ligne et retourne (numéro de ligne, champs)"""
+    if filepath.lower().endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook
+        
+        wb = load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [normalize_header(name) for name in next(rows, ())]
+            for line, values in enumerate(rows, start=2):
+                if any(value is not None for value in values):
+                    yield line, {name: '' if value is None else str(value).strip()
+                                 for name, value in zip(header, values) if name}
+        finally:
+            wb.close()
+    else:
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            try:
+                dialect = csv.Sniffer().sniff(f.read(4096), delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            f.seek(0)
+            reader = csv.reader(f, dialect)
+            header = [normalize_header(name) for name in next(reader, [])]
+            for values in reader:
+                if any(value.strip() for value in values):
+                    yield reader.line_num, {name: value.strip()
+                                            for name, value in zip(header, values) if name}
+
+
+class MemberImporter:
+    """Import en masse des membres avec extraction parallèle des gabarits"""
+    
+    def __init__(self, db: DatabaseManager, batch_size: int = 1000, workers: Optional[int] = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.workers = workers
+    
+    def import_file(self, filepath: str, errors_path: Optional[str] = None,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Importe un fichier CSV/XLSX et retourne le bilan de l'import"""
+        stats = {'lues': 0, 'importees': 0, 'erreurs': 0, 'secondes': 0.0}
+        errors: List[Tuple[int, Dict, str]] = []
+        base_dir = os.path.dirname(os.path.abspath(filepath))
+        start = time.perf_counter()
+        # email -> (ligne, champs lus) des membres envoyés à la base
+        sources: Dict[str, Tuple[int, Dict]] = {}
+        
+        def rejected(membre: Dict, error: str):
+            line, row = sources[membre['email']]
+            errors.append((line, row, error))
+        
+        with ProcessPoolExecutor(self.workers) as executor:
+            batches = self._batches(iter_rows(filepath), base_dir, executor, stats, errors, progress, sources)
+            stats['importees'] = self.db.import_membres(batches, on_error=rejected)
+        
+        stats['erreurs'] = len(errors)
+        stats['secondes'] = time.perf_counter() - start
+        if errors and errors_path:
+            self.write_errors(errors_path, errors)
+        return stats
+    
+    def _batches(self, rows: Iterator[Tuple[int, Dict]], base_dir: str, executor: ProcessPoolExecutor,
+                 stats: Dict, errors: List, progress: Optional[Callable[[Dict], None]],
+                 sources: Dict[str, Tuple[int, Dict]]) -> Iterator[List[Dict]]:
+        """Valide les lignes et produit des lots prêts à insérer.
+        
+        Les extractions du lot suivant sont soumises avant d'attendre celles du
+        lot courant, pour que le pool travaille pendant les insertions.
+        """
+        known_emails = self.db.get_membre_emails()
+        pending = None
+        while True:
+            submitted = []
+            for line, row in rows:
+                stats['lues'] += 1
+                error = self._validate(row, known_emails)
+                if error:
+                    errors.append((line, row, error))
+                    continue
+                known_emails.add(row['email'])
+                image_path = os.path.join(base_dir, row['empreinte'])
+                submitted.append((line, row, executor.submit(extract_template, image_path)))
+                if len(submitted) >= self.batch_size:
+                    break
+            
+            if pending:
+                yield self._collect(pending, errors, sources)
+                if progress:
+                    progress(dict(stats, erreurs=len(errors)))
+            if not submitted:
+                return
+            pending = submitted
+    
+    def _collect(self, submitted: List, errors: List, sources: Dict[str, Tuple[int, Dict]]) -> List[Dict]:
+        """Attend les gabarits d'un lot et construit les membres à insérer"""
+        batch = []
+        for line, row, future in submitted:
+            try:
+                template, fingerprint_hash = future.result()
+            except Exception as e:
+                errors.append((line, row, f"Empreinte illisible: {e}"))
+                continue
+            sources[row['email']] = (line, row)
+            batch.append({
+                'titre': row.get('titre') or 'M.',
+                'nom': row['nom'],
+                'prenom': row['prenom'],
+                'service': row['service'],
+                'email': row['email'],
+                'telephone': row.get('telephone', ''),
+                'empreinte_hash': fingerprint_hash,
+                'gabarit_format': FingerprintManager.TEMPLATE_FORMAT,
+                'gabarit_data': template
+            })
+        return batch
+    
+    def _validate(self, row: Dict, known_emails: set) -> Optional[str]:
+        """Retourne la cause du rejet d'une ligne, ou None si elle est valide"""
+        missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+        if missing:
+            return f"Champs obligatoires manquants: {', '.join(missing)}"
+        if row['email'] in known_emails:
+            return "Email déjà utilisé"
+        return None
+    
+    def write_errors(self, errors_path: str, errors: List[Tuple[int, Dict, str]]):
+        """Écrit les lignes rejetées avec leur numéro et la cause du rejet"""
+        with open(errors_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(('ligne', 'erreur') + FIELDS)
+            for line, row, error in sorted(errors, key=lambda e: e[0]):
+                writer.writerow((line, error) + tuple(row.get(field, '') for field in FIELDS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse des membres depuis un fichier CSV ou XLSX")
+    parser.add_argument('fichier', help="Fichier CSV ou XLSX à importer")
+    parser.add_argument('--errors', help="Fichier CSV des lignes rejetées (défaut: <fichier>_erreurs.csv)")
+    parser.add_argument('--db', default=Config.DATABASE_PATH, help="Base de données cible")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de membres par lot")
+    parser.add_argument('--workers', type=int, help="Processus d'extraction des gabarits (défaut: nombre de CPU)")
+    args = parser.parse_args()
+    
+    setup_logging(Config.LOGS_DIR, Config.LOG_LEVEL)
+    errors_path = args.errors or f"{os.path.splitext(args.fichier)[0]}_erreurs.csv"
+    db = DatabaseManager(args.db, storage_mode=Config.DATABASE_STORAGE_MODE)
+    importer = MemberImporter(db, args.batch_size, args.workers)
+    
+    def progress(stats):
+        print(f"{stats['lues']} lignes lues, {stats['erreurs']} rejetées", file=sys.stderr)
+    
+    try:
+        stats = importer.import_file(args.fichier, errors_path, progress)
+    finally:
+        db.close()
+    
+    print(f"Import terminé en {stats['secondes']:.1f} s: {stats['importees']} membres importés, "
+          f"{stats['erreurs']} lignes rejetées")
+    if stats['erreurs']:
+        print(f"Détail des rejets: {errors_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+# =============================================================================
+# FICHIER: metrics.py - Métriques internes (compteurs, jauges, histogrammes)
+# =============================================================================
+
+"""
+Métriques en mémoire de l'application de pointage.
+
+Trois types, enregistrés dans un registre (REGISTRY par défaut):
+- Counter: compteur croissant (scans, erreurs, lignes écrites)
+- Gauge: valeur instantanée (file d'attente, taille de la dernière sauvegarde)
+- Histogram: distribution de durées à la manière d'HdrHistogram, en
+  microsecondes, avec des seaux log-linéaires (précision relative ~3 %)
+
+L'enregistrement d'un événement coûte moins d'une microseconde: une
+incrémentation sous verrou, sans allocation. Le nombre d'événements, le
+maximum et les quantiles d'un histogramme ne sont calculés qu'à l'export.
+
+MetricsExporter publie l'instantané au format texte Prometheus
+(http://127.0.0.1:<port>/metrics), en JSON (/metrics.json) et/ou dans un
+fichier réécrit périodiquement. Au format Prometheus, un histogramme est
+exporté en seaux cumulés fixes (_bucket{le=...}, BUCKETS), agrégeables entre
+postes par histogram_quantile(); le JSON garde les quantiles précis.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Quantiles exportés pour les histogrammes (JSON)
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# Bornes (secondes) des seaux Prometheus, +Inf en plus
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Histogrammes: 2^SUB_BITS seaux linéaires par puissance de deux
+SUB_BITS = 6
+SUB_COUNT = 1 << SUB_BITS
+HALF_COUNT = SUB_COUNT >> 1
+MAX_SHIFT = 40  # ~12 jours en microsecondes
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Counter:
+    """Compteur croissant"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, help: str = '', labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.value = 0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: int = 1):
+        self._lock.acquire()
+        self.value += amount
+        self._lock.release()
+    
+    def snapshot(self) -> Dict:
+        return {'valeur': self.value}
+
+
+class Gauge:
+    """Valeur instantanée"""
+    
+    kind = 'gauge'
+    
+    def __init__(self, name: str, help: str = '', labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.value = 0.0
+        self._lock = threading.Lock()
+    
+    def set(self, value: float):
+        self.value = value
+    
+    def inc(self, amount: float = 1):
+        self._lock.acquire()
+        self.value += amount
+        self._lock.release()
+    
+    def dec(self, amount: float = 1):
+        self._lock.acquire()
+        self.value -= amount
+        self._lock.release()
+    
+    def snapshot(self) -> Dict:
+        return {'valeur': self.value}
+
+
+class Histogram:
+    """Distribution de durées en seaux log-linéaires (à la manière d'HdrHistogram).
+    
+    Les valeurs sont enregistrées en secondes et stockées en microsecondes
+    entières. Sous SUB_COUNT µs chaque microseconde a son seau; au-delà,
+    chaque puissance de deux est découpée en HALF_COUNT seaux de même largeur.
+    """
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, help: str = '', labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.total = 0.0
+        self._counts = [0] * (MAX_SHIFT * HALF_COUNT + SUB_COUNT)
+        self._last = len(self._counts) - 1
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        """Enregistre une durée en secondes (chemin critique: ni allocation ni appel superflu)"""
+        value = int(seconds * 1e6)
+        shift = value.bit_length() - SUB_BITS
+        if shift <= 0:
+            index = value if value > 0 else 0
+        elif shift < MAX_SHIFT:
+            index = (shift << (SUB_BITS - 1)) + (value >> shift)
+        else:
+            index = self._last
+        # acquire/release plutôt que with: moins coûteux, et rien ne peut lever ici
+        self._lock.acquire()
+        self._counts[index] += 1
+        self.total += seconds
+        self._lock.release()
+    
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+    
+    def time(self):
+        """Contexte qui enregistre la durée du bloc"""
+        return _Timer(self)
+    
+    def quantiles(self, quantiles=QUANTILES) -> Dict[float, float]:
+        """Quantiles en secondes (borne haute du seau)"""
+        with self._lock:
+            counts = list(self._counts)
+        count = sum(counts)
+        result = {}
+        if not count:
+            return {q: 0.0 for q in quantiles}
+        targets = sorted(quantiles)
+        seen = 0
+        position = 0
+        for index, bucket in enumerate(counts):
+            if not bucket:
+                continue
+            seen += bucket
+            while position < len(targets) and seen >= targets[position] * count:
+                result[targets[position]] = self._upper(index) / 1e6
+                position += 1
+            if position == len(targets):
+                break
+        return result
+    
+    def cumulative(self, bounds=BUCKETS) -> List[int]:
+        """Nombre de valeurs inférieures ou égales à chaque borne (secondes), puis le total.
+        
+        Un seau interne est compté sous une borne si sa borne haute ne la
+        dépasse pas: une valeur n'est jamais comptée sous une borne inférieure.
+        """
+        with self._lock:
+            counts = list(self._counts)
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            limit = int(bound * 1e6)
+            while index < len(counts) and self._upper(index) <= limit:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        result.append(seen + sum(counts[index:]))
+        return result
+    
+    def max(self) -> float:
+        """Borne haute du seau le plus élevé, en secondes"""
+        with self._lock:
+            for index in range(self._last, -1, -1):
+                if self._counts[index]:
+                    return self._upper(index) / 1e6
+        return 0.0
+    
+    def _upper(self, index: int) -> int:
+        """Plus grande valeur (µs) du seau index"""
+        if index < SUB_COUNT:
+            return index
+        shift = (index >> (SUB_BITS - 1)) - 1
+        return (((index - (shift << (SUB_BITS - 1))) + 1) << shift) - 1
+    
+    def snapshot(self) -> Dict:
+        quantiles = self.quantiles()
+        return {
+            'nombre': self.count,
+            'somme_s': self.total,
+            'max_s': self.max(),
+            'quantiles_s': {str(q): value for q, value in quantiles.items()}
+        }
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+    
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Registre des métriques: une instance par (nom, étiquettes)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[Tuple[str, tuple], object] = {}
+    
+    def counter(self, name: str, help: str = '', **labels) -> Counter:
+        return self._get(Counter, name, help, labels)
+    
+    def gauge(self, name: str, help: str = '', **labels) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+    
+    def histogram(self, name: str, help: str = '', **labels) -> Histogram:
+        return self._get(Histogram, name, help, labels)
+    
+    def _get(self, cls, name: str, help: str, labels: Dict):
+        key = (name, _label_key(labels))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = cls(name, help, labels)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrique {name} déjà déclarée comme {metric.kind}")
+            return metric
+    
+    def metrics(self) -> List:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda m: (m.name, _label_key(m.labels)))
+    
+    def snapshot(self) -> Dict:
+        """Instantané JSON: {nom: [{étiquettes, valeurs}, ...]}"""
+        result: Dict[str, List[Dict]] = {}
+        for metric in self.metrics():
+            result.setdefault(metric.name, []).append(dict(metric.snapshot(), type=metric.kind,
+                                                           etiquettes=metric.labels))
+        return {'horodatage': time.time(), 'metriques': result}
+    
+    def prometheus_text(self) -> str:
+        """Instantané au format d'exposition texte Prometheus"""
+        lines = []
+        declared = set()
+        for metric in self.metrics():
+            name = f"pointage_{metric.name}"
+            if name not in declared:
+                declared.add(name)
+                if metric.help:
+                    lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+            if metric.kind == 'histogram':
+                # Un seul relevé des seaux: _count égale toujours le seau +Inf
+                cumulative = metric.cumulative()
+                for bound, count in zip(BUCKETS + (float('inf'),), cumulative):
+                    le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(metric.labels, le=le)} {count}")
+                lines.append(f"{name}_sum{_format_labels(metric.labels)} {metric.total:.6g}")
+                lines.append(f"{name}_count{_format_labels(metric.labels)} {cumulative[-1]}")
+            else:
+                lines.append(f"{name}{_format_labels(metric.labels)} {metric.value:.6g}")
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Dict[str, str], **extra) -> str:
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, help: str = '', **labels) -> Counter:
+    return REGISTRY.counter(name, help, **labels)
+
+
+def gauge(name: str, help: str = '', **labels) -> Gauge:
+    return REGISTRY.gauge(name, help, **labels)
+
+
+def histogram(name: str, help: str = '', **labels) -> Histogram:
+    return REGISTRY.histogram(name, help, **labels)
+
+
+def timed(name: str, help: str = '', **labels):
+    """Décorateur: durée de chaque appel dans histogram(name, **labels),
+    exceptions comptées dans counter(name + '_erreurs')"""
+    def decorator(func):
+        latency = histogram(name, help, **labels)
+        errors = counter(f"{name}_erreurs", f"Exceptions levées ({help})" if help else '', **labels)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.record(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def write_snapshot(path: str, registry: MetricsRegistry = REGISTRY):
+    """Écrit l'instantané (JSON si path finit par .json, texte Prometheus sinon)"""
+    if path.endswith('.json'):
+        content = json.dumps(registry.snapshot(), ensure_ascii=False, indent=2)
+    else:
+        content = registry.prometheus_text()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Remplacement atomique: un lecteur ne voit jamais de fichier partiel
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+    
+    def do_GET(self):
+        if self.path in ('/', '/metrics'):
+            body = self.registry.prometheus_text().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif self.path == '/metrics.json':
+            body = json.dumps(self.registry.snapshot(), ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """Publie les métriques sur un port local et/ou dans un fichier périodique"""
+    
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = '127.0.0.1',
+                 port: Optional[int] = None, path: Optional[str] = None, interval: float = 15.0):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+    
+    def start(self):
+        if self.port is not None:
+            handler = type('MetricsHandler', (_MetricsHandler,), {'registry': self.registry})
+            try:
+                self._server = ThreadingHTTPServer((self.host, self.port), handler)
+            except OSError as e:
+                logger.warning(f"Export des métriques indisponible sur {self.host}:{self.port}: {e}")
+            else:
+                self.port = self._server.server_address[1]
+                self._start_thread(self._server.serve_forever, 'metrics-http')
+                logger.info(f"Métriques publiées sur http://{self.host}:{self.port}/metrics")
+        if self.path:
+            self._start_thread(self._run_file, 'metrics-file')
+    
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        if self.path:
+            self._write()
+    
+    def _start_thread(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+    
+    def _run_file(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+    
+    def _write(self):
+        try:
+            write_snapshot(self.path, self.registry)
+        except OSError:
+            logger.exception(f"Erreur lors de l'écriture des métriques dans {self.path}")
@@ -0,0 +1,262 @@
+# =============================================================================
+# FICHIER: profiler.py - Profilage à la demande de l'application
+# =============================================================================
+
+"""
+Profilage optionnel de la boucle Tk et des threads de travail.
+
+Deux modes:
+- 'echantillonnage': un thread relève la pile de tous les threads
+  (sys._current_frames) toutes les sample_ms millisecondes. Écrit les piles
+  repliées (format flamegraph.pl / speedscope, une ligne
+  « thread;appelant;...;fonction nombre ») et une table par fonction
+  (échantillons propres et cumulés).
+- 'cprofile': un cProfile.Profile par thread (thread principal et threads
+  démarrés après start()). Écrit la table pstats et le fichier .prof
+  (snakeviz, pstats); pas de piles repliées, cProfile ne garde que les
+  paires appelant/appelé. À partir de Python 3.12, cProfile repose sur
+  sys.monitoring et n'admet qu'un profileur actif par processus: un second
+  enable() lève ValueError dans le thread qui démarre. Le mode cprofile y est
+  remplacé par l'échantillonnage, qui couvre aussi tous les threads.
+
+Les fichiers de la session (profil_AAAAMMJJ_HHMMSS.*) sont réécrits toutes les
+dump_interval secondes avec les valeurs cumulées depuis le démarrage. Profiler
+désactivé, rien n'est installé: aucun coût.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+MODES = ('echantillonnage', 'cprofile')
+
+# Un cProfile.Profile par thread n'est possible qu'avant sys.monitoring (3.12)
+PER_THREAD_CPROFILE = sys.version_info < (3, 12)
+
+# Nombre de fonctions dans les tables
+TOP_FUNCTIONS = 60
+
+
+def _thread_label(thread: threading.Thread) -> str:
+    # « Thread-12 (capture_thread) » -> « capture_thread »: un thread par scan
+    # ne doit pas produire une pile distincte par thread
+    return re.sub(r'^Thread-\d+ \((.+)\)$', r'\1', thread.name)
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _write_atomic(path: str, content: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class _ProfileSnapshot:
+    """Statistiques déjà relevées d'un cProfile.Profile, pour pstats.Stats.
+    
+    pstats.Stats(profile) appelle profile.create_stats(), qui désactive le
+    profileur du thread appelant; snapshot_stats() lit seulement les compteurs.
+    """
+    
+    def __init__(self, profile: cProfile.Profile):
+        self.stats = profile.stats
+    
+    def create_stats(self):
+        pass
+
+
+def _profile_stats(profile: cProfile.Profile) -> Optional[pstats.Stats]:
+    """Statistiques d'un profileur actif, None s'il n'a encore rien mesuré"""
+    profile.snapshot_stats()
+    if not profile.stats:
+        return None
+    return pstats.Stats(_ProfileSnapshot(profile))
+
+
+class Profiler:
+    """Profileur de l'application (voir le docstring du module)"""
+    
+    def __init__(self, mode: str, log_dir: str = "logs", sample_ms: float = 10.0,
+                 dump_interval: float = 60.0):
+        if mode not in MODES:
+            raise ValueError(f"Mode de profilage inconnu: {mode} (attendu: {', '.join(MODES)})")
+        if mode == 'cprofile' and not PER_THREAD_CPROFILE:
+            logger.warning("cProfile par thread indisponible à partir de Python 3.12 "
+                           "(un seul profileur par processus): profilage par échantillonnage")
+            mode = 'echantillonnage'
+        self.mode = mode
+        self.log_dir = log_dir
+        self.sample_interval = sample_ms / 1000
+        self.dump_interval = dump_interval
+        self.samples = 0
+        self._prefix = os.path.join(log_dir, f"profil_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Échantillonnage: (nom du thread, pile de code objects, feuille en tête) -> nombre
+        self._stacks: Counter = Counter()
+        # cProfile: un profileur par thread vivant, les threads terminés sont cumulés
+        self._profiles: List[Tuple[threading.Thread, cProfile.Profile]] = []
+        self._finished: Optional[pstats.Stats] = None
+        self._finished_names = set()
+    
+    def start(self):
+        """Démarre le profilage (à appeler avant de créer les threads de travail)"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        if self.mode == 'cprofile':
+            # Les threads démarrés ensuite installent leur profileur au premier événement
+            threading.setprofile(self._thread_profile_hook)
+            self._enable_profile()
+        logger.info(f"Profilage '{self.mode}' actif, résultats dans {self._prefix}.*")
+    
+    def stop(self):
+        """Arrête le profilage et écrit les résultats finaux"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.mode == 'cprofile':
+            threading.setprofile(None)
+            current = threading.current_thread()
+            for thread, profile in self._profiles:
+                if thread is current:
+                    profile.disable()
+        self.dump()
+    
+    def dump(self):
+        """Écrit les résultats cumulés depuis le démarrage"""
+        try:
+            if self.mode == 'echantillonnage':
+                self._dump_samples()
+            else:
+                self._dump_profiles()
+        except Exception:
+            logger.exception("Erreur lors de l'écriture du profil")
+    
+    def _run(self):
+        next_dump = time.monotonic() + self.dump_interval
+        while True:
+            if self.mode == 'echantillonnage':
+                stopped = self._stop.wait(self.sample_interval)
+                if not stopped:
+                    self._sample()
+            else:
+                stopped = self._stop.wait(max(next_dump - time.monotonic(), 0))
+            if stopped:
+                return
+            if time.monotonic() >= next_dump:
+                self.dump()
+                next_dump = time.monotonic() + self.dump_interval
+    
+    # ----- Échantillonnage -----
+    
+    def _sample(self):
+        own_ident = threading.get_ident()
+        names = {thread.ident: _thread_label(thread) for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        stacks = []
+        for ident, frame in frames.items():
+            if ident == own_ident:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            stacks.append((names.get(ident, str(ident)), tuple(codes)))
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+    
+    def _dump_samples(self):
+        with self._lock:
+            stacks = list(self._stacks.items())
+            samples = self.samples
+        
+        labels: Dict[object, str] = {}
+        collapsed = []
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        for (thread_name, codes), count in stacks:
+            for code in codes:
+                if code not in labels:
+                    labels[code] = _label(code)
+            own[codes[0]] += count
+            for code in set(codes):
+                cumulative[code] += count
+            frames = ';'.join(labels[code] for code in reversed(codes))
+            collapsed.append(f"{thread_name};{frames} {count}")
+        collapsed.sort()
+        _write_atomic(f"{self._prefix}.collapsed", '\n'.join(collapsed) + '\n')
+        
+        lines = [f"Profil par échantillonnage: {samples} relevés toutes les "
+                 f"{self.sample_interval * 1000:g} ms (tous threads confondus)",
+                 "",
+                 f"{'propres':>9} {'cumulés':>9}  fonction"]
+        for code, count in own.most_common(TOP_FUNCTIONS):
+            lines.append(f"{count:>9} {cumulative[code]:>9}  {labels[code]}")
+        _write_atomic(f"{self._prefix}.txt", '\n'.join(lines) + '\n')
+    
+    # ----- cProfile -----
+    
+    def _enable_profile(self):
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append((threading.current_thread(), profile))
+        profile.enable()
+    
+    def _thread_profile_hook(self, frame, event, arg):
+        # Premier événement d'un nouveau thread: remplacé par son cProfile
+        sys.setprofile(None)
+        self._enable_profile()
+    
+    def _dump_profiles(self):
+        with self._lock:
+            finished = [(t, p) for t, p in self._profiles if not t.is_alive()]
+            self._profiles = [(t, p) for t, p in self._profiles if t.is_alive()]
+            profiles = list(self._profiles)
+        for thread, profile in finished:
+            thread_stats = _profile_stats(profile)
+            if thread_stats is None:
+                continue
+            if self._finished is None:
+                self._finished = thread_stats
+            else:
+                self._finished.add(thread_stats)
+            self._finished_names.add(_thread_label(thread))
+        
+        stats = pstats.Stats()
+        if self._finished is not None:
+            stats.add(self._finished)
+        for _, profile in profiles:
+            thread_stats = _profile_stats(profile)
+            if thread_stats is not None:
+                stats.add(thread_stats)
+        if not stats.stats:
+            return
+        names = sorted({_thread_label(t) for t, _ in profiles} | self._finished_names)
+        stats.dump_stats(f"{self._prefix}.prof.tmp")
+        os.replace(f"{self._prefix}.prof.tmp", f"{self._prefix}.prof")
+        
+        out = io.StringIO()
+        out.write(f"Profil cProfile des threads: {', '.join(names)}\n\n")
+        stats.stream = out
+        stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        stats.sort_stats('tottime').print_stats(TOP_FUNCTIONS)
+        _write_atomic(f"{self._prefix}.txt", out.getvalue())
@@ -0,0 +1,139 @@
+# =============================================================================
+# FICHIER: report_jobs.py - Génération des rapports en arrière-plan
+# =============================================================================
+
+import itertools
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ReportJob:
+    """Rapport en file: état, progression et demande d'annulation"""
+    
+    EN_ATTENTE = 'en_attente'
+    EN_COURS = 'en_cours'
+    TERMINE = 'termine'
+    ANNULE = 'annule'
+    ERREUR = 'erreur'
+    
+    def __init__(self, job_id: int, description: str, filepath: Optional[str] = None):
+        self.id = job_id
+        self.description = description
+        self.filepath = filepath
+        self.status = self.EN_ATTENTE
+        self.rows_written = 0
+        self.error: Optional[Exception] = None
+        self._cancel = threading.Event()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.TERMINE, self.ANNULE, self.ERREUR)
+    
+    def cancel(self):
+        """Demande l'annulation (prise en compte à la prochaine progression)"""
+        self._cancel.set()
+    
+    def progress(self, rows_written: int) -> bool:
+        """Callback de progression de ExcelGenerator: False pour interrompre"""
+        self.rows_written = rows_written
+        return not self._cancel.is_set()
+
+
+class ReportJobQueue:
+    """File de rapports exécutés dans un executor dédié.
+    
+    Les changements d'état sont publiés dans un canal unique (poll), à lire
+    depuis le thread Tk. Un seul worker par défaut: les rapports passent les
+    uns après les autres sans concurrencer le pointage.
+    """
+    
+    def __init__(self, workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rapport')
+        self._events: queue.Queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, ReportJob] = {}
+    
+    def submit(self, description: str, func: Callable[..., bool], *args,
+               filepath: Optional[str] = None) -> ReportJob:
+        """Met un rapport en file; func(job, *args) retourne True en cas de succès"""
+        job = ReportJob(next(self._ids), description, filepath)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func, args)
+        self._events.put(job)
+        return job
+    
+    def poll(self) -> List[ReportJob]:
+        """Rapports dont l'état a changé depuis le dernier appel"""
+        changed = []
+        while True:
+            try:
+                job = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if job not in changed:
+                changed.append(job)
+        with self._lock:
+            for job in changed:
+                if job.finished:
+                    self._jobs.pop(job.id, None)
+        return changed
+    
+    def active(self) -> List[ReportJob]:
+        """Rapports en attente ou en cours"""
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.finished]
+    
+    def cancel_all(self):
+        for job in self.active():
+            job.cancel()
+    
+    def shutdown(self):
+        """Annule les rapports restants et arrête l'executor"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+    
+    def _run(self, job: ReportJob, func: Callable[..., bool], args: tuple):
+        if job.cancelled:
+            job.status = ReportJob.ANNULE
+            self._events.put(job)
+            return
+        
+        job.status = ReportJob.EN_COURS
+        self._events.put(job)
+        # Un fichier existant (rapport remplacé) n'est jamais supprimé
+        existed = bool(job.filepath) and os.path.exists(job.filepath)
+        try:
+            ok = func(job, *args)
+        except Exception as e:
+            logger.exception(f"Erreur du rapport {job.description}")
+            job.error = e
+            ok = False
+        
+        if ok:
+            # Annulation demandée trop tard: le rapport est complet
+            job.status = ReportJob.TERMINE
+        elif job.cancelled:
+            job.status = ReportJob.ANNULE
+            # Fichier incomplet d'un générateur qui n'écrit pas dans un temporaire
+            # (les générateurs en flux suppriment eux-mêmes leur .tmp)
+            if job.filepath and not existed and os.path.exists(job.filepath):
+                try:
+                    os.remove(job.filepath)
+                except OSError:
+                    pass
+        else:
+            job.status = ReportJob.ERREUR
+        self._events.put(job)
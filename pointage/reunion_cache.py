@@ -0,0 +1,75 @@
+# =============================================================================
+# FICHIER: reunion_cache.py - Cache mémoire des réunions actives
+# =============================================================================
+
+import threading
+from typing import Dict, List, Optional
+
+from database import DatabaseManager
+
+
+class ReunionCache:
+    """Cache des réunions ouvertes au pointage au-dessus de DatabaseManager"""
+    
+    # Statuts des réunions ouvertes au pointage
+    STATUTS_ACTIFS = ('planifiee', 'en_cours')
+    
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._actives: Dict[int, Dict] = {}
+        self._sorted: Optional[List[Dict]] = None
+        self.load()
+    
+    def load(self):
+        """Charge les réunions actives depuis la base"""
+        with self._lock:
+            self._actives = {r['id_reunion']: r for r in self.db.get_reunions(statut=self.STATUTS_ACTIFS)}
+            self._sorted = None
+    
+    def stats(self) -> Dict:
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._actives)}
+    
+    def actives(self) -> List[Dict]:
+        """Réunions actives, des plus récentes aux plus anciennes"""
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(self._actives.values(), key=lambda r: r['date'], reverse=True)
+            return list(self._sorted)
+    
+    def get(self, id_reunion: int) -> Optional[Dict]:
+        """Retourne une réunion (depuis le cache si elle est active)"""
+        with self._lock:
+            reunion = self._actives.get(id_reunion)
+            if reunion is not None:
+                self.hits += 1
+                return reunion
+            self.misses += 1
+        return self.db.get_reunion(id_reunion)
+    
+    def create_reunion(self, reunion_data: Dict) -> int:
+        """Crée une réunion en base puis l'ajoute au cache"""
+        id_reunion = self.db.create_reunion(reunion_data)
+        if id_reunion:
+            self.refresh(id_reunion)
+        return id_reunion
+    
+    def update_reunion_status(self, id_reunion: int, statut: str) -> bool:
+        """Met à jour le statut en base puis le cache"""
+        if not self.db.update_reunion_status(id_reunion, statut):
+            return False
+        self.refresh(id_reunion)
+        return True
+    
+    def refresh(self, id_reunion: int):
+        """Relit une réunion en base: conservée si active, retirée sinon"""
+        reunion = self.db.get_reunion(id_reunion)
+        with self._lock:
+            self._actives.pop(id_reunion, None)
+            if reunion and reunion['statut'] in self.STATUTS_ACTIFS:
+                self._actives[id_reunion] = reunion
+            self._sorted = None
@@ -0,0 +1,149 @@
+# =============================================================================
+# FICHIER: scan_pool.py - Pool de workers d'identification
+# =============================================================================
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ScanResult:
+    """Résultat d'un scan livré à l'interface"""
+    
+    __slots__ = ('seq', 'result', 'error', 'latency')
+    
+    def __init__(self, seq: int, result: Any, error: Optional[Exception], latency: float):
+        self.seq = seq
+        self.result = result
+        self.error = error
+        self.latency = latency
+
+
+class ScanWorkerPool:
+    """Pool de taille fixe qui traite les scans depuis une file bornée.
+    
+    Les résultats sont livrés par un canal unique (poll), à appeler depuis le
+    thread Tk. Avec supersede=True, un nouveau scan annule les scans en attente
+    et seul le résultat du dernier scan est livré. Les scans restés en file plus
+    de max_age secondes sont abandonnés.
+    """
+    
+    def __init__(self, handler: Callable[[Any], Any], workers: int = 2, max_pending: int = 8,
+                 max_age: float = 5.0, supersede: bool = True):
+        self.handler = handler
+        self.max_age = max_age
+        self.supersede = supersede
+        self._tasks: queue.Queue = queue.Queue(max_pending)
+        self._results: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        # Numéros attribués, et numéro du dernier scan accepté en file (seul livré avec supersede)
+        self._next_seq = 0
+        self._seq = 0
+        self._done_times: deque = deque(maxlen=1000)
+        self._latencies: deque = deque(maxlen=1000)
+        self.counters = {'soumis': 0, 'traites': 0, 'annules': 0, 'rejetes': 0, 'erreurs': 0}
+        self._threads = [threading.Thread(target=self._run, name=f"scan-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+    
+    def submit(self, payload: Any = None, block: bool = False) -> Optional[int]:
+        """Met un scan en file et retourne son numéro (None si la file est pleine)"""
+        with self._lock:
+            self._next_seq += 1
+            seq = self._next_seq
+            self.counters['soumis'] += 1
+        
+        if self.supersede:
+            self._cancel_pending()
+        try:
+            self._tasks.put((seq, time.monotonic(), payload), block=block)
+        except queue.Full:
+            with self._lock:
+                self.counters['rejetes'] += 1
+            return None
+        # Un scan rejeté ne devient pas le dernier scan: le précédent reste livrable
+        with self._lock:
+            self._seq = max(self._seq, seq)
+        return seq
+    
+    def poll(self) -> List[ScanResult]:
+        """Récupère les résultats disponibles (à appeler depuis le thread Tk)"""
+        results = []
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            # Un résultat dépassé par un scan plus récent n'est pas affiché
+            if self.supersede and result.seq < self._seq:
+                with self._lock:
+                    self.counters['annules'] += 1
+                continue
+            results.append(result)
+        return results
+    
+    def wait(self):
+        """Attend la fin du traitement des scans en file"""
+        self._tasks.join()
+    
+    def stats(self) -> Dict:
+        """Compteurs, débit (scans/s sur les 10 dernières secondes) et latence moyenne"""
+        now = time.monotonic()
+        with self._lock:
+            recent = [t for t in self._done_times if now - t <= 10.0]
+            span = now - recent[0] if len(recent) > 1 else 0.0
+            latencies = list(self._latencies)
+            stats = dict(self.counters)
+        stats['en_attente'] = self._tasks.qsize()
+        stats['scans_par_s'] = len(recent) / span if span else 0.0
+        stats['latence_moyenne_ms'] = sum(latencies) / len(latencies) * 1000 if latencies else 0.0
+        return stats
+    
+    def stop(self):
+        """Arrête les workers après les scans en cours"""
+        self._cancel_pending()
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join(timeout=2)
+    
+    def _cancel_pending(self):
+        """Retire les scans encore en file"""
+        while True:
+            try:
+                self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            self._tasks.task_done()
+            with self._lock:
+                self.counters['annules'] += 1
+    
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            try:
+                if task is None:
+                    return
+                seq, submitted, payload = task
+                if time.monotonic() - submitted > self.max_age:
+                    with self._lock:
+                        self.counters['annules'] += 1
+                    continue
+                
+                error = None
+                try:
+                    result = self.handler(payload)
+                except Exception as e:
+                    result, error = None, e
+                
+                now = time.monotonic()
+                with self._lock:
+                    self.counters['erreurs' if error else 'traites'] += 1
+                    self._done_times.append(now)
+                    self._latencies.append(now - submitted)
+                self._results.put(ScanResult(seq, result, error, now - submitted))
+            finally:
+                self._tasks.task_done()
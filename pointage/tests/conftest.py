@@ -0,0 +1,40 @@
+# =============================================================================
+# FICHIER: tests/conftest.py - Configuration commune des tests
+# =============================================================================
+
+import os
+import sys
+
+import pytest
+
+# Les modules de l'application sont à plat dans le dossier parent
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+
+def membre_data(i: int, service: str = 'RH', **extra) -> dict:
+    """Données d'un membre de test"""
+    data = {
+        'titre': 'M.',
+        'nom': f'NOM{i}',
+        'prenom': f'Prenom{i}',
+        'service': service,
+        'email': f'membre{i}@exemple.org',
+        'telephone': '',
+        'empreinte_hash': f'hash{i}'
+    }
+    data.update(extra)
+    return data
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / 'pointage.db'))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def reunion(db):
+    return db.create_reunion({'titre': 'Réunion', 'lieu': 'Salle A', 'date': '2025-03-10 09:00'})
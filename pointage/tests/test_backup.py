@@ -0,0 +1,125 @@
+# =============================================================================
+# FICHIER: tests/test_backup.py - Sauvegardes et restauration
+# =============================================================================
+
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from backup_manager import BackupManager
+from conftest import membre_data
+
+
+def membres(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(row[0] for row in conn.execute('SELECT nom FROM Membre'))
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def manager(db, tmp_path):
+    return BackupManager(db.db_path, str(tmp_path / 'sauvegardes'), step_sleep=0)
+
+
+@pytest.mark.parametrize('kind', ['complete', 'differentielle', 'blocs'])
+def test_backup_rebuild_roundtrip(db, manager, tmp_path, kind):
+    for i in range(50):
+        db.add_membre(membre_data(i))
+    base = manager.create_backup()
+    for i in range(50, 60):
+        db.add_membre(membre_data(i))
+    
+    if kind == 'complete':
+        path = manager.create_backup()
+        rebuilt = path
+    elif kind == 'differentielle':
+        path = manager.create_incremental_backup()
+        assert path.endswith('.delta')
+        rebuilt = manager.rebuild_backup(path, str(tmp_path / 'rebuilt.db'))
+    else:
+        path = manager.create_chunked_backup()
+        rebuilt = manager.rebuild_chunked_backup(path, str(tmp_path / 'rebuilt.db'))
+    
+    assert base and path
+    assert membres(rebuilt) == membres(db.db_path)
+    assert len(membres(rebuilt)) == 60
+
+
+def test_restore_takes_database_offline(db, manager, reunion):
+    ids = [db.add_membre(membre_data(i)) for i in range(5)]
+    backup = manager.create_chunked_backup()
+    
+    db.add_membre(membre_data(99))
+    db.enable_write_behind(interval_ms=50, max_rows=1000)
+    assert db.add_participation(reunion, ids[0])
+    
+    assert manager.restore_backup(backup, db)
+    assert 'NOM99' not in membres(db.db_path)
+    # L'écriture différée est relancée et les connexions rouvertes
+    assert db.writer is not None
+    assert db.add_participation(reunion, ids[1])
+    db.flush()
+    assert db.count_participants(reunion) == 1
+    
+    # La sauvegarde de sécurité contient le pointage qui était en attente
+    safety = manager.last_stats['path']
+    rebuilt = manager.rebuild_chunked_backup(safety, os.path.join(manager.backup_dir, 'securite.db'))
+    conn = sqlite3.connect(rebuilt)
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM Participation').fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_cleanup_skips_unreadable_delta(db, manager):
+    db.add_membre(membre_data(1))
+    manager.create_backup()
+    corrupt = os.path.join(manager.backup_dir, 'pointage_backup_20990101_000000.delta')
+    with open(corrupt, 'wb') as f:
+        f.write(b'PTDELTA1\xff\xff')
+    orphan = manager._chunk_path('00' * 32)
+    os.makedirs(os.path.dirname(orphan), exist_ok=True)
+    open(orphan, 'wb').close()
+    
+    manager.cleanup_old_backups(days_to_keep=30)
+    
+    # Le nettoyage est allé jusqu'au bout (blocs orphelins supprimés)
+    assert not os.path.exists(orphan)
+    assert os.path.exists(corrupt)
+
+
+def test_chunk_collection_waits_for_running_backup(db, manager, tmp_path):
+    for i in range(50):
+        db.add_membre(membre_data(i))
+    # Sauvegarde expirée: ses blocs ne sont plus référencés mais encore présents
+    os.remove(manager.create_chunked_backup())
+    
+    started, release = threading.Event(), threading.Event()
+    store_chunk = manager._store_chunk
+    
+    def paused_store_chunk(digest, chunk):
+        started.set()
+        assert release.wait(5)
+        return store_chunk(digest, chunk)
+    
+    manager._store_chunk = paused_store_chunk
+    result = []
+    backup = threading.Thread(target=lambda: result.append(manager.create_chunked_backup()))
+    backup.start()
+    assert started.wait(5)
+    cleanup = threading.Thread(target=manager.cleanup_old_backups)
+    cleanup.start()
+    
+    # Le nettoyage attend la fin de la sauvegarde en cours
+    cleanup.join(0.2)
+    assert cleanup.is_alive()
+    release.set()
+    backup.join(5)
+    cleanup.join(5)
+    
+    rebuilt = manager.rebuild_chunked_backup(result[0], str(tmp_path / 'rebuilt.db'))
+    assert len(membres(rebuilt)) == 50
@@ -0,0 +1,130 @@
+# =============================================================================
+# FICHIER: tests/test_checkin_server.py - Service de pointage multi-postes
+# =============================================================================
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from checkin_server import CheckinClient, CheckinServer, simulate
+from config import Config
+from conftest import membre_data
+from fingerprint_manager import FingerprintManager
+
+
+def run_server(db, scenario, **options):
+    """Démarre le service sur un port libre, exécute scenario(server, client) puis l'arrête"""
+    async def main():
+        server = CheckinServer(db, port=0, reload_interval=0, **options)
+        await server.start()
+        client = CheckinClient(server.host, server.port)
+        try:
+            return await scenario(server, client)
+        finally:
+            await client.close()
+            await server.stop()
+    return asyncio.run(main())
+
+
+def test_pointage_then_duplicate(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1))
+    
+    async def scenario(server, client):
+        payload = {'id_reunion': reunion, 'id_empreinte': id_empreinte}
+        return [await client.request('POST', '/pointage', payload) for _ in range(2)]
+    
+    (status1, first), (status2, second) = run_server(db, scenario)
+    assert (status1, first['statut']) == (200, 'enregistre')
+    assert (status2, second['statut']) == (200, 'deja_pointe')
+    assert db.count_participants(reunion) == 1
+
+
+def test_pointage_requires_open_reunion(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1))
+    
+    async def scenario(server, client):
+        missing = await client.request('POST', '/pointage', {'id_reunion': reunion + 1, 'id_empreinte': id_empreinte})
+        db.update_reunion_status(reunion, 'terminee')
+        closed = await client.request('POST', '/pointage', {'id_reunion': reunion, 'id_empreinte': id_empreinte})
+        return missing[0], closed[0]
+    
+    assert run_server(db, scenario) == (404, 409)
+    assert db.count_participants(reunion) == 0
+
+
+def test_oversized_body_rejected(db):
+    async def scenario(server, client):
+        return await client.request('POST', '/identification', {'gabarit': 'A' * 2048})
+    
+    status, response = run_server(db, scenario, max_body=1024)
+    assert status == 413
+    assert '1024' in response['erreur']
+
+
+def test_reload_picks_up_new_enrollments(db, monkeypatch):
+    monkeypatch.setattr(Config, 'IDENTIFICATION_ENABLED', True)
+    fm = FingerprintManager()
+    features = np.random.default_rng(3).standard_normal(FingerprintManager.FEATURE_DIMENSION).astype(np.float32)
+    template = fm.encode_template(features)
+    
+    async def scenario(server, client):
+        assert not await server.reload(force=False)
+        # Enrôlement depuis un autre poste
+        db.add_membre(membre_data(1, gabarit_format=FingerprintManager.TEMPLATE_FORMAT, gabarit_data=template))
+        assert await server.reload(force=False)
+        
+        probe = fm.encode_template(features + np.float32(0.01))
+        return len(server.engine), await client.identifier(probe)
+    
+    size, (status, response) = run_server(db, scenario)
+    assert size == 1
+    assert status == 200 and response['membre']['nom'] == 'NOM1'
+
+
+def test_reload_incremental_then_rebuild_on_deactivation(db, monkeypatch):
+    monkeypatch.setattr(Config, 'IDENTIFICATION_ENABLED', True)
+    fm = FingerprintManager()
+    vectors = np.random.default_rng(5).standard_normal((3, FingerprintManager.FEATURE_DIMENSION)).astype(np.float32)
+    
+    def enroll(i):
+        return db.add_membre(membre_data(i, gabarit_format=FingerprintManager.TEMPLATE_FORMAT,
+                                         gabarit_data=fm.encode_template(vectors[i])))
+    
+    enroll(0)
+    
+    async def scenario(server, client):
+        engine = server.engine
+        enroll(1)
+        id_empreinte = enroll(2)
+        assert await server.reload(force=False)
+        # Nouveaux gabarits ajoutés à l'index en place
+        incremental = server.engine is engine and len(engine) == 3
+        
+        with db.pool.connection() as conn:
+            conn.execute("UPDATE Membre SET actif = 0 WHERE id_empreinte = ?", (id_empreinte,))
+        assert await server.reload(force=False)
+        status, response = await client.identifier(fm.encode_template(vectors[2]))
+        return incremental, server.engine is engine, len(server.engine), status
+    
+    incremental, same_engine, size, status = run_server(db, scenario)
+    assert incremental
+    # Gabarit disparu: index reconstruit
+    assert not same_engine and size == 2
+    assert status == 404
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+def test_simulate_records_participants(db, monkeypatch, enabled):
+    monkeypatch.setattr(Config, 'IDENTIFICATION_ENABLED', enabled)
+    fm = FingerprintManager()
+    for i in range(5):
+        template, fingerprint_hash = fm.capture_template(enroll=True)
+        db.add_membre(membre_data(i, empreinte_hash=fingerprint_hash,
+                                  gabarit_format=FingerprintManager.TEMPLATE_FORMAT, gabarit_data=template))
+    
+    bilan = asyncio.run(simulate(db, clients=2, scans=10))
+    
+    assert bilan['scans'] == 20
+    assert bilan['participants'] > 0
+    assert 'http_404' not in bilan['statuts']
@@ -0,0 +1,181 @@
+# =============================================================================
+# FICHIER: tests/test_database.py - Pool de connexions, écriture différée et parcours par blocs
+# =============================================================================
+
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from conftest import membre_data
+from database import DatabaseManager, ParticipationWriter
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_pool_reuses_connection_per_thread(db):
+    conn = db.pool.get_connection()
+    assert db.pool.get_connection() is conn
+    
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.pool.get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+
+def test_add_participations_ignores_duplicates(db, reunion):
+    ids = [db.add_membre(membre_data(i)) for i in range(3)]
+    assert db.add_participation(reunion, ids[0])
+    
+    # Doublons dans le lot et avec un pointage déjà en base
+    batch = [(reunion, ids[0]), (reunion, ids[1]), (reunion, ids[2]), (reunion, ids[1]), (reunion, ids[2])]
+    assert db.add_participations(batch) == 2
+    assert db.count_participants(reunion) == 3
+    assert sorted(p['nom'] for p in db.get_participants(reunion)) == ['NOM0', 'NOM1', 'NOM2']
+    assert db.add_participations(batch) == 0
+
+
+def test_write_behind_rejects_duplicates(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1))
+    db.enable_write_behind(interval_ms=50)
+    
+    assert db.add_participation(reunion, id_empreinte)
+    assert not db.add_participation(reunion, id_empreinte)  # En attente d'écriture
+    db.flush()
+    assert not db.add_participation(reunion, id_empreinte)  # Déjà écrit
+    assert db.count_participants(reunion) == 1
+
+
+def test_write_behind_concurrent_scans_accept_once(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1))
+    db.enable_write_behind(interval_ms=1, max_rows=1)
+    
+    results = []
+    barrier = threading.Barrier(8)
+    
+    def scan():
+        barrier.wait()
+        for _ in range(20):
+            results.append(db.add_participation(reunion, id_empreinte))
+    
+    threads = [threading.Thread(target=scan) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.flush()
+    
+    assert results.count(True) == 1
+    assert db.count_participants(reunion) == 1
+
+
+def test_write_behind_retries_failed_batch(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1))
+    db.pool.timeout = 0.05
+    db.writer = ParticipationWriter(db.pool, interval_ms=10, retry_delay=0.02, retry_max_delay=0.1)
+    
+    # Verrou d'écriture tenu par une autre connexion: le lot échoue
+    blocker = sqlite3.connect(db.db_path)
+    blocker.execute('BEGIN EXCLUSIVE')
+    try:
+        assert db.add_participation(reunion, id_empreinte)
+        assert wait_until(lambda: db.writer.failed_rows == 1)
+        assert db.writer.is_pending(reunion, id_empreinte)
+    finally:
+        blocker.rollback()
+        blocker.close()
+    
+    assert wait_until(lambda: db.writer.failed_rows == 0)
+    assert wait_until(lambda: not db.writer.is_pending(reunion, id_empreinte))
+    assert db.count_participants(reunion) == 1
+
+
+def test_rows_failed_at_stop_replayed_on_open(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1))
+    db.pool.timeout = 0.05
+    db.writer = ParticipationWriter(db.pool, interval_ms=10, retry_delay=0.02, retry_max_delay=0.1,
+                                    replay_path=db.replay_path)
+    
+    # Base verrouillée jusqu'à l'arrêt: le lot est enregistré pour rejeu
+    blocker = sqlite3.connect(db.db_path)
+    blocker.execute('BEGIN EXCLUSIVE')
+    try:
+        assert db.add_participation(reunion, id_empreinte)
+        assert wait_until(lambda: db.writer.failed_rows == 1)
+        db.close()
+    finally:
+        blocker.rollback()
+        blocker.close()
+    
+    assert os.path.exists(db.replay_path)
+    assert db.count_participants(reunion) == 0
+    
+    reopened = DatabaseManager(db.db_path)
+    try:
+        assert reopened.count_participants(reunion) == 1
+        assert not os.path.exists(reopened.replay_path)
+    finally:
+        reopened.close()
+
+
+def test_flush_does_not_wait_for_interval(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1))
+    db.enable_write_behind(interval_ms=10000, max_rows=1000)
+    assert db.add_participation(reunion, id_empreinte)
+    
+    start = time.monotonic()
+    db.flush()
+    assert time.monotonic() - start < 2
+    assert db.count_participants(reunion) == 1
+
+
+def test_write_behind_flushes_on_close(tmp_path):
+    from database import DatabaseManager
+    path = str(tmp_path / 'pointage.db')
+    db = DatabaseManager(path)
+    reunion = db.create_reunion({'titre': 'R', 'lieu': 'L', 'date': '2025-03-10 09:00'})
+    ids = [db.add_membre(membre_data(i)) for i in range(20)]
+    db.enable_write_behind(interval_ms=10000, max_rows=1000)
+    for id_empreinte in ids:
+        assert db.add_participation(reunion, id_empreinte)
+    db.close()
+    
+    db = DatabaseManager(path)
+    try:
+        assert db.count_participants(reunion) == 20
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 500])
+def test_iterators_match_lists_across_chunks(db, chunk_size):
+    # 6 membres, réunions et pointages: blocs pleins, bloc partiel et bloc unique
+    ids = [db.add_membre(membre_data(i)) for i in range(6)]
+    reunions = [db.create_reunion({'titre': f'R{i}', 'lieu': 'Salle', 'date': f'2025-03-1{i} 09:00'}) for i in range(6)]
+    db.add_participations([(reunions[0], id_empreinte) for id_empreinte in ids])
+    
+    assert list(db.iter_membres(chunk_size=chunk_size)) == db.get_all_membres()
+    assert list(db.iter_reunions(chunk_size=chunk_size)) == db.get_reunions()
+    assert list(db.iter_participants(reunions[0], chunk_size=chunk_size)) == db.get_participants(reunions[0])
+    assert len(db.get_all_membres()) == len(db.get_reunions()) == len(db.get_participants(reunions[0])) == 6
+    
+    # Lignes brutes: mêmes valeurs que les dictionnaires
+    assert [dict(row) for row in db.iter_membres(chunk_size=chunk_size, rows=True)] == db.get_all_membres()
+    # Pagination: les pages recollées redonnent la liste complète
+    pages = [list(db.iter_participants(reunions[0], chunk_size=chunk_size, limit=4, offset=offset))
+             for offset in (0, 4)]
+    assert pages[0] + pages[1] == db.get_participants(reunions[0])
+    
+    # Deux parcours entrelacés ne partagent pas de curseur
+    first, second = db.iter_membres(chunk_size=chunk_size), db.iter_membres(chunk_size=chunk_size)
+    assert [(a['nom'], b['nom']) for a, b in zip(first, second)] == [(m['nom'], m['nom']) for m in db.get_all_membres()]
@@ -0,0 +1,80 @@
+# =============================================================================
+# FICHIER: tests/test_excel_generator.py - Rapports Excel
+# =============================================================================
+
+import os
+
+from openpyxl import load_workbook
+
+import excel_generator
+from excel_generator import ExcelGenerator
+
+
+def participants(count: int, id_reunion: int = 1):
+    return [{'id_empreinte': f'{id_reunion}-{i}', 'titre': 'M.', 'nom': f'NOM{i}', 'prenom': f'Prenom{i}',
+             'service': 'RH', 'email': f'membre{i}@exemple.org', 'heure_pointage': '2025-03-10 09:00:00'}
+            for i in range(count)]
+
+
+def reunion(id_reunion: int) -> dict:
+    return {'id_reunion': id_reunion, 'titre': f'Réunion {id_reunion}', 'lieu': 'Salle A',
+            'date': f'2025-03-{10 + id_reunion} 09:00'}
+
+
+def test_streaming_report_written_atomically(tmp_path):
+    filepath = str(tmp_path / 'rapport.xlsx')
+    
+    assert ExcelGenerator().generate_rapport_reunion_streaming(reunion(1), iter(participants(10)), filepath, 10)
+    assert load_workbook(filepath).active.max_row == 20
+    assert os.listdir(tmp_path) == ['rapport.xlsx']
+
+
+def test_streaming_report_cancelled_leaves_no_file(tmp_path):
+    filepath = str(tmp_path / 'rapport.xlsx')
+    generator = ExcelGenerator()
+    
+    ok = generator.generate_rapport_reunion_streaming(reunion(1), iter(participants(generator.PROGRESS_EVERY * 2)),
+                                                      filepath, progress=lambda rows: False)
+    assert not ok
+    assert os.listdir(tmp_path) == []
+
+
+def test_period_reports(tmp_path):
+    reunions = [reunion(1), reunion(2)]
+    participations = {1: participants(3, 1), 2: participants(5, 2), 99: participants(4, 99)}
+    rows = []
+    
+    files = ExcelGenerator().generate_rapports_periode(reunions, participations, str(tmp_path), '2025-03-01',
+                                                       '2025-03-31', workers=2,
+                                                       progress=lambda n: rows.append(n) or True)
+    assert len(files) == 3 and all(os.path.exists(f) for f in files)
+    assert rows == sorted(rows) and rows[-1] == 8  # Cumul croissant; pointages hors période non transmis
+    consolide = load_workbook(next(f for f in files if 'consolide' in f))
+    assert consolide.sheetnames[1:] == ['2025-03-11 Réunion 1', '2025-03-12 Réunion 2']
+
+
+def test_period_reports_cancelled(tmp_path):
+    reunions = [reunion(i) for i in range(1, 4)]
+    participations = {r['id_reunion']: participants(3, r['id_reunion']) for r in reunions}
+    
+    files = ExcelGenerator().generate_rapports_periode(reunions, participations, str(tmp_path), '2025-03-01',
+                                                       '2025-03-31', workers=1, progress=lambda n: False)
+    assert files == []
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.xlsx')]
+
+
+def failing_rapport_reunion(reunion_info, participants, filepath):
+    """Tâche de classeur en erreur (importée par les processus du pool)"""
+    raise RuntimeError("classeur en erreur")
+
+
+def test_period_reports_cancelled_ignores_failed_workbooks(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_generator, '_build_rapport_reunion', failing_rapport_reunion)
+    reunions = [reunion(i) for i in range(1, 4)]
+    participations = {r['id_reunion']: participants(3, r['id_reunion']) for r in reunions}
+    
+    # Annulé au premier classeur terminé: les classeurs déjà partis vers le pool échouent
+    files = ExcelGenerator().generate_rapports_periode(reunions, participations, str(tmp_path), '2025-03-01',
+                                                       '2025-03-31', workers=1, progress=lambda n: False)
+    assert files == []
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.xlsx')]
@@ -0,0 +1,181 @@
+# =============================================================================
+# FICHIER: tests/test_identification.py - Gabarits et moteur d'identification 1:N
+# =============================================================================
+
+import random
+
+import numpy as np
+import pytest
+
+from config import Config
+from fingerprint_manager import FingerprintManager
+from identification import IdentificationEngine
+
+DIMENSION = FingerprintManager.FEATURE_DIMENSION
+
+
+@pytest.fixture
+def fm():
+    random.seed(7)
+    return FingerprintManager()
+
+
+def random_vectors(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_template_roundtrip(fm):
+    features = fm.image_features(fm.simulated_image())
+    template = fm.encode_template(features)
+    
+    assert len(template) == FingerprintManager.TEMPLATE_SIZE
+    decoded = fm.decode_template(template)
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, features, atol=1e-3)
+
+
+def test_decode_rejects_wrong_size(fm):
+    with pytest.raises(ValueError):
+        fm.decode_template(b'\x00' * (FingerprintManager.TEMPLATE_SIZE - 2))
+
+
+def test_template_features_legacy_formats(fm):
+    image = fm.generate_simulated_fingerprint()
+    features = fm.extract_features(image)
+    
+    np.testing.assert_allclose(fm.template_features('bmp', image), features)
+    # Gabarits de l'ancienne grille: ignorés, membres à réenrôler
+    stale = fm.encode_template(features)
+    assert fm.template_features('f16', stale) is None
+    templates = [('a', 'f16', stale), ('b', FingerprintManager.TEMPLATE_FORMAT, stale), ('c', 'bmp', image)]
+    assert [id_empreinte for id_empreinte, _ in fm.iter_features(templates)] == ['b', 'c']
+
+
+def test_compare_fingerprints(fm):
+    img = fm.simulated_image()
+    template = fm.image_template(img)
+    
+    assert fm.compare_templates(template, template) == pytest.approx(1.0, abs=1e-3)
+    assert fm.compare_fingerprints(template, fm.image_template(fm.simulated_recapture(img)))
+    assert not fm.compare_fingerprints(template, fm.image_template(fm.simulated_image()))
+
+
+def test_simulated_reader_presents_enrolled_fingers(fm):
+    enrolled = [fm.capture_template(enroll=True)[0] for _ in range(20)]
+    engine = IdentificationEngine(DIMENSION, Config.FINGERPRINT_THRESHOLD)
+    engine.load((f"m{i}", fm.decode_template(t)) for i, t in enumerate(enrolled))
+    
+    fm.known_finger_rate = 1.0
+    assert all(engine.identify(fm.decode_template(fm.capture_template()[0])) for _ in range(20))
+    fm.known_finger_rate = 0.0
+    assert not any(engine.identify(fm.decode_template(fm.capture_template()[0])) for _ in range(20))
+
+
+def test_identify_exact_and_unknown():
+    vectors = random_vectors(100)
+    engine = IdentificationEngine(DIMENSION, threshold=0.9)
+    engine.load((f"m{i}", v) for i, v in enumerate(vectors))
+    
+    match = engine.identify(vectors[42])
+    assert match[0] == 'm42'
+    assert match[1] == pytest.approx(1.0, abs=1e-5)
+    # Vecteurs aléatoires en dimension 256: similarité proche de 0
+    assert engine.identify(random_vectors(1, seed=1)[0]) is None
+
+
+def test_search_sorted_by_score():
+    vectors = random_vectors(50)
+    engine = IdentificationEngine(DIMENSION)
+    engine.load((f"m{i}", v) for i, v in enumerate(vectors))
+    
+    results = engine.search(vectors[3] + 0.5 * vectors[4], top_k=3)
+    assert [r[0] for r in results[:2]] == ['m3', 'm4']
+    assert [r[1] for r in results] == sorted((r[1] for r in results), reverse=True)
+
+
+def test_remove_and_replace():
+    vectors = random_vectors(10)
+    engine = IdentificationEngine(DIMENSION, threshold=0.9)
+    engine.load((f"m{i}", v) for i, v in enumerate(vectors))
+    
+    engine.remove('m2')
+    assert 'm2' not in engine and len(engine) == 9
+    assert engine.identify(vectors[2]) is None
+    # La dernière ligne a pris la place de la ligne retirée
+    assert engine.identify(vectors[9])[0] == 'm9'
+    
+    engine.add('m5', vectors[2])
+    assert len(engine) == 9
+    assert engine.identify(vectors[2])[0] == 'm5'
+    assert engine.identify(vectors[5]) is None
+
+
+def test_dimension_is_checked():
+    engine = IdentificationEngine(DIMENSION)
+    with pytest.raises(ValueError):
+        engine.add('m0', np.ones(DIMENSION + 1))
+
+
+def test_prefilter_finds_noisy_probes():
+    vectors = random_vectors(3000)
+    engine = IdentificationEngine(DIMENSION, threshold=0.8, prefilter_min=0)
+    engine.load((f"m{i}", v) for i, v in enumerate(vectors))
+    
+    noise = random_vectors(100, seed=2) * 0.4
+    found = sum(engine.search(vectors[i] + noise[i], top_k=1)[0][0] == f"m{i}" for i in range(100))
+    assert engine.stats()['prefiltrees'] == 100
+    assert engine.stats()['candidats_moyens'] <= engine.max_candidates
+    assert found >= 95
+
+
+@pytest.mark.parametrize('margin, expected', [(0.0, None), (0.05, None), (1.0, 'm7')])
+def test_exhaustive_fallback_bounded_by_margin(margin, expected):
+    vectors = random_vectors(500)
+    engine = IdentificationEngine(DIMENSION, threshold=0.8, prefilter_min=0, fallback_margin=margin)
+    engine.load((f"m{i}", v) for i, v in enumerate(vectors))
+    # Préfiltre qui écarte le vrai membre: les autres candidats sont loin du seuil
+    engine._candidates = lambda vector, count: np.arange(100, 200)
+    
+    match = engine.identify(vectors[7])
+    
+    assert (match[0] if match else None) == expected
+    assert engine.stats()['repli_exhaustif'] == (1 if margin == 1.0 else 0)
+
+
+def test_error_rates_at_configured_threshold(fm):
+    """FAR et FRR des images simulées au seuil de la configuration"""
+    engine = IdentificationEngine(DIMENSION, Config.FINGERPRINT_THRESHOLD)
+    images = []
+    for i in range(2000):
+        img = fm.simulated_image()
+        engine.add(f"m{i}", fm.image_features(img))
+        if i < 100:
+            images.append(img)
+    
+    impostors = sum(engine.identify(fm.image_features(fm.simulated_image())) is not None for _ in range(200))
+    rejected = sum((engine.identify(fm.image_features(fm.simulated_recapture(img))) or ('',))[0] != f"m{i}"
+                   for i, img in enumerate(images))
+    assert impostors / 200 <= 0.01
+    assert rejected / 100 <= 0.10
+
+
+def test_prefiltered_identification_of_recaptures(fm):
+    """Préfiltre LSH actif sur des gabarits simulés, avec ajouts et réenrôlements incrémentaux"""
+    engine = IdentificationEngine(DIMENSION, Config.FINGERPRINT_THRESHOLD, prefilter_min=0)
+    images = [fm.simulated_image() for _ in range(300)]
+    engine.load((f"m{i}", fm.image_features(img)) for i, img in enumerate(images))
+    
+    found = sum((engine.identify(fm.image_features(fm.simulated_recapture(img))) or ('',))[0] == f"m{i}"
+                for i, img in enumerate(images[:50]))
+    assert found >= 45
+    assert engine.stats()['prefiltrees'] >= 50
+    
+    # Nouvel enrôlement puis réenrôlement de m0 avec un autre doigt
+    new = fm.simulated_image()
+    engine.add('m300', fm.image_features(new))
+    assert engine.identify(fm.image_features(fm.simulated_recapture(new)))[0] == 'm300'
+    other = fm.simulated_image()
+    engine.add('m0', fm.image_features(other))
+    assert engine.identify(fm.image_features(fm.simulated_recapture(other)))[0] == 'm0'
+    assert engine.identify(fm.image_features(images[0])) is None
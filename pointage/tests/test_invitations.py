@@ -0,0 +1,100 @@
+# =============================================================================
+# FICHIER: tests/test_invitations.py - Invitations et ensemble chaud de l'identification
+# =============================================================================
+
+import numpy as np
+import pytest
+
+from config import Config
+from conftest import membre_data
+from fingerprint_manager import FingerprintManager
+from identification import IdentificationEngine, MemberMatcher
+from member_cache import MemberCache
+
+DIMENSION = FingerprintManager.FEATURE_DIMENSION
+
+
+def test_invitation_crud(db, reunion):
+    ids = [db.add_membre(membre_data(i, service='RH' if i < 3 else 'IT')) for i in range(5)]
+    
+    assert db.invite_services(reunion, ['RH']) == 3
+    assert db.add_invitations(reunion, [ids[0], ids[4]]) == 1  # ids[0] déjà invité
+    assert sorted(db.get_invitations(reunion)) == sorted(ids[:3] + [ids[4]])
+    assert db.count_invitations(reunion) == 4
+    
+    assert db.remove_invitation(reunion, ids[1])
+    assert db.count_invitations(reunion) == 3
+    assert ids[1] not in db.get_invitations(reunion)
+    assert db.invite_services(reunion, []) == 0
+
+
+def test_invitation_templates_only_active_members(db, reunion):
+    fm = FingerprintManager()
+    template = fm.encode_template(np.ones(DIMENSION, dtype=np.float32))
+    ids = [db.add_membre(membre_data(i, gabarit_format=FingerprintManager.TEMPLATE_FORMAT, gabarit_data=template))
+           for i in range(3)]
+    db.add_invitations(reunion, ids)
+    with db.pool.connection() as conn:
+        conn.execute("UPDATE Membre SET actif = 0 WHERE id_empreinte = ?", (ids[2],))
+    
+    assert sorted(row[0] for row in db.iter_invitation_templates(reunion, chunk_size=1)) == sorted(ids[:2])
+    assert sorted(db.get_invitations(reunion)) == sorted(ids[:2])
+
+
+@pytest.fixture
+def matcher_setup(db, reunion):
+    """Deux membres au même gabarit: l'un invité à la réunion, l'autre non"""
+    fm = FingerprintManager()
+    vector = np.random.default_rng(11).standard_normal(DIMENSION).astype(np.float32)
+    template = fm.encode_template(vector)
+    invite, autre = (db.add_membre(membre_data(i, gabarit_format=FingerprintManager.TEMPLATE_FORMAT,
+                                               gabarit_data=template)) for i in (1, 2))
+    db.add_invitations(reunion, [invite])
+    
+    engine = IdentificationEngine(DIMENSION, Config.FINGERPRINT_THRESHOLD)
+    engine.load(fm.iter_features(db.iter_templates()))
+    matcher = MemberMatcher(MemberCache(db), engine, fm)
+    return matcher, invite, autre, template
+
+
+def test_matcher_invites_first_then_all_members(db, reunion, matcher_setup, monkeypatch):
+    monkeypatch.setattr(Config, 'IDENTIFICATION_ENABLED', True)
+    matcher, invite, autre, template = matcher_setup
+    probe = matcher.fingerprint_manager.encode_template(
+        matcher.fingerprint_manager.decode_template(template) + np.float32(0.01))
+    
+    # Sans ensemble chaud: recherche dans tous les membres
+    assert matcher.match(probe, 'inconnu', reunion)[2] == 'membres'
+    
+    matcher.set_invites(matcher.build_invites(reunion, db.get_invitations(reunion),
+                                              db.iter_invitation_templates(reunion)))
+    membre, score, source = matcher.match(probe, 'inconnu', reunion)
+    assert (membre['id_empreinte'], source) == (invite, 'invites')
+    assert score >= Config.FINGERPRINT_THRESHOLD
+    # Ensemble chaud d'une autre réunion: ignoré
+    assert matcher.match(probe, 'inconnu', reunion + 1)[2] == 'membres'
+    
+    # Un non-invité est trouvé ensuite dans tous les membres
+    other = np.random.default_rng(12).standard_normal(DIMENSION).astype(np.float32)
+    matcher.add(autre, other, 'hash2')
+    membre, _, source = matcher.match(matcher.fingerprint_manager.encode_template(other), 'inconnu', reunion)
+    assert (membre['id_empreinte'], source) == (autre, 'membres')
+
+
+def test_matcher_invites_by_hash_without_identification(db, reunion, matcher_setup, monkeypatch):
+    monkeypatch.setattr(Config, 'IDENTIFICATION_ENABLED', False)
+    matcher, invite, autre, template = matcher_setup
+    invites = matcher.build_invites(reunion, db.get_invitations(reunion), db.iter_invitation_templates(reunion))
+    matcher.set_invites(invites)
+    
+    assert invites.ids == {invite} and len(invites.engine) == 0
+    membre, score, source = matcher.match(template, 'hash1', reunion)
+    assert (membre['id_empreinte'], score, source) == (invite, 1.0, 'invites')
+    assert matcher.match(template, 'hash2', reunion)[2] == 'hash'
+    # Pas de recherche 1:N: un gabarit sans hash connu est inconnu
+    assert matcher.match(template, 'inconnu', reunion) == (None, 0.0, 'inconnu')
+    
+    # Réenrôlement d'un invité: son nouveau hash remplace l'ancien
+    matcher.add(invite, matcher.fingerprint_manager.decode_template(template), 'hash1b')
+    assert matcher.match(template, 'hash1b', reunion)[2] == 'invites'
+    assert 'hash1' not in invites.hashes
@@ -0,0 +1,45 @@
+# =============================================================================
+# FICHIER: tests/test_logger.py - Journalisation JSON non bloquante
+# =============================================================================
+
+import json
+import logging
+import queue
+import sys
+
+from logger import JsonFormatter, _QueueHandler
+
+
+def record_with_exception() -> logging.LogRecord:
+    try:
+        raise ValueError("gabarit invalide")
+    except ValueError:
+        exc_info = sys.exc_info()
+    record = logging.LogRecord('pointage.test', logging.ERROR, __file__, 1, "Membre %s: %d essais",
+                               ('M001', 3), exc_info)
+    record.span = 'identification'
+    return record
+
+
+def test_queue_handler_leaves_record_intact():
+    log_queue = queue.SimpleQueue()
+    record = record_with_exception()
+    
+    _QueueHandler(log_queue).handle(record)
+    
+    assert (record.msg, record.args) == ("Membre %s: %d essais", ('M001', 3))
+    assert record.exc_info is not None and record.exc_text is None
+    queued = log_queue.get_nowait()
+    assert queued is not record
+    assert (queued.msg, queued.args, queued.exc_info) == ("Membre M001: 3 essais", None, None)
+
+
+def test_json_formatter_of_queued_record():
+    log_queue = queue.SimpleQueue()
+    _QueueHandler(log_queue).handle(record_with_exception())
+    
+    entry = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    
+    assert entry['message'] == "Membre M001: 3 essais"
+    assert entry['niveau'] == 'ERROR' and entry['span'] == 'identification'
+    assert 'ValueError: gabarit invalide' in entry['exception']
@@ -0,0 +1,47 @@
+# =============================================================================
+# FICHIER: tests/test_member_cache.py - Cache mémoire des membres
+# =============================================================================
+
+from conftest import membre_data
+from member_cache import MemberCache
+
+
+def expected_order(cache):
+    return sorted(cache._by_id.values(), key=lambda m: (m['nom'], m['prenom'], m['id_empreinte']))
+
+
+def test_sorted_list_kept_in_order(db):
+    for i in (5, 1, 3):
+        db.add_membre(membre_data(i))
+    cache = MemberCache(db)
+    
+    ids = [cache.add_membre(membre_data(i)) for i in (4, 0, 2)]
+    assert [m['nom'] for m in cache.all()] == [f'NOM{i}' for i in range(6)]
+    
+    # Changement de nom: le membre change de place sans tri complet
+    cache.update_membre(ids[1], membre_data(0, nom='ZED'))
+    assert cache.all()[-1]['nom'] == 'ZED'
+    assert cache.all() == expected_order(cache)
+    
+    cache.invalidate(ids[0])
+    assert cache.count() == 5
+    assert cache.all() == expected_order(cache)
+    assert [m['nom'] for m in cache.slice(1, 2)] == ['NOM2', 'NOM3']
+
+
+def test_homonyms_are_all_listed(db):
+    cache = MemberCache(db)
+    ids = [cache.add_membre(membre_data(i, nom='DUPONT', prenom='Jean')) for i in range(3)]
+    
+    assert sorted(m['id_empreinte'] for m in cache.find_by_name('DUPONT', 'Jean')) == sorted(ids)
+    cache.invalidate(ids[1])
+    assert [m['id_empreinte'] for m in cache.all()] == sorted(i for i in ids if i != ids[1])
+
+
+def test_lookup_by_hash_and_email(db):
+    cache = MemberCache(db)
+    id_empreinte = cache.add_membre(membre_data(1))
+    
+    assert cache.find_by_hash('hash1')['id_empreinte'] == id_empreinte
+    assert cache.find_by_email('membre1@exemple.org')['id_empreinte'] == id_empreinte
+    assert cache.find_by_hash('inconnu') is None
@@ -0,0 +1,53 @@
+# =============================================================================
+# FICHIER: tests/test_member_import.py - Import en masse des membres
+# =============================================================================
+
+import csv
+
+from PIL import Image
+
+from conftest import membre_data
+from member_import import MemberImporter
+
+
+def gabarit(data: dict) -> dict:
+    data.update(gabarit_format='f16', gabarit_data=bytes(512))
+    return data
+
+
+def test_import_rejects_only_failing_rows(db):
+    db.add_membre(membre_data(0))
+    rejected = []
+    batches = [[gabarit(membre_data(i)) for i in range(1, 4)],
+               [gabarit(membre_data(4)), gabarit(membre_data(5, email='membre0@exemple.org'))]]
+    
+    count = db.import_membres(batches, on_error=lambda m, e: rejected.append((m['nom'], e)))
+    
+    assert count == 4
+    assert sorted(m['nom'] for m in db.get_all_membres()) == ['NOM0', 'NOM1', 'NOM2', 'NOM3', 'NOM4']
+    assert [nom for nom, _ in rejected] == ['NOM5']
+    assert 'UNIQUE' in rejected[0][1]
+
+
+def test_import_file_writes_database_errors(db, tmp_path, monkeypatch):
+    db.add_membre(membre_data(0))
+    Image.new('L', (64, 64), 128).save(tmp_path / 'e.png')
+    source = tmp_path / 'membres.csv'
+    with open(source, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Nom', 'Prénom', 'Service', 'Email', 'Empreinte'])
+        writer.writerow(['NOM1', 'Prenom1', 'RH', 'membre1@exemple.org', 'e.png'])
+        writer.writerow(['NOM2', 'Prenom2', 'RH', 'membre0@exemple.org', 'e.png'])
+        writer.writerow(['NOM3', 'Prenom3', 'RH', '', 'e.png'])
+    # Membre ajouté par un autre poste après la lecture des emails connus
+    monkeypatch.setattr(db, 'get_membre_emails', set)
+    
+    errors_path = tmp_path / 'erreurs.csv'
+    stats = MemberImporter(db, workers=1).import_file(str(source), str(errors_path))
+    
+    assert stats['importees'] == 1 and stats['erreurs'] == 2
+    with open(errors_path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f, delimiter=';'))
+    assert [row['ligne'] for row in rows] == ['3', '4']
+    assert rows[0]['nom'] == 'NOM2' and 'Refusé par la base' in rows[0]['erreur']
+    assert 'email' in rows[1]['erreur']
@@ -0,0 +1,64 @@
+# =============================================================================
+# FICHIER: tests/test_metrics.py - Métriques et export Prometheus
+# =============================================================================
+
+import re
+import urllib.request
+
+import pytest
+
+from metrics import BUCKETS, MetricsExporter, MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    latency = registry.histogram('scan_secondes', "Durée d'un scan", poste='A')
+    for seconds in (0.0003, 0.002, 0.002, 0.04, 100.0):
+        latency.record(seconds)
+    registry.counter('scans_total', "Scans").inc(5)
+    return registry
+
+
+def test_histogram_cumulative_buckets(registry):
+    cumulative = registry.histogram('scan_secondes', poste='A').cumulative()
+    
+    assert len(cumulative) == len(BUCKETS) + 1
+    assert cumulative == sorted(cumulative)
+    assert cumulative[BUCKETS.index(0.0005)] == 1
+    assert cumulative[BUCKETS.index(0.0025)] == 3
+    assert cumulative[BUCKETS.index(0.05)] == 4
+    assert cumulative[-2] == 4 and cumulative[-1] == 5  # 100 s: seulement dans +Inf
+
+
+def test_prometheus_histogram_exposition(registry):
+    text = registry.prometheus_text()
+    
+    assert '# TYPE pointage_scan_secondes histogram' in text
+    assert 'quantile=' not in text
+    buckets = re.findall(r'pointage_scan_secondes_bucket\{poste="A",le="([^"]+)"\} (\d+)', text)
+    assert [le for le, _ in buckets] == [f"{b:g}" for b in BUCKETS] + ['+Inf']
+    assert buckets[-1][1] == '5'
+    assert 'pointage_scan_secondes_count{poste="A"} 5' in text
+    assert re.search(r'pointage_scan_secondes_sum\{poste="A"\} 100\.0', text)
+    assert 'pointage_scans_total 5' in text
+
+
+def test_exporter_disabled_without_port(registry):
+    exporter = MetricsExporter(registry)
+    exporter.start()
+    try:
+        assert exporter._server is None and not exporter._threads
+    finally:
+        exporter.stop()
+
+
+def test_exporter_serves_metrics(registry):
+    exporter = MetricsExporter(registry, port=0)
+    exporter.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics", timeout=5) as response:
+            body = response.read().decode('utf-8')
+    finally:
+        exporter.stop()
+    assert body == registry.prometheus_text()
@@ -0,0 +1,134 @@
+# =============================================================================
+# FICHIER: tests/test_migrations.py - Migration d'une base au schéma d'origine
+# =============================================================================
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from database import DatabaseManager
+from fingerprint_manager import FingerprintManager
+from member_cache import MemberCache
+
+# Schéma de la première version de l'application (images dans Membre.empreinte_data)
+BASELINE_SCHEMA = '''
+CREATE TABLE Membre (
+    id_empreinte TEXT PRIMARY KEY,
+    titre TEXT NOT NULL,
+    nom TEXT NOT NULL,
+    prenom TEXT NOT NULL,
+    service TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    telephone TEXT,
+    empreinte_data BLOB,
+    empreinte_hash TEXT,
+    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    actif BOOLEAN DEFAULT 1
+);
+CREATE TABLE Reunion (
+    id_reunion INTEGER PRIMARY KEY AUTOINCREMENT,
+    titre_reunion TEXT NOT NULL,
+    lieu TEXT NOT NULL,
+    date_reunion TIMESTAMP NOT NULL,
+    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    statut TEXT DEFAULT 'planifiee'
+);
+CREATE TABLE Participation (
+    id_participation INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_reunion INTEGER,
+    id_empreinte TEXT,
+    heure_pointage TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    methode_pointage TEXT DEFAULT 'empreinte',
+    FOREIGN KEY (id_reunion) REFERENCES Reunion(id_reunion),
+    FOREIGN KEY (id_empreinte) REFERENCES Membre(id_empreinte)
+);
+CREATE INDEX idx_reunion_date ON Reunion(date_reunion);
+CREATE INDEX idx_participation_reunion ON Participation(id_reunion);
+'''
+
+
+def baseline_database(path: str, membres: list) -> None:
+    """Crée une base au schéma d'origine avec les membres (id, données d'image) donnés"""
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany('''
+    INSERT INTO Membre (id_empreinte, titre, nom, prenom, service, email, telephone, empreinte_data, empreinte_hash)
+    VALUES (?, 'M.', ?, ?, 'RH', ?, '0600000000', ?, ?)
+    ''', [(id_empreinte, f'NOM{i}', f'Prenom{i}', f'membre{i}@exemple.org', data, f'hash{i}')
+          for i, (id_empreinte, data) in enumerate(membres)])
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def fm():
+    return FingerprintManager()
+
+
+def test_legacy_images_moved_to_gabarit(tmp_path, fm):
+    path = str(tmp_path / 'pointage.db')
+    images = {f'm{i}': fm.generate_simulated_fingerprint() for i in range(3)}
+    baseline_database(path, list(images.items()) + [('m3', None)])
+    
+    db = DatabaseManager(path)
+    try:
+        conn = db.pool.get_connection()
+        rows = conn.execute('SELECT id_empreinte, gabarit_format, gabarit_data FROM Gabarit').fetchall()
+        assert {row[0]: (row[1], row[2]) for row in rows} == {i: ('bmp', data) for i, data in images.items()}
+        assert conn.execute('SELECT COUNT(*) FROM Membre WHERE empreinte_data IS NOT NULL').fetchone()[0] == 0
+        
+        # Identité intacte, sans les données d'empreinte
+        membre = db.get_membre('m1')
+        assert (membre['nom'], membre['prenom'], membre['email'], membre['telephone'], membre['empreinte_hash']) == \
+            ('NOM1', 'Prenom1', 'membre1@exemple.org', '0600000000', 'hash1')
+        cache = MemberCache(db)
+        assert cache.count() == 4
+        assert cache.find_by_hash('hash3')['id_empreinte'] == 'm3'
+        
+        # Gabarits chargés à la demande: caractéristiques recalculées depuis l'image
+        assert db.get_template('m0') == ('bmp', images['m0'])
+        assert db.get_template('m3') is None
+        features = dict(fm.iter_features(db.iter_templates()))
+        assert sorted(features) == ['m0', 'm1', 'm2']
+        np.testing.assert_allclose(features['m2'], fm.extract_features(images['m2']))
+        
+        # Conversion au format compact (chargement des gabarits de l'interface)
+        db.save_templates([(i, FingerprintManager.TEMPLATE_FORMAT, fm.encode_template(f)) for i, f in features.items()])
+        assert {row[1] for row in db.iter_templates()} == {FingerprintManager.TEMPLATE_FORMAT}
+    finally:
+        db.close()
+    
+    # Migration idempotente à la réouverture
+    db = DatabaseManager(path)
+    try:
+        assert len(list(db.iter_templates())) == 3
+    finally:
+        db.close()
+
+
+def test_duplicate_participations_removed_before_unique_index(tmp_path):
+    path = str(tmp_path / 'pointage.db')
+    baseline_database(path, [('m0', None), ('m1', None)])
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO Reunion (titre_reunion, lieu, date_reunion) VALUES ('R', 'Salle', '2025-03-10 09:00')")
+    conn.executemany('INSERT INTO Participation (id_reunion, id_empreinte, heure_pointage) VALUES (1, ?, ?)', [
+        ('m0', '2025-03-10 09:01'), ('m0', '2025-03-10 09:05'), ('m1', '2025-03-10 09:02'), ('m0', '2025-03-10 09:07'),
+    ])
+    conn.commit()
+    conn.close()
+    
+    db = DatabaseManager(path)
+    try:
+        conn = db.pool.get_connection()
+        rows = conn.execute('SELECT id_empreinte, heure_pointage FROM Participation ORDER BY id_empreinte').fetchall()
+        # Le premier pointage de chaque membre est conservé
+        assert rows == [('m0', '2025-03-10 09:01'), ('m1', '2025-03-10 09:02')]
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_participation_unique' in indexes and 'idx_participation_reunion' not in indexes
+        assert db.count_participants(1) == 2
+        with pytest.raises(sqlite3.IntegrityError):
+            with db.pool.connection() as conn:
+                conn.execute("INSERT INTO Participation (id_reunion, id_empreinte) VALUES (1, 'm0')")
+    finally:
+        db.close()
@@ -0,0 +1,61 @@
+# =============================================================================
+# FICHIER: tests/test_profiler.py - Profilage à la demande
+# =============================================================================
+
+import os
+import threading
+import time
+
+import pytest
+
+import profiler
+from profiler import Profiler
+
+
+def travail_de_fond(results: list, duree: float = 0.2):
+    fin = time.perf_counter() + duree
+    total = 0
+    while time.perf_counter() < fin:
+        total += sum(range(200))
+    results.append(total)
+
+
+def read(path: str) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def run_thread_under(prof: Profiler) -> list:
+    """Démarre un thread de travail pendant le profilage et attend sa fin"""
+    results = []
+    prof.start()
+    try:
+        thread = threading.Thread(target=travail_de_fond, args=(results,), name='travail_thread')
+        thread.start()
+        thread.join(timeout=5)
+    finally:
+        prof.stop()
+    return results
+
+
+@pytest.mark.skipif(not profiler.PER_THREAD_CPROFILE, reason="cProfile par thread avant Python 3.12")
+def test_cprofile_profiles_new_threads(tmp_path):
+    prof = Profiler('cprofile', str(tmp_path), dump_interval=60)
+    
+    assert run_thread_under(prof)  # Le thread n'a pas été interrompu par le profileur
+    
+    report = read(f"{prof._prefix}.txt")
+    assert 'travail_de_fond' in report
+    assert os.path.exists(f"{prof._prefix}.prof")
+
+
+def test_cprofile_falls_back_to_sampling(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, 'PER_THREAD_CPROFILE', False)
+    prof = Profiler('cprofile', str(tmp_path), sample_ms=5, dump_interval=60)
+    assert prof.mode == 'echantillonnage'
+    
+    assert run_thread_under(prof)
+    
+    collapsed = read(f"{prof._prefix}.collapsed")
+    assert any(line.startswith('travail_thread;') and 'travail_de_fond' in line
+               for line in collapsed.splitlines())
@@ -0,0 +1,130 @@
+# =============================================================================
+# FICHIER: tests/test_report_jobs.py - File des rapports en arrière-plan
+# =============================================================================
+
+import threading
+import time
+
+import pytest
+
+from report_jobs import ReportJob, ReportJobQueue
+
+
+@pytest.fixture
+def jobs():
+    queue = ReportJobQueue(workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def drain(jobs, job, timeout: float = 5.0) -> list:
+    """Lit poll() jusqu'à la fin du rapport et retourne les états observés"""
+    statuses = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for changed in jobs.poll():
+            if changed is job and (not statuses or statuses[-1] != job.status):
+                statuses.append(job.status)
+        if job.finished and jobs.poll() == []:
+            return statuses
+        time.sleep(0.01)
+    raise AssertionError(f"Rapport non terminé: {job.status}")
+
+
+def test_jobs_run_in_order_one_at_a_time(jobs):
+    release = threading.Event()
+    first = jobs.submit("premier", lambda job: release.wait(5))
+    second = jobs.submit("second", lambda job: job.progress(10))
+    
+    assert [job.description for job in jobs.active()] == ["premier", "second"]
+    deadline = time.monotonic() + 5
+    while first.status != ReportJob.EN_COURS and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert second.status == ReportJob.EN_ATTENTE
+    
+    release.set()
+    assert drain(jobs, second)[-1] == ReportJob.TERMINE
+    assert first.status == ReportJob.TERMINE
+    assert second.rows_written == 10
+    assert jobs.active() == []
+
+
+def test_poll_status_sequence(jobs):
+    started = threading.Event()
+    release = threading.Event()
+    
+    def func(job):
+        started.set()
+        return release.wait(5)
+    
+    job = jobs.submit("rapport", func)
+    assert started.wait(5)
+    assert jobs.poll() == [job] and job.status == ReportJob.EN_COURS
+    assert jobs.poll() == []
+    
+    release.set()
+    assert drain(jobs, job) == [ReportJob.TERMINE]
+
+
+def test_cancel_queued_job_never_runs(jobs):
+    release = threading.Event()
+    calls = []
+    jobs.submit("premier", lambda job: release.wait(5))
+    queued = jobs.submit("second", lambda job: calls.append(job) or True)
+    
+    queued.cancel()
+    release.set()
+    assert drain(jobs, queued)[-1] == ReportJob.ANNULE
+    assert calls == []
+
+
+def test_cancel_running_job_removes_partial_file(jobs, tmp_path):
+    filepath = tmp_path / 'rapport.xlsx'
+    
+    def func(job):
+        filepath.write_bytes(b'incomplet')
+        job.cancel()
+        return job.progress(1)
+    
+    job = jobs.submit("rapport", func, filepath=str(filepath))
+    assert drain(jobs, job)[-1] == ReportJob.ANNULE
+    assert not filepath.exists()
+
+
+def test_cancel_keeps_replaced_file(jobs, tmp_path):
+    filepath = tmp_path / 'rapport.xlsx'
+    filepath.write_bytes(b'rapport precedent')
+    
+    def func(job):
+        job.cancel()
+        return job.progress(1)
+    
+    job = jobs.submit("rapport", func, filepath=str(filepath))
+    assert drain(jobs, job)[-1] == ReportJob.ANNULE
+    assert filepath.read_bytes() == b'rapport precedent'
+
+
+def test_cancel_after_success_keeps_report(jobs, tmp_path):
+    filepath = tmp_path / 'rapport.xlsx'
+    
+    def func(job):
+        filepath.write_bytes(b'complet')
+        job.cancel()
+        return True
+    
+    job = jobs.submit("rapport", func, filepath=str(filepath))
+    assert drain(jobs, job)[-1] == ReportJob.TERMINE
+    assert filepath.read_bytes() == b'complet'
+
+
+def test_error_reported(jobs):
+    def func(job):
+        raise RuntimeError("disque plein")
+    
+    job = jobs.submit("rapport", func)
+    assert drain(jobs, job)[-1] == ReportJob.ERREUR
+    assert str(job.error) == "disque plein"
+    
+    failed = jobs.submit("rapport", lambda job: False)
+    assert drain(jobs, failed)[-1] == ReportJob.ERREUR
+    assert failed.error is None
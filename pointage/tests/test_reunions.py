@@ -0,0 +1,70 @@
+# =============================================================================
+# FICHIER: tests/test_reunions.py - Requêtes et cache des réunions
+# =============================================================================
+
+import pytest
+
+from reunion_cache import ReunionCache
+
+
+@pytest.fixture
+def reunions(db):
+    """Six réunions du 10 au 15 mars, la dernière terminée; ids par jour"""
+    ids = {}
+    for day in range(10, 16):
+        ids[day] = db.create_reunion({'titre': f'Réunion {day}', 'lieu': 'Salle', 'date': f'2025-03-{day} 09:00'})
+    db.update_reunion_status(ids[12], 'en_cours')
+    db.update_reunion_status(ids[15], 'terminee')
+    return ids
+
+
+def days(reunions, result):
+    by_id = {id_reunion: day for day, id_reunion in reunions.items()}
+    return [by_id[r['id_reunion']] for r in result]
+
+
+def test_get_reunions_filters(db, reunions):
+    assert days(reunions, db.get_reunions()) == [15, 14, 13, 12, 11, 10]
+    assert days(reunions, db.get_reunions(statut='terminee')) == [15]
+    assert days(reunions, db.get_reunions(statut=ReunionCache.STATUTS_ACTIFS)) == [14, 13, 12, 11, 10]
+    # Bornes incluses, jour de fin entier
+    assert days(reunions, db.get_reunions(date_debut='2025-03-11', date_fin='2025-03-13')) == [13, 12, 11]
+    assert days(reunions, db.get_reunions(statut='planifiee', date_fin='2025-03-12')) == [11, 10]
+    assert db.count_reunions(statut='planifiee', date_debut='2025-03-12') == 2
+    assert db.get_reunions(date_debut='2025-04-01') == []
+
+
+def test_get_reunions_pagination(db, reunions):
+    pages = [days(reunions, db.get_reunions(limit=4, offset=offset)) for offset in (0, 4, 8)]
+    assert pages == [[15, 14, 13, 12], [11, 10], []]
+    assert days(reunions, db.get_reunions(statut='planifiee', limit=2, offset=1)) == [13, 11]
+
+
+def test_get_reunion(db, reunions):
+    reunion = db.get_reunion(reunions[12])
+    assert reunion == {'id_reunion': reunions[12], 'titre': 'Réunion 12', 'lieu': 'Salle',
+                       'date': '2025-03-12 09:00', 'statut': 'en_cours'}
+    assert db.get_reunion(max(reunions.values()) + 1) is None
+
+
+def test_cache_drops_ended_reunion(db, reunions):
+    cache = ReunionCache(db)
+    assert [r['id_reunion'] for r in cache.actives()] == [reunions[day] for day in (14, 13, 12, 11, 10)]
+    assert cache.get(reunions[13])['statut'] == 'planifiee'
+    
+    # Réunion terminée depuis l'interface: retirée des réunions actives
+    assert cache.update_reunion_status(reunions[13], 'terminee')
+    assert reunions[13] not in [r['id_reunion'] for r in cache.actives()]
+    misses = cache.stats()['misses']
+    assert cache.get(reunions[13])['statut'] == 'terminee'  # Relue en base
+    assert cache.stats()['misses'] == misses + 1
+    
+    # Réunion terminée par un autre poste: prise en compte au rechargement
+    db.update_reunion_status(reunions[14], 'terminee')
+    assert cache.get(reunions[14])['statut'] == 'planifiee'
+    cache.load()
+    assert [r['id_reunion'] for r in cache.actives()] == [reunions[day] for day in (12, 11, 10)]
+    
+    # Nouvelle réunion: ajoutée au cache
+    id_reunion = cache.create_reunion({'titre': 'Nouvelle', 'lieu': 'Salle', 'date': '2025-03-20 09:00'})
+    assert cache.actives()[0]['id_reunion'] == id_reunion
@@ -0,0 +1,127 @@
+# =============================================================================
+# FICHIER: tests/test_scan_pool.py - Pool de workers d'identification
+# =============================================================================
+
+import threading
+import time
+
+import pytest
+
+from scan_pool import ScanWorkerPool
+
+
+class BlockingHandler:
+    """Handler qui retourne son payload, bloqué tant que release n'est pas levé"""
+    
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+    
+    def __call__(self, payload):
+        self.started.set()
+        assert self.release.wait(5)
+        return payload
+
+
+@pytest.fixture
+def handler():
+    handler = BlockingHandler()
+    yield handler
+    handler.release.set()
+
+
+def collect(pool, count: int, timeout: float = 5.0) -> list:
+    """Résultats livrés par poll() jusqu'à ce que la file soit vide"""
+    pool.wait()
+    results = []
+    deadline = time.monotonic() + timeout
+    while len(results) < count and time.monotonic() < deadline:
+        results.extend(pool.poll())
+        time.sleep(0.01)
+    return results + pool.poll()
+
+
+def test_bounded_queue_rejects(handler):
+    pool = ScanWorkerPool(handler, workers=1, max_pending=2, supersede=False)
+    try:
+        assert pool.submit('a') == 1
+        assert handler.started.wait(5)
+        assert pool.submit('b') == 2 and pool.submit('c') == 3
+        assert pool.submit('d') is None
+        
+        handler.release.set()
+        assert [r.result for r in collect(pool, 3)] == ['a', 'b', 'c']
+        stats = pool.stats()
+        assert (stats['soumis'], stats['rejetes'], stats['traites']) == (4, 1, 3)
+    finally:
+        pool.stop()
+
+
+def test_supersede_delivers_latest_only(handler):
+    pool = ScanWorkerPool(handler, workers=1, max_pending=1)
+    try:
+        pool.submit('a')
+        assert handler.started.wait(5)
+        pool.submit('b')
+        latest = pool.submit('c')  # Retire 'b' de la file
+        
+        handler.release.set()
+        results = collect(pool, 1)
+        assert [(r.seq, r.result) for r in results] == [(latest, 'c')]
+        # 'b' annulé en file, 'a' dépassé par 'c'
+        assert pool.stats()['annules'] == 2
+    finally:
+        pool.stop()
+
+
+def test_rejected_scan_does_not_supersede(handler, monkeypatch):
+    pool = ScanWorkerPool(handler, workers=1, max_pending=1)
+    try:
+        pool.submit('a')
+        assert handler.started.wait(5)
+        accepted = pool.submit('b')
+        # File encore pleine malgré l'annulation (soumission concurrente)
+        monkeypatch.setattr(pool, '_cancel_pending', lambda: None)
+        assert pool.submit('c') is None
+        
+        handler.release.set()
+        assert [(r.seq, r.result) for r in collect(pool, 1)] == [(accepted, 'b')]
+    finally:
+        pool.stop()
+
+
+def test_stale_scans_dropped(handler):
+    pool = ScanWorkerPool(handler, workers=1, max_age=0.05, supersede=False)
+    try:
+        pool.submit('a')
+        assert handler.started.wait(5)
+        pool.submit('b')
+        time.sleep(0.1)
+        
+        handler.release.set()
+        assert [r.result for r in collect(pool, 1)] == ['a']
+        assert pool.stats()['annules'] == 1
+    finally:
+        pool.stop()
+
+
+def test_errors_and_throughput_stats():
+    def handler(payload):
+        if payload == 'erreur':
+            raise ValueError(payload)
+        return payload
+    
+    pool = ScanWorkerPool(handler, workers=2, max_pending=4, supersede=False)
+    try:
+        for i in range(20):
+            pool.submit('erreur' if i == 5 else i, block=True)
+        results = collect(pool, 20)
+        
+        assert len(results) == 20
+        assert [str(r.error) for r in results if r.error] == ['erreur']
+        stats = pool.stats()
+        assert (stats['traites'], stats['erreurs'], stats['en_attente']) == (19, 1, 0)
+        assert stats['scans_par_s'] > 0
+        assert stats['latence_moyenne_ms'] > 0
+    finally:
+        pool.stop()
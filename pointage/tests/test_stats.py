@@ -0,0 +1,60 @@
+# =============================================================================
+# FICHIER: tests/test_stats.py - Statistiques de présence tenues par triggers
+# =============================================================================
+
+from conftest import membre_data
+from database import DatabaseManager
+
+
+def delete_participation(db, id_reunion, id_empreinte):
+    with db.pool.connection() as conn:
+        conn.execute('DELETE FROM Participation WHERE id_reunion = ? AND id_empreinte = ?',
+                     (id_reunion, id_empreinte))
+
+
+def test_stats_follow_participations(db, reunion):
+    ids = [db.add_membre(membre_data(i, service='RH' if i < 3 else 'DSI')) for i in range(5)]
+    for id_empreinte in ids:
+        db.add_participation(reunion, id_empreinte)
+    delete_participation(db, reunion, ids[0])
+    
+    stats = db.get_reunion_stats(reunion)
+    assert stats['nb_participants'] == 4
+    assert stats['par_service'] == {'DSI': 2, 'RH': 2}
+    assert stats['premier_pointage'] <= stats['dernier_pointage']
+
+
+def test_stats_keep_service_of_the_checkin(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1, service='RH'))
+    db.add_participation(reunion, id_empreinte)
+    
+    # Changement de service après le pointage: le pointage reste compté pour RH
+    db.update_membre(id_empreinte, membre_data(1, service='DSI'))
+    assert db.get_reunion_stats(reunion)['par_service'] == {'RH': 1}
+    
+    delete_participation(db, reunion, id_empreinte)
+    conn = db.pool.get_connection()
+    assert conn.execute('SELECT service, nb_participants FROM StatService').fetchall() == [('RH', 0)]
+
+
+def test_migration_snapshots_service_and_rebuilds_stats(db, reunion):
+    id_empreinte = db.add_membre(membre_data(1, service='RH'))
+    db.add_participation(reunion, id_empreinte)
+    # Base antérieure: pas de colonne service, compteurs dérivés
+    with db.pool.connection() as conn:
+        conn.execute('DROP TRIGGER trg_participation_stats_insert')
+        conn.execute('DROP TRIGGER trg_participation_stats_delete')
+        conn.execute('ALTER TABLE Participation DROP COLUMN service')
+        conn.execute("UPDATE StatService SET service = 'ANCIEN', nb_participants = 7")
+    db.close()
+    
+    migrated = DatabaseManager(db.db_path)
+    try:
+        conn = migrated.pool.get_connection()
+        assert conn.execute('SELECT service FROM Participation').fetchall() == [('RH',)]
+        assert migrated.get_reunion_stats(reunion)['par_service'] == {'RH': 1}
+        
+        delete_participation(migrated, reunion, id_empreinte)
+        assert migrated.get_reunion_stats(reunion)['par_service'] == {}
+    finally:
+        migrated.close()
@@ -0,0 +1,186 @@
+# =============================================================================
+# FICHIER: virtual_tree.py - Liste virtualisée pour les grands volumes
+# =============================================================================
+
+import tkinter as tk
+from tkinter import ttk
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# Une ligne affichée: (identifiant unique, valeurs des colonnes)
+Row = Tuple[str, Sequence]
+
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview qui ne matérialise que les lignes visibles et charge les données par pages"""
+    
+    def __init__(self, parent, columns: Sequence[str], height: int = 15,
+                 page_size: int = 200, max_pages: int = 20, xscroll: bool = False):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.visible_rows = height
+        self.offset = 0
+        self.total = 0
+        self._fetch_rows: Optional[Callable[[int, int], List[Row]]] = None
+        self._count_rows: Optional[Callable[[], int]] = None
+        self._pages: "OrderedDict[int, List[Row]]" = OrderedDict()
+        
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', height=height,
+                                 selectmode='browse')
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        if xscroll:
+            scrollbar_h = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview)
+            self.tree.configure(xscrollcommand=scrollbar_h.set)
+            scrollbar_h.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        
+        # Défilement à la molette, au clavier et redimensionnement
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_by(3))
+        self.tree.bind('<Up>', self._on_key_up)
+        self.tree.bind('<Down>', self._on_key_down)
+        self.tree.bind('<Prior>', lambda e: self._scroll_by(-self.visible_rows) or 'break')
+        self.tree.bind('<Next>', lambda e: self._scroll_by(self.visible_rows) or 'break')
+        self.tree.bind('<Configure>', self._on_configure)
+    
+    def set_source(self, fetch_rows: Callable[[int, int], List[Row]], count_rows: Callable[[], int]):
+        """Définit la source de données: fetch_rows(offset, limit) et count_rows()"""
+        self._fetch_rows = fetch_rows
+        self._count_rows = count_rows
+        self.offset = 0
+        self.refresh()
+    
+    def refresh(self):
+        """Recharge les données et applique les différences sur les lignes visibles"""
+        if self._count_rows is None:
+            return
+        self._pages.clear()
+        self.total = self._count_rows()
+        self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+        self._render()
+    
+    def clear(self):
+        """Vide la liste et oublie la source de données"""
+        self._fetch_rows = None
+        self._count_rows = None
+        self._pages.clear()
+        self.total = 0
+        self.offset = 0
+        self.tree.delete(*self.tree.get_children())
+        self.scrollbar.set(0.0, 1.0)
+    
+    def yview(self, *args):
+        """Commande de la barre de défilement (moveto / scroll)"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.visible_rows
+            self._scroll_by(step)
+    
+    def see(self, iid: str):
+        """Sélectionne une ligne si elle est actuellement chargée"""
+        if self.tree.exists(iid):
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+            self.tree.see(iid)
+    
+    def _scroll_by(self, step: int):
+        self._scroll_to(self.offset + step)
+    
+    def _scroll_to(self, offset: int):
+        offset = max(0, min(offset, self.total - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+    
+    def _rows(self, offset: int, limit: int) -> List[Row]:
+        """Retourne les lignes [offset, offset+limit) depuis le cache de pages"""
+        rows: List[Row] = []
+        first_page = offset // self.page_size
+        last_page = (offset + limit - 1) // self.page_size
+        for page in range(first_page, last_page + 1):
+            rows.extend(self._page(page))
+        start = offset - first_page * self.page_size
+        return rows[start:start + limit]
+    
+    def _page(self, page: int) -> List[Row]:
+        """Charge une page depuis la source, avec éviction des pages les plus anciennes"""
+        if page in self._pages:
+            self._pages.move_to_end(page)
+            return self._pages[page]
+        rows = self._fetch_rows(page * self.page_size, self.page_size)
+        self._pages[page] = rows
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return rows
+    
+    def _render(self):
+        """Met à jour les éléments du Treeview pour la fenêtre visible, par différence"""
+        if self._fetch_rows is None:
+            return
+        rows = self._rows(self.offset, self.visible_rows) if self.total else []
+        wanted_set = {iid for iid, _ in rows}
+        
+        current = self.tree.get_children()
+        stale = [iid for iid in current if iid not in wanted_set]
+        if stale:
+            self.tree.delete(*stale)
+        
+        for index, (iid, values) in enumerate(rows):
+            values = tuple(values)
+            if self.tree.exists(iid):
+                if tuple(str(v) for v in self.tree.item(iid, 'values')) != tuple(str(v) for v in values):
+                    self.tree.item(iid, values=values)
+                self.tree.move(iid, '', index)
+            else:
+                self.tree.insert('', index, iid=iid, values=values)
+        
+        self._update_scrollbar()
+    
+    def _update_scrollbar(self):
+        if self.total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            first = self.offset / self.total
+            last = min(1.0, (self.offset + self.visible_rows) / self.total)
+            self.scrollbar.set(first, last)
+    
+    def _on_mousewheel(self, event):
+        # Windows: multiples de 120, macOS: petites valeurs
+        step = -int(event.delta / 120) if abs(event.delta) >= 120 else -event.delta
+        self._scroll_by(step * 3)
+        return 'break'
+    
+    def _on_key_up(self, event):
+        children = self.tree.get_children()
+        if children and self.tree.focus() == children[0] and self.offset > 0:
+            self._scroll_by(-1)
+            self.see(self.tree.get_children()[0])
+            return 'break'
+    
+    def _on_key_down(self, event):
+        children = self.tree.get_children()
+        if children and self.tree.focus() == children[-1] and self.offset + len(children) < self.total:
+            self._scroll_by(1)
+            self.see(self.tree.get_children()[-1])
+            return 'break'
+    
+    def _on_configure(self, event):
+        """Adapte le nombre de lignes matérialisées à la hauteur disponible"""
+        rowheight = ttk.Style().lookup('Treeview', 'rowheight') or 20
+        visible = max(1, (event.height - int(rowheight) - 4) // int(rowheight))
+        if visible != self.visible_rows:
+            self.visible_rows = visible
+            self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+            self._render()